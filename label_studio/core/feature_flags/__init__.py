@@ -1 +1 @@
-from .base import all_flags, flag_set, get_feature_file_path
+from .base import all_flags, clear_flags_cache, flag_set, flags_snapshot, get_feature_file_path
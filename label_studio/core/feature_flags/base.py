@@ -1,4 +1,8 @@
 import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
 
 import ldclient
 from django.conf import settings
@@ -69,6 +73,63 @@ else:
     client = ldclient.get()
 
 
+# Flag evaluations are cached within a request or a `flags_snapshot` block (e.g. a background job),
+# evaluations for anonymous users are also cached per process for FEATURE_FLAGS_CACHE_TTL seconds
+_local = threading.local()
+_process_cache = {}
+# 'evaluated' - evaluations made by env lookup or LaunchDarkly client, 'avoided' - evaluations taken from caches
+flag_cache_stats = Counter()
+
+
+@contextmanager
+def flags_snapshot():
+    """Cache flag evaluations made within the block, it can be used as a decorator for job functions:
+    ```
+    @job('low')
+    @flags_snapshot()
+    def some_background_job(...):
+        ...
+    ```
+    Nested snapshots reuse the outer one.
+    """
+    if getattr(_local, 'snapshot', None) is not None:
+        yield
+        return
+
+    _local.snapshot = {}
+    try:
+        yield
+    finally:
+        _local.snapshot = None
+
+
+def clear_flags_cache():
+    """Drop flag evaluations cached by the process"""
+    _process_cache.clear()
+
+
+def _get_scoped_cache():
+    """Get the cache of the current flags snapshot or request, if any"""
+    snapshot = getattr(_local, 'snapshot', None)
+    if snapshot is not None:
+        return snapshot
+
+    request = get_current_request()
+    if request is None:
+        return None
+    cache = getattr(request, '_feature_flags_cache', None)
+    if cache is None:
+        cache = request._feature_flags_cache = {}
+    return cache
+
+
+def _get_user_cache_key(user):
+    """Anonymous users share the None key"""
+    if user is AnonymousUser or user.is_anonymous:
+        return None
+    return 'user', user.pk
+
+
 def flag_set(feature_flag, user=None, override_system_default=None):
     """Use this method to check whether this flag is set ON to the current user, to split the logic on backend
     For example,
@@ -97,6 +158,30 @@ def flag_set(feature_flag, user=None, override_system_default=None):
         if request and getattr(request, 'user', None) and request.user.is_authenticated:
             user = request.user
 
+    cache_key = (feature_flag, _get_user_cache_key(user), override_system_default)
+    cache = _get_scoped_cache()
+    if cache is not None and cache_key in cache:
+        flag_cache_stats['avoided'] += 1
+        return cache[cache_key]
+
+    use_process_cache = cache_key[1] is None and settings.FEATURE_FLAGS_CACHE_TTL > 0
+    if use_process_cache:
+        cached = _process_cache.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic():
+            flag_cache_stats['avoided'] += 1
+            return cached[1]
+
+    value = _evaluate_flag(feature_flag, user, override_system_default)
+    flag_cache_stats['evaluated'] += 1
+
+    if cache is not None:
+        cache[cache_key] = value
+    if use_process_cache:
+        _process_cache[cache_key] = (time.monotonic() + settings.FEATURE_FLAGS_CACHE_TTL, value)
+    return value
+
+
+def _evaluate_flag(feature_flag, user, override_system_default):
     env_value = get_bool_env(feature_flag, default=None)
     if env_value is not None:
         return env_value
@@ -1,8 +1,11 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import copy
+import hashlib
 import json
 import logging
 import re
+import threading
 from collections import OrderedDict, defaultdict
 from typing import Tuple, Union
 from urllib.parse import urlencode
@@ -12,8 +15,11 @@ import jsonschema
 import numpy as np
 import pandas as pd
 import xmljson
+from core.redis import redis_get, redis_set
 from django.conf import settings
+from django.utils.functional import cached_property
 from label_studio_sdk._extensions.label_studio_tools.core import label_config
+from label_studio_sdk.label_interface import LabelInterface
 from rest_framework.exceptions import ValidationError
 
 from label_studio.core.utils.io import find_file
@@ -49,7 +55,10 @@ def parse_config(config_string):
     }
     """
     logger.warning('Using deprecated method - switch to label_studio.tools.label_config.parse_config!')
-    return label_config.parse_config(config_string)
+    if not isinstance(config_string, str):
+        return label_config.parse_config(config_string)
+    # callers may change the result, so the shared one is copied
+    return copy.deepcopy(get_compiled_label_config(config_string).parsed)
 
 
 def _fix_choices(config):
@@ -103,6 +112,13 @@ def parse_config_to_json(config_string: Union[str, None]) -> Tuple[Union[Ordered
 
 
 def validate_label_config(config_string: Union[str, None]) -> None:
+    if not isinstance(config_string, str):
+        _validate_label_config(config_string)
+        return
+    get_compiled_label_config(config_string).validate()
+
+
+def _validate_label_config(config_string: Union[str, None]) -> None:
     # xml and schema
     try:
         config, cleaned_config_string = parse_config_to_json(config_string)
@@ -134,6 +150,12 @@ def validate_label_config(config_string: Union[str, None]) -> None:
 
 
 def extract_data_types(label_config):
+    if not isinstance(label_config, str):
+        return _extract_data_types(label_config)
+    return dict(get_compiled_label_config(label_config).data_types)
+
+
+def _extract_data_types(label_config):
     # load config
     xml = parse_config_to_xml(label_config)
     if xml is None:
@@ -169,14 +191,9 @@ def extract_data_types(label_config):
 
 
 def get_all_labels(label_config):
-    outputs = parse_config(label_config)
-    labels = defaultdict(list)
-    dynamic_labels = defaultdict(bool)
-    for control_name in outputs:
-        for label in outputs[control_name].get('labels', []):
-            labels[control_name].append(label)
-        if outputs[control_name].get('dynamic_labels', False):
-            dynamic_labels[control_name] = True
+    compiled = get_compiled_label_config(label_config)
+    labels = defaultdict(list, {name: list(values) for name, values in compiled.labels.items()})
+    dynamic_labels = defaultdict(bool, compiled.dynamic_labels)
     return labels, dynamic_labels
 
 
@@ -187,15 +204,11 @@ def get_annotation_tuple(from_name, to_name, type):
 
 
 def get_all_control_tag_tuples(label_config):
-    outputs = parse_config(label_config)
-    out = []
-    for control_name, info in outputs.items():
-        out.append(get_annotation_tuple(control_name, info['to_name'], info['type']))
-    return out
+    return list(get_compiled_label_config(label_config).control_tag_tuples)
 
 
 def get_all_object_tag_names(label_config):
-    return set(extract_data_types(label_config))
+    return set(get_compiled_label_config(label_config).data_types)
 
 
 def config_line_stipped(c):
@@ -436,8 +449,8 @@ def get_sample_task(label_config, secure_mode=False):
 
 def config_essential_data_has_changed(new_config_str, old_config_str):
     """Detect essential changes of the labeling config"""
-    new_config = parse_config(new_config_str)
-    old_config = parse_config(old_config_str)
+    new_config = get_compiled_label_config(new_config_str).parsed
+    old_config = get_compiled_label_config(old_config_str).parsed
 
     for tag, new_info in new_config.items():
         if tag not in old_config:
@@ -464,7 +477,7 @@ def check_control_in_config_by_regex(config_string, control_type, filter=None):
     """
     Check if control type is in config including regex filter
     """
-    c = parse_config(config_string)
+    c = get_compiled_label_config(config_string).parsed
     if filter is not None and len(filter) == 0:
         return False
     if filter:
@@ -486,7 +499,7 @@ def check_toname_in_config_by_regex(config_string, to_name, control_type=None):
     Check if to_name is in config including regex filter
     :return: True if to_name is fullmatch to some pattern ion config
     """
-    c = parse_config(config_string)
+    c = get_compiled_label_config(config_string).parsed
     if control_type:
         check_list = [control_type]
     else:
@@ -508,7 +521,7 @@ def get_original_fromname_by_regex(config_string, fromname):
     """
     Get from_name from config on from_name key from data after applying regex search or original fromname
     """
-    c = parse_config(config_string)
+    c = get_compiled_label_config(config_string).parsed
     for control in c:
         item = c[control].get('regex', {})
         expression = control
@@ -525,8 +538,105 @@ def get_all_types(label_config):
     """
     Get all types from label_config
     """
-    outputs = parse_config(label_config)
-    out = []
-    for control_name, info in outputs.items():
-        out.append(info['type'].lower())
-    return out
+    return list(get_compiled_label_config(label_config).types)
+
+
+def get_label_interface(label_config: str) -> LabelInterface:
+    """Get LabelInterface shared by all consumers of the same label config, it must not be changed"""
+    return get_compiled_label_config(label_config).label_interface
+
+
+class CompiledLabelConfig:
+    """Label config parsed once, derived views are computed on the first access and kept.
+
+    Instances are shared between callers via `get_compiled_label_config`, so returned values must not be changed.
+    """
+
+    def __init__(self, config_string: str, config_hash: str):
+        self.config_string = config_string
+        self.config_hash = config_hash
+        self._validation_error = None
+        self._validated = False
+
+    @cached_property
+    def parsed(self) -> dict:
+        """Structured config, see `parse_config`; optionally shared between processes via Redis"""
+        ttl = settings.LABEL_CONFIG_CACHE_REDIS_TTL
+        key = f'label_config:{self.config_hash}'
+        if ttl:
+            try:
+                cached = redis_get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            except Exception as exc:
+                logger.debug(f'Failed to read parsed label config from Redis: {exc}')
+
+        parsed = label_config.parse_config(self.config_string)
+
+        if ttl:
+            try:
+                redis_set(key, json.dumps(parsed), ttl)
+            except Exception as exc:
+                logger.debug(f'Failed to write parsed label config to Redis: {exc}')
+        return parsed
+
+    @cached_property
+    def data_types(self) -> dict:
+        return _extract_data_types(self.config_string)
+
+    @cached_property
+    def control_tag_tuples(self) -> list:
+        return [
+            get_annotation_tuple(control_name, info['to_name'], info['type'])
+            for control_name, info in self.parsed.items()
+        ]
+
+    @cached_property
+    def labels(self) -> dict:
+        return {control_name: list(info['labels']) for control_name, info in self.parsed.items() if info.get('labels')}
+
+    @cached_property
+    def dynamic_labels(self) -> dict:
+        return {control_name: True for control_name, info in self.parsed.items() if info.get('dynamic_labels', False)}
+
+    @cached_property
+    def types(self) -> list:
+        return [info['type'].lower() for info in self.parsed.values()]
+
+    @cached_property
+    def label_interface(self) -> LabelInterface:
+        return LabelInterface(self.config_string)
+
+    def validate(self) -> None:
+        """Run `validate_label_config` checks once, the same error is raised on next calls"""
+        if not self._validated:
+            try:
+                _validate_label_config(self.config_string)
+            except ValidationError as exc:
+                self._validation_error = exc.detail
+            self._validated = True
+        if self._validation_error is not None:
+            raise ValidationError(self._validation_error)
+
+
+_compiled_label_configs = OrderedDict()
+_compiled_label_configs_lock = threading.Lock()
+
+
+def get_compiled_label_config(config_string: str) -> CompiledLabelConfig:
+    """Get compiled label config from the process level LRU cache keyed by config hash,
+    empty configs (e.g. `None` for a project without config) are compiled as an empty string
+    """
+    config_string = config_string or ''
+    config_hash = hashlib.sha256(config_string.encode()).hexdigest()
+    with _compiled_label_configs_lock:
+        compiled = _compiled_label_configs.get(config_hash)
+        if compiled is not None:
+            _compiled_label_configs.move_to_end(config_hash)
+            return compiled
+
+        compiled = CompiledLabelConfig(config_string, config_hash)
+        _compiled_label_configs[config_hash] = compiled
+        while len(_compiled_label_configs) > settings.LABEL_CONFIG_CACHE_SIZE:
+            _compiled_label_configs.popitem(last=False)
+        return compiled
@@ -5,7 +5,6 @@ import time
 from datetime import timedelta
 from uuid import uuid4
 
-import ujson as json
 from core.feature_flags import flag_set
 from core.utils.contextlog import ContextLog
 from csp.middleware import CSPMiddleware
@@ -126,14 +125,8 @@ class ContextLogMiddleware(CommonMiddleware):
         self.log = ContextLog()
 
     def __call__(self, request):
-        body = None
-        try:
-            body = json.loads(request.body)
-        except:  # noqa: E722
-            try:
-                body = request.body.decode('utf-8')
-            except:  # noqa: E722
-                pass
+        # the body must be read before the view consumes the stream, it's parsed later only if the endpoint is logged
+        body = self.log.read_body(request)
 
         if 'server_id' not in request:
             setattr(request, 'server_id', self.log._get_server_id())
@@ -9,6 +9,7 @@ import django_rq
 import redis
 from django.conf import settings
 from django_rq import get_connection
+from rq import get_current_job
 from rq.command import send_stop_job_command
 from rq.exceptions import InvalidJobOperation
 from rq.registry import StartedJobRegistry
@@ -159,6 +160,17 @@ def start_job_async_or_sync(job, *args, in_seconds=0, **kwargs):
             raise
 
 
+def update_current_job_meta(**meta):
+    """
+    Store values (e.g. progress) in meta of the current rq job, do nothing if it runs outside of rq worker
+    :param meta: values to store
+    """
+    job = get_current_job()
+    if job is not None:
+        job.meta.update(meta)
+        job.save_meta()
+
+
 def is_job_in_queue(queue, func_name, meta):
     """
     Checks if func_name with kwargs[meta] is in queue (doesn't check workers)
@@ -524,6 +524,11 @@ os.makedirs(EXPORT_DIR, exist_ok=True)
 DELAYED_EXPORT_DIR = 'export'
 os.makedirs(os.path.join(BASE_DATA_DIR, MEDIA_ROOT, DELAYED_EXPORT_DIR), exist_ok=True)
 
+# Number of distinct label configs kept parsed in each process
+LABEL_CONFIG_CACHE_SIZE = int(get_env('LABEL_CONFIG_CACHE_SIZE', 128))
+# Share parsed label configs between processes via Redis for this number of seconds, 0 disables it
+LABEL_CONFIG_CACHE_REDIS_TTL = int(get_env('LABEL_CONFIG_CACHE_REDIS_TTL', 0))
+
 # file / task size limits
 DATA_UPLOAD_MAX_MEMORY_SIZE = int(get_env('DATA_UPLOAD_MAX_MEMORY_SIZE', 250 * 1024 * 1024))
 DATA_UPLOAD_MAX_NUMBER_FILES = int(get_env('DATA_UPLOAD_MAX_NUMBER_FILES', 100))
@@ -531,11 +536,33 @@ TASKS_MAX_NUMBER = 1000000
 TASKS_MAX_FILE_SIZE = DATA_UPLOAD_MAX_MEMORY_SIZE
 
 TASK_LOCK_TTL = int(get_env('TASK_LOCK_TTL', default=86400))
+# Task lock storage: 'db' (TaskLock table) or 'redis' (sorted sets, falls back to 'db' if Redis is not connected)
+TASK_LOCK_BACKEND = get_env('TASK_LOCK_BACKEND', 'db')
 
 LABEL_STREAM_HISTORY_LIMIT = int(get_env('LABEL_STREAM_HISTORY_LIMIT', default=100))
 
 RANDOM_NEXT_TASK_SAMPLE_SIZE = int(get_env('RANDOM_NEXT_TASK_SAMPLE_SIZE', 50))
 
+# Precomputed per-project candidate queue for the label stream (requires Redis)
+NEXT_TASK_QUEUE_ENABLED = get_bool_env('NEXT_TASK_QUEUE_ENABLED', False)
+# Max number of candidate task ids stored per project
+NEXT_TASK_QUEUE_MAX_SIZE = int(get_env('NEXT_TASK_QUEUE_MAX_SIZE', 10000))
+# Number of candidates validated per next task call; queue is refilled when it gets shorter
+NEXT_TASK_QUEUE_WINDOW = int(get_env('NEXT_TASK_QUEUE_WINDOW', 100))
+# Queue is rebuilt from scratch at least this often (in seconds)
+NEXT_TASK_QUEUE_TTL = int(get_env('NEXT_TASK_QUEUE_TTL', 600))
+# Min interval between two refill jobs for the same project (in seconds)
+NEXT_TASK_QUEUE_REFILL_INTERVAL = int(get_env('NEXT_TASK_QUEUE_REFILL_INTERVAL', 30))
+
+# Record project summary counters from annotation and task saves as deltas in Redis
+# and fold them into the summary row on read, instead of rewriting the row on every save
+PROJECT_SUMMARY_DELTAS = get_bool_env('PROJECT_SUMMARY_DELTAS', False)
+
+# Read project list counters from materialized ProjectCounters rows instead of aggregating tasks on every request
+PROJECT_COUNTERS_MATERIALIZED = get_bool_env('PROJECT_COUNTERS_MATERIALIZED', False)
+# Delay of the background recalculation of stale project counters (in seconds), writes within it are batched
+PROJECT_COUNTERS_REFRESH_DELAY = int(get_env('PROJECT_COUNTERS_REFRESH_DELAY', 10))
+
 TASK_API_PAGE_SIZE_MAX = int(get_env('TASK_API_PAGE_SIZE_MAX', 0)) or None
 
 # Email backend
@@ -568,6 +595,8 @@ MAX_TASK_BATCH_SIZE = int(get_env('MAX_TASK_BATCH_SIZE', 1000))
 TASK_DATA_PER_BATCH = int(get_env('TASK_DATA_PER_BATCH', 50 * 1024 * 1024))  # 50 MB in bytes
 # Batch size for streaming reimport operations to reduce memory usage
 REIMPORT_BATCH_SIZE = int(get_env('REIMPORT_BATCH_SIZE', 1000))
+# Number of rows read at once from uploaded CSV/TSV files
+IMPORT_CSV_CHUNK_SIZE = int(get_env('IMPORT_CSV_CHUNK_SIZE', 10000))
 # Batch size for processing prediction imports to avoid memory issues with large datasets
 PREDICTION_IMPORT_BATCH_SIZE = int(get_env('PREDICTION_IMPORT_BATCH_SIZE', 500))
 PROJECT_TITLE_MIN_LEN = 3
@@ -585,6 +614,11 @@ VERSIONS_CHECK_TIME = 0
 ALLOW_ORGANIZATION_WEBHOOKS = get_bool_env('ALLOW_ORGANIZATION_WEBHOOKS', False)
 CONVERTER_DOWNLOAD_RESOURCES = get_bool_env('CONVERTER_DOWNLOAD_RESOURCES', True)
 SHOW_TRACEBACK_FOR_EXPORT_CONVERTER = get_bool_env('SHOW_TRACEBACK_FOR_EXPORT_CONVERTER', True)
+# Number of threads fetching and serializing task batches ahead of the export writer, 0 disables the pipeline.
+# Threads read outside of the export transaction, so changes made during the export can be seen by later batches
+EXPORT_WORKERS = int(get_env('EXPORT_WORKERS', 0))
+# Max number of serialized task batches kept in memory by the export pipeline, includes batches in progress
+EXPORT_MAX_BATCHES_IN_MEMORY = int(get_env('EXPORT_MAX_BATCHES_IN_MEMORY', 4))
 EXPERIMENTAL_FEATURES = get_bool_env('EXPERIMENTAL_FEATURES', False)
 USE_ENFORCE_CSRF_CHECKS = get_bool_env('USE_ENFORCE_CSRF_CHECKS', True)  # False is for tests
 CLOUD_FILE_STORAGE_ENABLED = False
@@ -657,6 +691,17 @@ COLLECT_VERSIONS = collect_versions_dummy
 
 WEBHOOK_TIMEOUT = float(get_env('WEBHOOK_TIMEOUT', 1.0))
 WEBHOOK_BATCH_SIZE = int(get_env('WEBHOOK_BATCH_SIZE', 5000))
+# Webhooks are sent through one pooled HTTP session, requests to the same host wait for a free connection
+WEBHOOK_MAX_CONNECTIONS_PER_HOST = int(get_env('WEBHOOK_MAX_CONNECTIONS_PER_HOST', 4))
+# Number of threads sending one event to different webhooks
+WEBHOOK_DELIVERY_WORKERS = int(get_env('WEBHOOK_DELIVERY_WORKERS', 8))
+# Enqueue every webhook delivery as a separate RQ job, so slow receivers don't stall the job or request emitting events
+WEBHOOK_ASYNC_DELIVERY = get_bool_env('WEBHOOK_ASYNC_DELIVERY', False)
+# Retries with exponential backoff on connection errors and 429/5xx responses, read timeouts are never retried.
+# Synchronous delivery makes one immediate retry by default to keep the caller waiting not much longer.
+# Retry-After headers are ignored, so the delivery time is bounded by retries, backoff and WEBHOOK_TIMEOUT
+WEBHOOK_MAX_RETRIES = int(get_env('WEBHOOK_MAX_RETRIES', 2 if WEBHOOK_ASYNC_DELIVERY else 1))
+WEBHOOK_RETRY_BACKOFF = float(get_env('WEBHOOK_RETRY_BACKOFF', 0.5 if WEBHOOK_ASYNC_DELIVERY else 0.1))
 WEBHOOK_SERIALIZERS = {
     'project': 'webhooks.serializers_for_hooks.ProjectWebhookSerializer',
     'task': 'webhooks.serializers_for_hooks.TaskWebhookSerializer',
@@ -688,6 +733,8 @@ FEATURE_FLAGS_FILE = get_env('FEATURE_FLAGS_FILE', 'feature_flags.json')
 FEATURE_FLAGS_OFFLINE = get_bool_env('FEATURE_FLAGS_OFFLINE', True)
 # default value for feature flags (if not overridden by environment or client)
 FEATURE_FLAGS_DEFAULT_VALUE = False
+# cache flag evaluations for anonymous users (including 'auto' outside of requests) in the process (in seconds)
+FEATURE_FLAGS_CACHE_TTL = int(get_env('FEATURE_FLAGS_CACHE_TTL', 10))
 
 # Whether to send analytics telemetry data. Fall back to old lowercase name for legacy compatibility.
 COLLECT_ANALYTICS = get_bool_env('COLLECT_ANALYTICS', get_bool_env('collect_analytics', True))
@@ -696,6 +743,18 @@ COLLECT_ANALYTICS = get_bool_env('COLLECT_ANALYTICS', get_bool_env('collect_anal
 SVG_SECURITY_CLEANUP = get_bool_env('SVG_SECURITY_CLEANUP', False)
 
 ML_BLOCK_LOCAL_IP = get_bool_env('ML_BLOCK_LOCAL_IP', False)
+# Number of tasks sent to ML backend in one background job when Data Manager fills missing predictions
+ML_PREDICTION_FILL_BATCH_SIZE = int(get_env('ML_PREDICTION_FILL_BATCH_SIZE', 20))
+# Seconds a task stays marked as waiting for ML prediction, so concurrent page loads don't request it again
+ML_PREDICTION_FILL_IN_FLIGHT_TTL = int(get_env('ML_PREDICTION_FILL_IN_FLIGHT_TTL', 600))
+# Number of tasks sent to ML backend in one /predict request, it's reduced automatically when requests fail
+ML_PREDICT_BATCH_SIZE = int(get_env('ML_PREDICT_BATCH_SIZE', 32))
+# Maximum number of concurrent /predict requests to one ML backend
+ML_PREDICT_MAX_CONCURRENT_REQUESTS = int(get_env('ML_PREDICT_MAX_CONCURRENT_REQUESTS', 4))
+# Retries of /predict requests when ML backend responds with 429, 502, 503 or 504
+ML_PREDICT_MAX_RETRIES = int(get_env('ML_PREDICT_MAX_RETRIES', 2))
+# Initial delay in seconds between /predict retries, it doubles with every attempt
+ML_PREDICT_RETRY_BACKOFF = float(get_env('ML_PREDICT_RETRY_BACKOFF', 1.0))
 
 RQ_LONG_JOB_TIMEOUT = int(get_env('RQ_LONG_JOB_TIMEOUT', 36000))
 
@@ -708,6 +767,17 @@ FUTURE_SAVE_TASK_TO_STORAGE_JSON_EXT = get_bool_env('FUTURE_SAVE_TASK_TO_STORAGE
 STORAGE_IN_PROGRESS_TIMER = float(get_env('STORAGE_IN_PROGRESS_TIMER', 5.0))
 STORAGE_EXPORT_CHUNK_SIZE = int(get_env('STORAGE_EXPORT_CHUNK_SIZE', 100))
 DEFAULT_STORAGE_LIST_LIMIT = int(get_env('DEFAULT_STORAGE_LIST_LIMIT', 100))
+# Max number of tasks written with one bulk insert during cloud storage sync, limited by project task batch size
+STORAGE_IMPORT_BATCH_SIZE = int(get_env('STORAGE_IMPORT_BATCH_SIZE', 1000))
+# Number of storage keys checked for existing links with one query during cloud storage sync
+STORAGE_SCAN_KEYS_PAGE_SIZE = int(get_env('STORAGE_SCAN_KEYS_PAGE_SIZE', 1000))
+# Number of threads fetching and parsing storage objects ahead of task creation during cloud storage sync,
+# 1 fetches objects serially. Opt-in: get_data of the storage must be safe to call from several threads
+STORAGE_IMPORT_FETCH_WORKERS = int(get_env('STORAGE_IMPORT_FETCH_WORKERS', 1))
+# Incremental sync skips storage objects modified before the previous sync,
+# full sync is still done once per STORAGE_FULL_SYNC_INTERVAL seconds to reconcile missed objects
+STORAGE_INCREMENTAL_SYNC = get_bool_env('STORAGE_INCREMENTAL_SYNC', False)
+STORAGE_FULL_SYNC_INTERVAL = int(get_env('STORAGE_FULL_SYNC_INTERVAL', 24 * 60 * 60))
 
 USE_NGINX_FOR_EXPORT_DOWNLOADS = get_bool_env('USE_NGINX_FOR_EXPORT_DOWNLOADS', False)
 USE_NGINX_FOR_UPLOADS = get_bool_env('USE_NGINX_FOR_UPLOADS', True)
@@ -841,6 +911,12 @@ CLOUD_STORAGE_CHECK_FOR_RECORDS_PAGE_SIZE = get_env('CLOUD_STORAGE_CHECK_FOR_REC
 CLOUD_STORAGE_CHECK_FOR_RECORDS_TIMEOUT = get_env('CLOUD_STORAGE_CHECK_FOR_RECORDS_TIMEOUT', 60)
 
 CONTEXTLOG_SYNC = False
+# contextlog payloads waiting for the background sender, new ones are dropped when the queue is full
+CONTEXTLOG_QUEUE_SIZE = int(get_env('CONTEXTLOG_QUEUE_SIZE', 1000))
+# max total size (in bytes) of serialized payloads waiting for the background sender
+CONTEXTLOG_QUEUE_MAX_BYTES = int(get_env('CONTEXTLOG_QUEUE_MAX_BYTES', 16 * 1024 * 1024))
+# request bodies larger than this (in bytes) are not parsed and logged by contextlog
+CONTEXTLOG_MAX_BODY_SIZE = int(get_env('CONTEXTLOG_MAX_BODY_SIZE', 1024 * 1024))
 TEST_ENVIRONMENT = get_bool_env('TEST_ENVIRONMENT', False)
 DEBUG_CONTEXTLOG = get_bool_env('DEBUG_CONTEXTLOG', False)
 
@@ -893,6 +969,15 @@ QS_ITERATOR_DEFAULT_CHUNK_SIZE = int(get_env('QS_ITERATOR_DEFAULT_CHUNK_SIZE', 1
 # Data Manager
 # Max number of users to display in the Data Manager in Annotators/Reviewers/Comment Authors, etc
 DM_MAX_USERS_TO_DISPLAY = int(get_env('DM_MAX_USERS_TO_DISPLAY', 10))
+# Cache TTL in seconds for task counts in the Data Manager, cache is invalidated on task/annotation writes,
+# 0 disables it. Counts are cached in Redis only
+DATA_MANAGER_COUNTS_CACHE_TTL = int(get_env('DATA_MANAGER_COUNTS_CACHE_TTL', 0))
+# Use PostgreSQL planner estimate instead of exact count when estimated number of tasks exceeds this value, 0 disables it
+# total_annotations and total_predictions are not calculated (returned as null) for such task lists
+DATA_MANAGER_ESTIMATED_COUNT_THRESHOLD = int(get_env('DATA_MANAGER_ESTIMATED_COUNT_THRESHOLD', 0))
+# Filter, order and display annotations/predictions results from the per-task projection maintained on writes
+# instead of aggregating results on every request, run `rebuild_results_projection` command after enabling it
+DATA_MANAGER_RESULTS_PROJECTION = get_bool_env('DATA_MANAGER_RESULTS_PROJECTION', False)
 
 # Base FSM (Finite State Machine) Configuration for Label Studio
 FSM_CACHE_TTL = 300  # Cache TTL in seconds (5 minutes)
@@ -7,6 +7,7 @@ import json
 import logging
 import os
 import platform
+import queue
 import sys
 import threading
 from datetime import datetime
@@ -38,6 +39,76 @@ def _load_log_payloads():
     return out
 
 
+class ContextLogSender(object):
+    """Single background thread sending contextlog payloads
+
+    Payloads are built and serialized by the request thread, so the queue holds only bytes, not requests
+    and responses. The queue is bounded by CONTEXTLOG_QUEUE_SIZE items and CONTEXTLOG_QUEUE_MAX_BYTES bytes,
+    and requests never wait for the sender: new items over the limits are dropped. All payloads are posted
+    through one keep-alive session.
+    """
+
+    url = 'https://tele.labelstud.io'
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=settings.CONTEXTLOG_QUEUE_SIZE)
+        self.queued_bytes = 0
+        self.dropped = 0
+        self._session = None
+        self._thread = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._bytes_lock = threading.Lock()
+
+    def _ensure_started(self):
+        # the sender thread doesn't survive forks of preforking servers, so it's started in the worker process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                # items queued by the parent process belong to it
+                self.queue = queue.Queue(maxsize=settings.CONTEXTLOG_QUEUE_SIZE)
+                self.queued_bytes = 0
+                self._session = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='contextlog-sender', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, data: bytes):
+        """Put serialized payload to the queue without blocking, it's dropped if the queue is full"""
+        self._ensure_started()
+        with self._bytes_lock:
+            if self.queued_bytes + len(data) <= settings.CONTEXTLOG_QUEUE_MAX_BYTES:
+                try:
+                    self.queue.put_nowait(data)
+                except queue.Full:
+                    pass
+                else:
+                    self.queued_bytes += len(data)
+                    return
+            self.dropped += 1
+        logger.debug(f'Contextlog queue is full, {self.dropped} items dropped')
+
+    def _run(self):
+        while True:
+            data = self.queue.get()
+            try:
+                self.post(data)
+            except:  # noqa: E722
+                pass
+            finally:
+                with self._bytes_lock:
+                    self.queued_bytes -= len(data)
+                self.queue.task_done()
+
+    def post(self, data):
+        if self._session is None:
+            self._session = requests.Session()
+        self._session.post(url=self.url, data=data, headers={'Content-Type': 'application/json'}, timeout=3.0)
+
+
 class ContextLog(object):
 
     _log_payloads = _load_log_payloads()
@@ -45,6 +116,7 @@ class ContextLog(object):
     def __init__(self):
         self.version = get_app_version()
         self.server_id = self._get_server_id()
+        self.sender = ContextLogSender()
 
     def _get_server_id(self):
         user_id_file = os.path.join(get_config_dir(), 'user_id')
@@ -204,26 +276,58 @@ class ContextLog(object):
     def dont_send(self, request):
         return not settings.COLLECT_ANALYTICS or self._exclude_endpoint(request)
 
+    def read_body(self, request):
+        """Get raw request body for the payload, large bodies (e.g. task imports) are not logged
+
+        The body is read anyway: it's cached by the request, so it stays available if the request is
+        dispatched again (see CommonMiddlewareAppendSlashWithoutRedirect).
+        """
+        try:
+            body = request.body
+        except:  # noqa: E722
+            return None
+        if not settings.COLLECT_ANALYTICS or len(body) > settings.CONTEXTLOG_MAX_BODY_SIZE:
+            return None
+        return body
+
+    @staticmethod
+    def _parse_body(body):
+        if not isinstance(body, bytes):
+            return body
+        try:
+            return json.loads(body)
+        except:  # noqa: E722
+            try:
+                return body.decode('utf-8')
+            except:  # noqa: E722
+                return None
+
     def send(self, request=None, response=None, body=None):
+        """Send contextlog for the request, the payload is posted by the background sender
+
+        :param body: Raw request body (bytes) or parsed one, it's parsed only if the endpoint is logged
+        """
         if self.dont_send(request):
             return
-        try:
-            payload = self.create_payload(request, response, body)
-        except Exception as exc:
-            logger.debug(exc, exc_info=True)
-            if settings.TEST_ENVIRONMENT:
-                raise
-        else:
-            if settings.TEST_ENVIRONMENT:
-                pass
-            elif settings.DEBUG_CONTEXTLOG:
-                logger.debug('In DEBUG mode, contextlog is not sent.')
-                logger.debug(json.dumps(payload, indent=2))
-            elif settings.CONTEXTLOG_SYNC:
-                self.send_job(request, response, body)
+        if settings.TEST_ENVIRONMENT or settings.DEBUG_CONTEXTLOG:
+            try:
+                payload = self.create_payload(request, response, body)
+            except Exception as exc:
+                logger.debug(exc, exc_info=True)
+                if settings.TEST_ENVIRONMENT:
+                    raise
             else:
-                thread = threading.Thread(target=self.send_job, args=(request, response, body))
-                thread.start()
+                if not settings.TEST_ENVIRONMENT:
+                    logger.debug('In DEBUG mode, contextlog is not sent.')
+                    logger.debug(json.dumps(payload, indent=2))
+        elif settings.CONTEXTLOG_SYNC:
+            self.send_job(request, response, body)
+        else:
+            try:
+                data = json.dumps(self.create_payload(request, response, body)).encode()
+            except:  # noqa: E722
+                return
+            self.sender.enqueue(data)
 
     @staticmethod
     def browser_exists(request):
@@ -290,7 +394,7 @@ class ContextLog(object):
             'scheme': request.scheme,
             'method': request.method,
             'values': values,
-            'json': body,
+            'json': self._parse_body(body),
             'advanced_json': advanced_json,
             'language': request.LANGUAGE_CODE,
             'content_type': content_type,
@@ -329,7 +433,6 @@ class ContextLog(object):
             pass
         else:
             try:
-                url = 'https://tele.labelstud.io'
-                requests.post(url=url, json=payload, timeout=3.0)
+                requests.post(url=ContextLogSender.url, json=payload, timeout=3.0)
             except:  # noqa: E722
                 pass
@@ -0,0 +1,4 @@
+info = {"message": "[user-009] fix: document that prefetched export batches are not a snapshot", "commit": "ea4b5662640dc17ee675c09e7cd19f7c1ba3fe0a", "date": "2026/10/17 07:57:29", "branch": "", "version": "ea4b566"}
+
+# This file is automatically generated by version.py
+# Do not include it to git!
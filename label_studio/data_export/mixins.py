@@ -1,9 +1,10 @@
+import collections
 import hashlib
-import io
 import json
 import logging
 import pathlib
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import reduce
 
@@ -21,7 +22,7 @@ from data_manager.models import View
 from django.conf import settings
 from django.core.files import File
 from django.core.files import temp as tempfile
-from django.db import transaction
+from django.db import connection, transaction
 from django.db.models import Prefetch
 from django.db.models.query_utils import Q
 from django.utils import dateformat, timezone
@@ -187,8 +188,6 @@ class ExportMixin:
                 })
         })
         """
-        from .serializers import ExportDataSerializer
-
         logger.debug('Run get_task_queryset')
 
         start = datetime.now()
@@ -204,42 +203,103 @@ class ExportMixin:
                 .values_list('id', flat=True)
             )
             base_export_serializer_option = self._get_export_serializer_option(serialization_options)
-            i = 0
 
             if flag_set('fflag_fix_back_plt_807_batch_size_26062025_short', self.project.organization.created_by):
                 BATCH_SIZE = self.project.get_task_batch_size()
             else:
                 BATCH_SIZE = settings.BATCH_SIZE
 
-            for ids in batch(task_ids, BATCH_SIZE):
-                i += 1
-                tasks = list(self.get_task_queryset(ids, annotation_filter_options))
-                logger.debug(f'Batch: {i*BATCH_SIZE}')
-                if isinstance(task_filter_options, dict) and task_filter_options.get('only_with_annotations'):
-                    tasks = [task for task in tasks if task.annotations.exists()]
-
-                if serialization_options and serialization_options.get('include_annotation_history') is True:
-                    task_ids = [task.id for task in tasks]
-                    annotation_ids = Annotation.objects.filter(task_id__in=task_ids).values_list('id', flat=True)
-                    base_export_serializer_option = self.update_export_serializer_option(
-                        base_export_serializer_option, annotation_ids
-                    )
+            batch_args = (task_filter_options, annotation_filter_options, serialization_options)
+            if settings.EXPORT_WORKERS > 0:
+                batches = self.iter_serialized_batches_prefetched(
+                    batch(task_ids, BATCH_SIZE), base_export_serializer_option, *batch_args
+                )
+            else:
+                batches = (
+                    self.serialize_task_batch(ids, base_export_serializer_option, *batch_args)
+                    for ids in batch(task_ids, BATCH_SIZE)
+                )
 
-                serializer = ExportDataSerializer(tasks, many=True, **base_export_serializer_option)
-                self.counters['task_number'] += len(tasks)
-                for task in serializer.data:
+            for i, data in enumerate(batches, 1):
+                logger.debug(f'Batch: {i*BATCH_SIZE}')
+                self.counters['task_number'] += len(data)
+                for task in data:
                     yield task
         duration = datetime.now() - start
         logger.info(
             f'{self.counters["task_number"]} tasks from project {self.project_id} exported in {duration.total_seconds():.2f} seconds'
         )
 
+    def serialize_task_batch(
+        self,
+        ids,
+        export_serializer_option,
+        task_filter_options=None,
+        annotation_filter_options=None,
+        serialization_options=None,
+    ):
+        """Fetch one batch of tasks and serialize it
+
+        :return: list of serialized tasks
+        """
+        from .serializers import ExportDataSerializer
+
+        tasks = list(self.get_task_queryset(ids, annotation_filter_options))
+        if isinstance(task_filter_options, dict) and task_filter_options.get('only_with_annotations'):
+            tasks = [task for task in tasks if task.annotations.exists()]
+
+        if serialization_options and serialization_options.get('include_annotation_history') is True:
+            task_ids = [task.id for task in tasks]
+            annotation_ids = Annotation.objects.filter(task_id__in=task_ids).values_list('id', flat=True)
+            export_serializer_option = self.update_export_serializer_option(export_serializer_option, annotation_ids)
+
+        return ExportDataSerializer(tasks, many=True, **export_serializer_option).data
+
+    def _serialize_task_batch_in_thread(self, *args):
+        try:
+            return self.serialize_task_batch(*args)
+        finally:
+            # worker threads open their own database connections
+            connection.close()
+
+    def iter_serialized_batches_prefetched(self, id_batches, export_serializer_option, *args):
+        """Fetch and serialize next task batches in a thread pool while the current one is written
+
+        Batches are yielded in the same order as id_batches. Not more than EXPORT_MAX_BATCHES_IN_MEMORY batches
+        are submitted ahead, so memory usage doesn't grow with the project size.
+
+        Worker threads use their own database connections outside of the export transaction, so the export isn't
+        a consistent snapshot: the set of tasks is fixed, but each batch sees annotations as of its own fetch.
+
+        :param id_batches: iterator over lists of task ids
+        :param export_serializer_option: ExportDataSerializer options
+        :param args: task_filter_options, annotation_filter_options, serialization_options
+        :return: lists of serialized tasks
+        """
+        max_batches = max(settings.EXPORT_MAX_BATCHES_IN_MEMORY, 1)
+        workers = min(settings.EXPORT_WORKERS, max_batches)
+        futures = collections.deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for ids in id_batches:
+                    futures.append(
+                        executor.submit(self._serialize_task_batch_in_thread, ids, export_serializer_option, *args)
+                    )
+                    if len(futures) >= max_batches:
+                        yield futures.popleft().result()
+                while futures:
+                    yield futures.popleft().result()
+            finally:
+                # export was interrupted, don't serialize batches nobody will read
+                for future in futures:
+                    future.cancel()
+
     def update_export_serializer_option(self, base_export_serializer_option, annotation_ids):
         return base_export_serializer_option
 
     @staticmethod
     def eval_md5(file):
-        md5_object = hashlib.md5()   # nosec
+        md5_object = hashlib.md5()  # nosec
         block_size = 128 * md5_object.block_size
         chunk = file.read(block_size)
         while chunk:
@@ -248,6 +308,15 @@ class ExportMixin:
         md5 = md5_object.hexdigest()
         return md5
 
+    @staticmethod
+    def write_chunks(chunks, file):
+        """Write byte chunks to file and evaluate md5 in the same pass, so the file is not read again for hashing"""
+        md5_object = hashlib.md5()  # nosec
+        for chunk in chunks:
+            md5_object.update(chunk)
+            file.write(chunk)
+        return md5_object.hexdigest()
+
     def save_file(self, file, md5):
         now = datetime.now()
         file_name = f'project-{self.project.id}-at-{now.strftime("%Y-%m-%d-%H-%M")}-{md5[0:8]}.json'
@@ -274,13 +343,11 @@ class ExportMixin:
                     )
                 )
             )
+            # md5 is a part of the file name, so the snapshot is written to a temp file first,
+            # then storage reads it by chunks (File.chunks) during upload
             with tempfile.NamedTemporaryFile(suffix='.export.json', dir=settings.FILE_UPLOAD_TEMP_DIR) as file:
-                for chunk in iter_json:
-                    encoded_chunk = chunk.encode('utf-8')
-                    file.write(encoded_chunk)
+                md5 = self.write_chunks((chunk.encode('utf-8') for chunk in iter_json), file)
                 file.seek(0)
-
-                md5 = self.eval_md5(file)
                 self.save_file(file, md5)
 
             self.status = self.Status.COMPLETED
@@ -336,10 +403,14 @@ class ExportMixin:
                 hostname=hostname,
             )
             input_name = pathlib.Path(self.file.name).name
-            input_file_path = pathlib.Path(tmp_dir) / input_name
-
-            with open(input_file_path, 'wb') as file_:
-                file_.write(self.file.open().read())
+            try:
+                # local storage: convert the snapshot in place
+                input_file_path = pathlib.Path(self.file.path)
+            except NotImplementedError:
+                # remote storage: download the snapshot by chunks
+                input_file_path = pathlib.Path(tmp_dir) / input_name
+                with self.file.open('rb') as snapshot, open(input_file_path, 'wb') as file_:
+                    shutil.copyfileobj(snapshot, file_, File.DEFAULT_CHUNK_SIZE)
 
             converter.convert(input_file_path, out_dir, to_format, is_dir=False)
 
@@ -356,12 +427,14 @@ class ExportMixin:
                 output_file = pathlib.Path(tmp_dir) / (str(out_dir.stem) + '.zip')
                 filename = pathlib.Path(input_name).stem + '.zip'
 
-            # TODO(jo): can we avoid the `f.read()` here?
+            # temp dir is removed on exit, so output is copied by chunks to a temp file removed on close,
+            # it is streamed from disk later instead of being loaded into memory
+            suffix = pathlib.Path(filename).suffix
+            converted = tempfile.NamedTemporaryFile(suffix=suffix, dir=settings.FILE_UPLOAD_TEMP_DIR)
             with open(output_file, mode='rb') as f:
-                return File(
-                    io.BytesIO(f.read()),
-                    name=filename,
-                )
+                shutil.copyfileobj(f, converted, File.DEFAULT_CHUNK_SIZE)
+            converted.seek(0)
+            return File(converted, name=filename)
 
 
 def export_background(
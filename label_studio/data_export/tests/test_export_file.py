@@ -0,0 +1,75 @@
+import hashlib
+import threading
+from unittest import mock
+
+import pytest
+from data_export import mixins
+from data_export.models import Export
+from django.test import override_settings
+from projects.tests.factories import ProjectFactory
+from tasks.tests.factories import TaskFactory
+
+
+@pytest.mark.django_db
+def test_export_to_file_md5_and_convert():
+    project = ProjectFactory(label_config='<View><Text name="text" value="$text"/></View>')
+    TaskFactory.create_batch(3, project=project)
+    export = Export.objects.create(project=project, created_by=project.created_by)
+
+    export.export_to_file(task_filter_options={'only_with_annotations': False})
+    export.refresh_from_db()
+    assert export.status == Export.Status.COMPLETED
+
+    with export.file.open('rb') as f:
+        assert export.md5 == hashlib.md5(f.read()).hexdigest()
+
+    converted = export.convert_file('CSV')
+    try:
+        assert converted.name.endswith('.csv')
+        content = b''.join(converted.chunks()).decode()
+        assert len(content.strip().splitlines()) == 4  # header and 3 tasks
+    finally:
+        converted.close()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('workers', [0, 2])
+def test_export_data_prefetched_batches_keep_order(workers):
+    project = ProjectFactory(label_config='<View><Text name="text" value="$text"/></View>')
+    tasks = TaskFactory.create_batch(7, project=project)
+    export = Export.objects.create(project=project, created_by=project.created_by)
+
+    with override_settings(BATCH_SIZE=2, EXPORT_WORKERS=workers, EXPORT_MAX_BATCHES_IN_MEMORY=2):
+        data = list(export.get_export_data(task_filter_options={'only_with_annotations': False}))
+
+    assert [task['id'] for task in data] == [task.id for task in tasks]
+    assert export.counters['task_number'] == 7
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_data_prefetched_batches_close_worker_connections():
+    project = ProjectFactory(label_config='<View><Text name="text" value="$text"/></View>')
+    TaskFactory.create_batch(7, project=project)
+    export = Export.objects.create(project=project, created_by=project.created_by)
+    closed_in_threads = []
+    real_connection = mixins.connection
+
+    def close():
+        closed_in_threads.append(threading.get_ident())
+        real_connection.close()
+
+    with override_settings(BATCH_SIZE=2, EXPORT_WORKERS=2, EXPORT_MAX_BATCHES_IN_MEMORY=2), mock.patch.object(
+        mixins, 'connection'
+    ) as connection:
+        connection.close.side_effect = close
+        list(export.get_export_data(task_filter_options={'only_with_annotations': False}))
+        # every batch closes the connection of its worker thread
+        assert closed_in_threads
+        assert threading.get_ident() not in closed_in_threads
+
+        # connections are closed when a batch fails too
+        closed_in_threads.clear()
+        with mock.patch.object(Export, 'serialize_task_batch', side_effect=ValueError('broken batch')):
+            with pytest.raises(ValueError, match='broken batch'):
+                list(export.get_export_data(task_filter_options={'only_with_annotations': False}))
+        assert closed_in_threads
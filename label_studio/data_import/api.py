@@ -8,6 +8,7 @@ from urllib.parse import unquote, urlparse
 
 from core.decorators import override_report_only_csp
 from core.feature_flags import flag_set
+from core.label_config import get_label_interface
 from core.permissions import ViewClassPermission, all_permissions
 from core.redis import start_job_async_or_sync
 from core.utils.common import retry_database_locked, timeit
@@ -19,7 +20,6 @@ from django.http import HttpResponse
 from django.utils.decorators import method_decorator
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
-from label_studio_sdk.label_interface import LabelInterface
 from projects.models import Project, ProjectImport, ProjectReimport
 from ranged_fileresponse import RangedFileResponse
 from rest_framework import generics, status
@@ -274,7 +274,7 @@ class ImportAPI(generics.CreateAPIView):
         # Conditionally validate predictions: skip when label config is default during project creation
         if project.label_config_is_not_default:
             validation_errors = []
-            li = LabelInterface(project.label_config)
+            li = get_label_interface(project.label_config)
 
             for i, task in enumerate(parsed_data):
                 if 'predictions' in task:
@@ -517,7 +517,7 @@ class ImportPredictionsAPI(generics.CreateAPIView):
             f'Importing {len(self.request.data)} predictions to project {project} with {len(tasks_ids)} tasks (legacy mode)'
         )
 
-        li = LabelInterface(project.label_config)
+        li = get_label_interface(project.label_config)
 
         # Validate all predictions before creating any
         validation_errors = []
@@ -4,10 +4,10 @@ import traceback
 from typing import Callable, Optional
 
 from core.feature_flags import flag_set
+from core.label_config import get_label_interface
 from core.utils.common import load_func
 from django.conf import settings
 from django.db import transaction
-from label_studio_sdk.label_interface import LabelInterface
 from projects.models import ProjectImport, ProjectReimport, ProjectSummary
 from rest_framework.exceptions import ValidationError
 from tasks.models import Task
@@ -59,7 +59,7 @@ def async_import_background(
         'fflag_feat_utc_210_prediction_validation_15082025', user=project.organization.created_by
     ):
         validation_errors = []
-        li = LabelInterface(project.label_config)
+        li = get_label_interface(project.label_config)
 
         for i, task in enumerate(tasks):
             if 'predictions' in task:
@@ -187,7 +187,7 @@ def reformat_predictions(tasks, preannotated_from_fields, project=None, raise_er
     li = None
     if project:
         try:
-            li = LabelInterface(project.label_config)
+            li = get_label_interface(project.label_config)
         except Exception as e:
             logger.warning(f'Could not create LabelInterface for project {project.id}: {e}')
 
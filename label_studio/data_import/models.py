@@ -1,17 +1,13 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import codecs
 import logging
 import os
 import uuid
 from collections import Counter
 
+import ijson
 import pandas as pd
-
-try:
-    import ujson as json
-except:  # noqa: E722
-    import json
-
 from django.conf import settings
 from django.db import models
 from django.utils.functional import cached_property
@@ -73,40 +69,51 @@ class FileUpload(models.Model):
             setattr(self, '_file_body', body)
         return body
 
-    def read_tasks_list_from_csv(self, sep=','):
+    def iter_tasks_list_from_csv(self, sep=','):
         logger.debug('Read tasks list from CSV file {}'.format(self.filepath))
-        tasks = pd.read_csv(self.file.open(), sep=sep).fillna('').to_dict('records')
-        tasks = [{'data': task} for task in tasks]
-        return tasks
+        # read file in chunks to keep memory bounded for big files
+        with pd.read_csv(self.file.open(), sep=sep, chunksize=settings.IMPORT_CSV_CHUNK_SIZE) as reader:
+            for chunk in reader:
+                for task in chunk.fillna('').to_dict('records'):
+                    yield {'data': task}
+
+    def read_tasks_list_from_csv(self, sep=','):
+        return list(self.iter_tasks_list_from_csv(sep))
 
     def read_tasks_list_from_tsv(self):
         return self.read_tasks_list_from_csv('\t')
 
-    def read_tasks_list_from_txt(self):
+    def iter_tasks_list_from_txt(self):
         logger.debug('Read tasks list from text file {}'.format(self.filepath))
-        lines = self.content.splitlines()
-        tasks = [{'data': {settings.DATA_UNDEFINED_NAME: line}} for line in lines]
-        return tasks
+        for line in codecs.getreader('utf-8')(self.file.open('rb')):
+            # the same line boundaries as str.splitlines()
+            yield {'data': {settings.DATA_UNDEFINED_NAME: line.splitlines()[0]}}
 
-    def read_tasks_list_from_json(self):
+    def read_tasks_list_from_txt(self):
+        return list(self.iter_tasks_list_from_txt())
+
+    def iter_tasks_list_from_json(self):
+        """Parse JSON incrementally: items of the top level array, a single task object
+        or several concatenated objects (JSON lines)
+        """
         logger.debug('Read tasks list from JSON file {}'.format(self.filepath))
 
-        raw_data = self.content
-        # Python 3.5 compatibility fix https://docs.python.org/3/whatsnew/3.6.html#json
-        try:
-            tasks = json.loads(raw_data)
-        except TypeError:
-            tasks = json.loads(raw_data.decode('utf8'))
-        if isinstance(tasks, dict):
-            tasks = [tasks]
-        tasks_formatted = []
-        for i, task in enumerate(tasks):
+        file = self.file.open('rb')
+        first_char = file.read(1)
+        while first_char.isspace():
+            first_char = file.read(1)
+        file.seek(0)
+
+        prefix = 'item' if first_char == b'[' else ''
+        for task in ijson.items(file, prefix, multiple_values=True, use_float=True):
             if not task.get('data'):
                 task = {'data': task}
             if not isinstance(task['data'], dict):
                 raise ValidationError('Task item should be dict')
-            tasks_formatted.append(task)
-        return tasks_formatted
+            yield task
+
+    def read_tasks_list_from_json(self):
+        return list(self.iter_tasks_list_from_json())
 
     def read_task_from_hypertext_body(self):
         logger.debug('Read 1 task from hypertext file {}'.format(self.filepath))
@@ -126,18 +133,19 @@ class FileUpload(models.Model):
     def format_could_be_tasks_list(self):
         return self.format in ('.csv', '.tsv', '.txt')
 
-    def read_tasks(self, file_as_tasks_list=True):
+    def iter_tasks(self, file_as_tasks_list=True):
+        """Yield tasks from the file, tasks lists are parsed lazily"""
         file_format = self.format
         try:
             # file as tasks list
             if file_format == '.csv' and file_as_tasks_list:
-                tasks = self.read_tasks_list_from_csv()
+                yield from self.iter_tasks_list_from_csv()
             elif file_format == '.tsv' and file_as_tasks_list:
-                tasks = self.read_tasks_list_from_tsv()
+                yield from self.iter_tasks_list_from_csv('\t')
             elif file_format == '.txt' and file_as_tasks_list:
-                tasks = self.read_tasks_list_from_txt()
+                yield from self.iter_tasks_list_from_txt()
             elif file_format == '.json':
-                tasks = self.read_tasks_list_from_json()
+                yield from self.iter_tasks_list_from_json()
 
             # otherwise - only one object tag should be presented in label config
             elif not self.project.one_object_in_label_config:
@@ -148,13 +156,20 @@ class FileUpload(models.Model):
 
             # file as a single asset
             elif file_format in ('.html', '.htm', '.xml'):
-                tasks = self.read_task_from_hypertext_body()
+                yield from self.read_task_from_hypertext_body()
             else:
-                tasks = self.read_task_from_uploaded_file()
+                yield from self.read_task_from_uploaded_file()
 
         except Exception as exc:
             raise ValidationError('Failed to parse input file ' + self.file_name + ': ' + str(exc))
-        return tasks
+
+    def read_tasks(self, file_as_tasks_list=True):
+        return list(self.iter_tasks(file_as_tasks_list))
+
+    def validate_tasks(self, file_as_tasks_list=True):
+        """Parse the whole file without keeping tasks, parse errors are raised as in `iter_tasks`"""
+        for _ in self.iter_tasks(file_as_tasks_list):
+            pass
 
     @classmethod
     def load_tasks_from_uploaded_files(
@@ -201,7 +216,12 @@ class FileUpload(models.Model):
     def load_tasks_from_uploaded_files_streaming(
         cls, project, file_upload_ids=None, formats=None, files_as_tasks_list=True, batch_size=5000
     ):
-        """Stream tasks from uploaded files in batches to reduce memory usage"""
+        """Stream tasks from uploaded files in batches to reduce memory usage.
+
+        Each file is validated by a full parse before its first task is yielded, so a broken file
+        doesn't leave the tasks of its first batches imported. Batches are committed by the caller,
+        so tasks of the previous files are already imported when a later file fails.
+        """
         fileformats = []
         common_data_fields = set()
         batch = []
@@ -217,25 +237,28 @@ class FileUpload(models.Model):
             if formats and file_format not in formats:
                 continue
 
-            new_tasks = file_upload.read_tasks(files_as_tasks_list)
+            # tasks are parsed lazily, so only the current batch is kept in memory,
+            # the file is parsed twice to raise parse errors before any of its tasks is yielded
+            file_upload.validate_tasks(files_as_tasks_list)
+            new_tasks = file_upload.iter_tasks(files_as_tasks_list)
             fileformats.append(file_format)
 
-            # Validate data fields consistency
-            if new_tasks:
-                new_data_fields = set(new_tasks[0]['data'].keys())
-                if not common_data_fields:
-                    common_data_fields = new_data_fields
-                elif not common_data_fields.intersection(new_data_fields):
-                    raise ValidationError(
-                        _old_vs_new_data_keys_inconsistency_message(
-                            new_data_fields, common_data_fields, file_upload.file.name
+            # Add file_upload_id to tasks and batch them
+            for i, task in enumerate(new_tasks):
+                # Validate data fields consistency
+                if i == 0:
+                    new_data_fields = set(task['data'].keys())
+                    if not common_data_fields:
+                        common_data_fields = new_data_fields
+                    elif not common_data_fields.intersection(new_data_fields):
+                        raise ValidationError(
+                            _old_vs_new_data_keys_inconsistency_message(
+                                new_data_fields, common_data_fields, file_upload.file.name
+                            )
                         )
-                    )
-                else:
-                    common_data_fields &= new_data_fields
+                    else:
+                        common_data_fields &= new_data_fields
 
-            # Add file_upload_id to tasks and batch them
-            for task in new_tasks:
                 task['file_upload_id'] = file_upload.id
                 batch.append(task)
 
@@ -2,10 +2,12 @@
 """
 
 import logging
+from collections import Counter, defaultdict
 
+from core.label_config import get_label_interface
 from core.permissions import AllPermissions
-from core.redis import start_job_async_or_sync
-from label_studio_sdk.label_interface import LabelInterface
+from core.redis import start_job_async_or_sync, update_current_job_meta
+from django.conf import settings
 from tasks.models import Annotation, Prediction, Task
 
 logger = logging.getLogger(__name__)
@@ -19,7 +21,7 @@ def cache_labels_job(project, queryset, **kwargs):
     source_class = Annotation if source == 'annotations' else Prediction
     control_tag = request_data.get('custom_control_tag') or request_data.get('control_tag')
     with_counters = request_data.get('with_counters', 'Yes').lower() == 'yes'
-    label_interface = LabelInterface(project.label_config)
+    label_interface = get_label_interface(project.label_config)
     label_interface_tags = {tag.name: tag for tag in label_interface.find_tags('control')}
 
     if source == 'annotations':
@@ -34,30 +36,43 @@ def cache_labels_job(project, queryset, **kwargs):
     else:
         column_name = f'{column_name}_{control_tag}'
 
-    tasks = list(queryset.only('data'))
-    logger.info(f'Cache labels for {len(tasks)} tasks and control tag {control_tag}')
-
-    for task in tasks:
-        task_labels = []
-        annotations = source_class.objects.filter(task=task).only('result')
-        for annotation in annotations:
-            labels = extract_labels(annotation, control_tag, label_interface_tags)
-            task_labels.extend(labels)
-
-        # cache labels in separate data column
-        # with counters
-        if with_counters:
-            task.data[column_name] = ', '.join(
-                sorted([f'{label}: {task_labels.count(label)}' for label in set(task_labels)])
-            )
-        # no counters
-        else:
-            task.data[column_name] = ', '.join(sorted(list(set(task_labels))))
-
-    Task.objects.bulk_update(tasks, fields=['data'], batch_size=1000)
-    first_task = Task.objects.get(id=queryset.first().id)
-    project.summary.update_data_columns([first_task])
-    return {'response_code': 200, 'detail': f'Updated {len(tasks)} tasks'}
+    task_ids = list(queryset.values_list('id', flat=True))
+    total = len(task_ids)
+    logger.info(f'Cache labels for {total} tasks and control tag {control_tag}')
+
+    for offset in range(0, total, settings.BATCH_SIZE):
+        chunk_ids = task_ids[offset : offset + settings.BATCH_SIZE]
+        tasks = list(Task.objects.filter(id__in=chunk_ids).only('data'))
+
+        # count labels of all tasks in the chunk with one query
+        task_labels = defaultdict(Counter)
+        annotations = source_class.objects.filter(task_id__in=chunk_ids).only('task_id', 'result')
+        for annotation in annotations.iterator(chunk_size=settings.BATCH_SIZE):
+            task_labels[annotation.task_id].update(extract_labels(annotation, control_tag, label_interface_tags))
+
+        for task in tasks:
+            labels = task_labels[task.id]
+            # cache labels in separate data column
+            # with counters
+            if with_counters:
+                task.data[column_name] = ', '.join(sorted([f'{label}: {count}' for label, count in labels.items()]))
+            # no counters
+            else:
+                task.data[column_name] = ', '.join(sorted(labels))
+
+        Task.objects.bulk_update(tasks, fields=['data'], batch_size=settings.BATCH_SIZE)
+        report_progress(min(offset + settings.BATCH_SIZE, total), total)
+
+    if task_ids:
+        first_task = Task.objects.get(id=task_ids[0])
+        project.summary.update_data_columns([first_task])
+    return {'response_code': 200, 'detail': f'Updated {total} tasks'}
+
+
+def report_progress(processed, total):
+    """Log progress and store it in the meta of the current rq job, if any"""
+    logger.info(f'Cache labels: {processed}/{total} tasks processed')
+    update_current_job_meta(progress={'processed': processed, 'total': total})
 
 
 def extract_labels(annotation, control_tag, label_interface_tags=None):
@@ -6,9 +6,11 @@ import random
 
 import ujson as json
 from core.permissions import AllPermissions
+from core.redis import start_job_async_or_sync
 from core.utils.db import fast_first
 from data_manager.functions import DataManagerException
 from django.conf import settings
+from labels_manager.functions import update_annotation_results
 from tasks.models import Annotation, Task
 from tasks.serializers import TaskSerializerBulk
 
@@ -69,13 +71,30 @@ def propagate_annotations_form(user, project):
 def rename_labels(project, queryset, **kwargs):
     request = kwargs['request']
 
-    old_label_name = request.data.get('old_label_name')
-    new_label_name = request.data.get('new_label_name')
     control_tag = request.data.get('control_tag')
-
     labels = project.get_parsed_config()
     if control_tag not in labels:
-        raise Exception('Wrong old label name, it is not from labeling config: ' + old_label_name)
+        raise Exception('Wrong old label name, it is not from labeling config: ' + request.data.get('old_label_name'))
+
+    result = start_job_async_or_sync(
+        rename_labels_job,
+        project,
+        request_data=request.data,
+        organization_id=project.organization_id,
+        job_timeout=60 * 60 * 5,  # max allowed duration is 5 hours
+    )
+    if isinstance(result, dict):
+        return result
+    return {'response_code': 200, 'detail': 'Labels are renamed in the background'}
+
+
+def rename_labels_job(project, request_data, **kwargs):
+    """Job for start_job_async_or_sync"""
+    old_label_name = request_data.get('old_label_name')
+    new_label_name = request_data.get('new_label_name')
+    control_tag = request_data.get('control_tag')
+
+    labels = project.get_parsed_config()
     label_type = labels[control_tag]['type'].lower()
 
     annotations = Annotation.objects.filter(project=project)
@@ -86,11 +105,12 @@ def rename_labels(project, queryset, **kwargs):
             result__contains=[{'value': {label_type: [old_label_name]}}]
         )
 
-    label_count = 0
     annotation_count = 0
-    for annotation in annotations:
-        changed = False
-        for sub in annotation.result:
+
+    def rename_label(result):
+        nonlocal annotation_count
+        label_count = 0
+        for sub in result:
             if sub.get('from_name', None) == control_tag and old_label_name in sub.get('value', {}).get(
                 label_type, []
             ):
@@ -100,15 +120,16 @@ def rename_labels(project, queryset, **kwargs):
                     if label == old_label_name:
                         new_labels.append(new_label_name)
                         label_count += 1
-                        changed = True
                     else:
                         new_labels.append(label)
 
                 sub['value'][label_type] = new_labels
 
-        if changed:
-            annotation.save(update_fields=['result'])
+        if label_count:
             annotation_count += 1
+        return label_count
+
+    label_count = update_annotation_results(annotations, rename_label)
 
     # update summaries
     logger.info(f'calling reset project_id={project.id} rename_labels()')
@@ -1,6 +1,7 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 
+import hashlib
 import logging
 from collections import defaultdict
 
@@ -9,6 +10,7 @@ from core.label_config import replace_task_data_undefined_with_config_field
 from core.permissions import AllPermissions
 from core.redis import start_job_async_or_sync
 from data_manager.actions.basic import delete_tasks
+from django.conf import settings
 from io_storages.azure_blob.models import AzureBlobImportStorageLink
 from io_storages.gcs.models import GCSImportStorageLink
 from io_storages.localfiles.models import LocalFilesImportStorageLink
@@ -185,8 +187,18 @@ def restore_storage_links_for_duplicated_tasks(duplicates) -> None:
     logger.info(f'Restored {total_restored_links} storage links for duplicated tasks')
 
 
+def get_task_data_key(data, project) -> str:
+    """Serialize task data with sorted keys, so equal data always gives the same string"""
+    replace_task_data_undefined_with_config_field(data, project)
+    return json.dumps(data, sort_keys=True)
+
+
 def find_duplicated_tasks_by_data(project, queryset):
-    """Find duplicated tasks by `task.data` and return them as a dict"""
+    """Find duplicated tasks by `task.data` and return them as a dict
+
+    Tasks are streamed in chunks and grouped by a hash of their data first,
+    so only tasks sharing a hash are loaded fully and compared by the whole data.
+    """
 
     # get io_storage_* links for tasks, we need to copy them
     storages = []
@@ -194,14 +206,29 @@ def find_duplicated_tasks_by_data(project, queryset):
         if field.startswith('io_storages_'):
             storages += [field]
 
-    groups = defaultdict(list)
-    tasks = list(queryset.values('data', 'id', 'total_annotations', 'cancelled_annotations', *storages))
-    logger.info(f'Retrieved {len(tasks)} tasks from queryset')
+    hashes = defaultdict(list)
+    total = 0
+    for task_id, data in queryset.values_list('id', 'data').iterator(chunk_size=settings.BATCH_SIZE):
+        hashes[hashlib.md5(get_task_data_key(data, project).encode()).digest()].append(task_id)
+        total += 1
+    logger.info(f'Retrieved {total} tasks from queryset')
+
+    candidates = [ids for ids in hashes.values() if len(ids) > 1]
+    del hashes
 
-    for task in list(tasks):
-        replace_task_data_undefined_with_config_field(task['data'], project)
-        task['data'] = json.dumps(task['data'])
-        groups[task['data']].append(task)
+    # the same hash doesn't guarantee the same data, so compare full data of candidates
+    groups = defaultdict(list)
+    fields = ('data', 'id', 'total_annotations', 'cancelled_annotations', *storages)
+    for i in range(0, len(candidates), settings.BATCH_SIZE):
+        chunk = candidates[i : i + settings.BATCH_SIZE]
+        tasks = Task.objects.filter(id__in=[task_id for ids in chunk for task_id in ids]).values(*fields)
+        tasks = {task['id']: task for task in tasks}
+        for ids in chunk:
+            # keep queryset order inside of groups, the first task is the main one
+            for task_id in ids:
+                task = tasks[task_id]
+                task['data'] = get_task_data_key(task['data'], project)
+                groups[task['data']].append(task)
 
     # make groups of duplicated ids for info print
     duplicates = {d: groups[d] for d in groups if len(groups[d]) > 1}
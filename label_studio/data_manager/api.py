@@ -1,6 +1,10 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
+import base64
+import binascii
+import json
 import logging
+from functools import partial
 
 from asgiref.sync import async_to_sync, sync_to_async
 from core.feature_flags import flag_set
@@ -8,8 +12,22 @@ from core.permissions import ViewClassPermission, all_permissions
 from core.utils.common import int_from_request, load_func
 from core.utils.params import bool_from_request
 from data_manager.actions import get_action_form, get_all_actions, perform_action
-from data_manager.functions import evaluate_predictions, get_prepare_params, get_prepared_queryset
-from data_manager.managers import get_fields_for_evaluation
+from data_manager.counts import (
+    TaskCountPaginator,
+    estimate_queryset_count,
+    get_cached_task_counts,
+    get_task_counts_cache_key,
+    set_cached_task_counts,
+    task_counts_cache_enabled,
+)
+from data_manager.functions import get_prepare_params, get_prepared_queryset
+from data_manager.managers import (
+    apply_keyset_pagination,
+    get_annotations_map,
+    get_fields_for_evaluation,
+    get_fields_for_filter_ordering,
+    get_ordering_key,
+)
 from data_manager.models import View
 from data_manager.prepare_params import filters_schema, ordering_schema, prepare_params_schema
 from data_manager.serializers import (
@@ -19,16 +37,19 @@ from data_manager.serializers import (
     ViewSerializer,
 )
 from django.conf import settings
-from django.db.models import Sum
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Sum, prefetch_related_objects
 from django.db.models.functions import Coalesce
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, extend_schema
+from ml.prediction_fill import schedule_predictions_fill
 from projects.models import Project
 from projects.serializers import ProjectSerializer
 from rest_framework import generics, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -240,9 +261,55 @@ class ViewAPI(viewsets.ModelViewSet):
 class TaskPagination(PageNumberPagination):
     page_size = 100
     page_size_query_param = 'page_size'
+    # keyset pagination is used instead of page numbers when `cursor` is in the query, empty cursor is the first page
+    cursor_query_param = 'cursor'
     total_annotations = 0
     total_predictions = 0
     max_page_size = settings.TASK_API_PAGE_SIZE_MAX
+    keyset = False
+    next_cursor = None
+    total = None
+
+    @staticmethod
+    def encode_cursor(value, task_id):
+        cursor = json.dumps({'value': value, 'id': task_id}, cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return cursor['value'], int(cursor['id'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise ValidationError({'cursor': 'Invalid cursor'})
+
+    def paginate_keyset_queryset(self, queryset, request, view=None):
+        """Keyset (seek) pagination: the cursor keeps ordering value and id of the last task from the previous page,
+        so each page is a range condition over (ordering field, id) instead of a growing OFFSET
+        """
+        self.keyset = True
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        try:
+            field_name, _ = get_ordering_key(queryset)
+        except ValueError as e:
+            raise ValidationError({'cursor': str(e)})
+
+        if cursor:
+            last_value, last_id = self.decode_cursor(cursor)
+            page = list(apply_keyset_pagination(queryset, last_value, last_id)[: page_size + 1])
+        else:
+            # totals are returned with the first page only, so the next pages don't pay for counting
+            page = list(apply_keyset_pagination(queryset)[: page_size + 1])
+            self.set_totals(queryset)
+            self.total = queryset.count()
+
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(last.serializable_value(field_name), last.id)
+        return page
 
     @async_to_sync
     async def async_paginate_queryset(self, queryset, request, view=None):
@@ -258,20 +325,65 @@ class TaskPagination(PageNumberPagination):
         self.total_annotations = Annotation.objects.filter(task_id__in=queryset, was_cancelled=False).count()
         return super().paginate_queryset(queryset, request, view)
 
-    def paginate_totals_queryset(self, queryset, request, view=None):
+    def set_totals(self, queryset):
         totals = queryset.values('id').aggregate(
             total_annotations=Coalesce(Sum('total_annotations'), 0),
             total_predictions=Coalesce(Sum('total_predictions'), 0),
         )
         self.total_annotations = totals['total_annotations']
         self.total_predictions = totals['total_predictions']
+
+    def paginate_totals_queryset(self, queryset, request, view=None):
+        self.set_totals(queryset)
         return super().paginate_queryset(queryset, request, view)
 
-    def paginate_queryset(self, queryset, request, view=None):
+    def paginate_counted_queryset(self, queryset, request, view=None):
         if flag_set('fflag_fix_back_optic_1407_optimize_tasks_api_pagination_counts'):
             return self.paginate_totals_queryset(queryset, request, view)
         return self.sync_paginate_queryset(queryset, request, view)
 
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            return self.paginate_keyset_queryset(queryset, request, view)
+
+        project = getattr(view, 'project', None)
+        prepare_params = getattr(view, 'prepare_params', None)
+        if project is None or prepare_params is None or not task_counts_cache_enabled():
+            return self.paginate_counted_queryset(queryset, request, view)
+
+        # counts are cached per project data version and view filters
+        cache_key = get_task_counts_cache_key(project.id, prepare_params)
+        counts = get_cached_task_counts(cache_key)
+        if counts is not None:
+            self.total_annotations = counts['total_annotations']
+            self.total_predictions = counts['total_predictions']
+            self.django_paginator_class = partial(TaskCountPaginator, count=counts['total'])
+            return super().paginate_queryset(queryset, request, view)
+
+        # use planner estimate instead of exact COUNT for big task lists,
+        # annotations and predictions totals would need the same full scan, so they aren't calculated
+        estimated_count = None
+        threshold = settings.DATA_MANAGER_ESTIMATED_COUNT_THRESHOLD
+        if threshold > 0:
+            estimated_count = estimate_queryset_count(queryset)
+
+        if estimated_count is not None and estimated_count >= threshold:
+            self.django_paginator_class = partial(TaskCountPaginator, count=estimated_count)
+            self.total_annotations = None
+            self.total_predictions = None
+            page = super().paginate_queryset(queryset, request, view)
+        else:
+            page = self.paginate_counted_queryset(queryset, request, view)
+        set_cached_task_counts(
+            cache_key,
+            {
+                'total': self.page.paginator.count,
+                'total_annotations': self.total_annotations,
+                'total_predictions': self.total_predictions,
+            },
+        )
+        return page
+
     def get_paginated_response_schema(self, schema):
         return {
             'type': 'object',
@@ -284,12 +396,14 @@ class TaskPagination(PageNumberPagination):
                 },
                 'total_annotations': {
                     'type': 'integer',
-                    'description': 'Total number of annotations',
+                    'nullable': True,
+                    'description': 'Total number of annotations, null when the number of tasks is estimated',
                     'example': 456,
                 },
                 'total_predictions': {
                     'type': 'integer',
-                    'description': 'Total number of predictions',
+                    'nullable': True,
+                    'description': 'Total number of predictions, null when the number of tasks is estimated',
                     'example': 78,
                 },
             },
@@ -297,6 +411,18 @@ class TaskPagination(PageNumberPagination):
         }
 
     def get_paginated_response(self, data):
+        if self.keyset:
+            response = {'tasks': data, 'next_cursor': self.next_cursor}
+            if self.total is not None:
+                response.update(
+                    {
+                        'total_annotations': self.total_annotations,
+                        'total_predictions': self.total_predictions,
+                        'total': self.total,
+                    }
+                )
+            return Response(response)
+
         return Response(
             {
                 'total_annotations': self.total_annotations,
@@ -331,7 +457,7 @@ class TaskListAPI(generics.ListCreateAPIView):
         }
 
     def get_task_queryset(self, request, prepare_params):
-        return Task.prepared.only_filtered(prepare_params=prepare_params)
+        return Task.prepared.only_filtered(prepare_params=prepare_params, project=getattr(self, 'project', None))
 
     @staticmethod
     def prefetch(queryset):
@@ -348,6 +474,43 @@ class TaskListAPI(generics.ListCreateAPIView):
             'file_upload',
         )
 
+    @staticmethod
+    def get_reused_fields(prepare_params):
+        """Fields annotated for ordering that can be taken from the page instead of being evaluated again
+
+        Filters can add joins changing aggregated values, so values are reused only for unfiltered queries.
+        """
+        if prepare_params.filters and prepare_params.filters.items:
+            return []
+        annotations_map = get_annotations_map()
+        return [field for field in get_fields_for_filter_ordering(prepare_params) if field in annotations_map]
+
+    @staticmethod
+    def copy_annotated_values(page, tasks_by_ids, queryset):
+        """Copy values annotated by the page query to tasks fetched by ids"""
+        names = list(queryset.query.annotation_select)
+        for page_task in page:
+            task = tasks_by_ids[page_task.id]
+            for name in names:
+                if hasattr(page_task, name):
+                    setattr(task, name, getattr(page_task, name))
+
+    @staticmethod
+    def fill_predictions(project, tasks):
+        """Schedule ML predictions for page tasks without them and reload predictions with one query"""
+        backend = project.ml_backend
+        if not backend:
+            return
+        task_ids = [task.id for task in tasks if not task.predictions.all()]
+        if not schedule_predictions_fill(backend, task_ids):
+            return
+        # predictions are ready right away if jobs run synchronously, otherwise they appear on the next load
+        scheduled_ids = set(task_ids)
+        scheduled = [task for task in tasks if task.id in scheduled_ids]
+        for task in scheduled:
+            task._prefetched_objects_cache.pop('predictions', None)
+        prefetch_related_objects(scheduled, 'predictions')
+
     def get(self, request):
         # get project
         view_pk = int_from_request(request.GET, 'view', 0) or int_from_request(request.data, 'view', 0)
@@ -363,6 +526,9 @@ class TaskListAPI(generics.ListCreateAPIView):
             return Response({'detail': 'Neither project nor view id specified'}, status=404)
         # get prepare params (from view or from payload directly)
         prepare_params = get_prepare_params(request, project)
+        # project and view filters are used by pagination to cache task counts
+        self.project = project
+        self.prepare_params = prepare_params
         queryset = self.get_task_queryset(request, prepare_params)
 
         # paginated tasks
@@ -370,7 +536,7 @@ class TaskListAPI(generics.ListCreateAPIView):
 
         # get request params
         all_fields = 'all' if request.GET.get('fields', None) == 'all' else None
-        fields_for_evaluation = get_fields_for_evaluation(prepare_params, request.user)
+        fields_for_evaluation = get_fields_for_evaluation(prepare_params, request.user, project=project)
         review = bool_from_request(self.request.GET, 'review', False)
 
         if review:
@@ -378,16 +544,21 @@ class TaskListAPI(generics.ListCreateAPIView):
             all_fields = None
         if page is not None:
             ids = [task.id for task in page]  # page is a list already
+            reused_fields = self.get_reused_fields(prepare_params)
             tasks = self.prefetch(
                 Task.prepared.annotate_queryset(
                     Task.objects.filter(id__in=ids),
                     fields_for_evaluation=fields_for_evaluation,
                     all_fields=all_fields,
+                    excluded_fields_for_evaluation=reused_fields,
                     request=request,
+                    project=project,
                 )
             )
 
             tasks_by_ids = {task.id: task for task in tasks}
+            if reused_fields:
+                self.copy_annotated_values(page, tasks_by_ids, queryset)
             # keep ids ordering
             page = [tasks_by_ids[_id] for _id in ids]
 
@@ -397,18 +568,23 @@ class TaskListAPI(generics.ListCreateAPIView):
                 # people to retrieve manually instead on DM load, plus it
                 # will slow down initial DM load
                 # if project.retrieve_predictions_automatically is deprecated now and no longer used
-                tasks_for_predictions = Task.objects.filter(id__in=ids, predictions__isnull=True)
-                evaluate_predictions(tasks_for_predictions)
-                [tasks_by_ids[_id].refresh_from_db() for _id in ids]
+                self.fill_predictions(project, page)
 
             context = self.get_task_serializer_context(self.request, project, tasks)
             serializer = self.task_serializer_class(page, many=True, context=context)
             return self.get_paginated_response(serializer.data)
         # all tasks
         if project.evaluate_predictions_automatically:
-            evaluate_predictions(queryset.filter(predictions__isnull=True))
+            backend = project.ml_backend
+            if backend:
+                task_ids = queryset.filter(predictions__isnull=True).values_list('id', flat=True)
+                schedule_predictions_fill(backend, list(task_ids))
         queryset = Task.prepared.annotate_queryset(
-            queryset, fields_for_evaluation=fields_for_evaluation, all_fields=all_fields, request=request
+            queryset,
+            fields_for_evaluation=fields_for_evaluation,
+            all_fields=all_fields,
+            request=request,
+            project=project,
         )
         context = self.get_task_serializer_context(self.request, project, queryset)
         serializer = self.task_serializer_class(queryset, many=True, context=context)
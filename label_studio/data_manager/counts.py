@@ -0,0 +1,130 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import hashlib
+import logging
+from typing import Optional
+
+import ujson as json
+from core.redis import redis_connected
+from django.conf import settings
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db import connections
+from django_rq import get_connection
+
+logger = logging.getLogger(__name__)
+
+TASK_COUNTS_CACHE_PREFIX = 'dm:task_counts'
+TASK_COUNTS_VERSION_PREFIX = f'{TASK_COUNTS_CACHE_PREFIX}:version'
+
+
+def task_counts_cache_enabled() -> bool:
+    """Counts are cached in Redis, so invalidation from any web or RQ worker reaches all processes"""
+    return settings.DATA_MANAGER_COUNTS_CACHE_TTL > 0 and redis_connected()
+
+
+def _get_version_key(project_id: int) -> str:
+    return f'{TASK_COUNTS_VERSION_PREFIX}:{project_id}'
+
+
+def get_task_counts_version(project_id: int) -> int:
+    """Project data version, it changes on every task, annotation or prediction write"""
+    return int(get_connection().get(_get_version_key(project_id)) or 0)
+
+
+def invalidate_task_counts(project_id: Optional[int]) -> None:
+    """Drop all cached Data Manager counts of the project by incrementing its data version"""
+    if project_id is None or not task_counts_cache_enabled():
+        return
+    try:
+        get_connection().incr(_get_version_key(project_id))
+    except Exception as e:
+        logger.error(f'Failed to invalidate task counts for project {project_id}: {e}')
+
+
+def get_task_counts_cache_key(project_id: int, prepare_params) -> Optional[str]:
+    """Cache key built from the project, its data version and the view filters and selected items
+
+    Ordering and hidden columns don't change counts, so they don't change the key.
+
+    :return: cache key or None if the data version can't be read
+    """
+    view_filters = prepare_params.model_dump(include={'filters', 'selectedItems'}, mode='json')
+    filters_hash = hashlib.md5(json.dumps(view_filters, sort_keys=True).encode()).hexdigest()
+    try:
+        version = get_task_counts_version(project_id)
+    except Exception as e:
+        logger.error(f'Failed to get task counts version for project {project_id}: {e}')
+        return None
+    return f'{TASK_COUNTS_CACHE_PREFIX}:{project_id}:{version}:{filters_hash}'
+
+
+def get_cached_task_counts(cache_key: Optional[str]) -> Optional[dict]:
+    if not cache_key:
+        return None
+    try:
+        counts = get_connection().get(cache_key)
+    except Exception as e:
+        logger.error(f'Failed to get cached task counts: {e}')
+        return None
+    return json.loads(counts) if counts else None
+
+
+def set_cached_task_counts(cache_key: Optional[str], counts: dict) -> None:
+    if not cache_key:
+        return
+    try:
+        get_connection().set(cache_key, json.dumps(counts), ex=settings.DATA_MANAGER_COUNTS_CACHE_TTL)
+    except Exception as e:
+        logger.error(f'Failed to cache task counts: {e}')
+
+
+def estimate_queryset_count(queryset) -> Optional[int]:
+    """Get number of rows estimated by PostgreSQL planner, it's much faster than exact COUNT on big projects
+
+    :return: estimated number of rows or None if it's not available for the database
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+    except Exception as e:
+        logger.warning(f'Failed to estimate tasks count: {e}')
+        return None
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class TaskCountPaginator(Paginator):
+    """Paginator with precalculated total count, cached or estimated
+
+    Such count can be smaller than the real one, so pages are neither validated against it nor truncated to it.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @property
+    def count(self):
+        return self._count
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom : bottom + self.per_page], number, self)
@@ -42,6 +42,7 @@ def get_all_columns(project, *_):
     data_types.update(project_data_types.items())
 
     # all data types from import data
+    project.summary.fold_summary_deltas()
     all_data_columns = project.summary.all_data_columns
     logger.info(f'get_all_columns: project_id={project.id} {all_data_columns=} {data_types=}')
     if all_data_columns:
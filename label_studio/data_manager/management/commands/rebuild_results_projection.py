@@ -0,0 +1,26 @@
+import logging
+
+from core.redis import start_job_async_or_sync
+from data_manager.results_projection import rebuild_results_projection
+from django.core.management.base import BaseCommand
+from projects.models import Project
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Data Manager results projection (annotation and prediction results text) of organization projects'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization', type=int, help='organization id')
+
+    def handle(self, *args, **options):
+        logger.debug(f"Start rebuilding results projection for Organization {options['organization']}.")
+        projects = Project.objects.filter(organization_id=options['organization'])
+
+        for project in projects:
+            logger.debug(f'Start processing project {project.id}.')
+            start_job_async_or_sync(rebuild_results_projection, project.id)
+            logger.debug(f'End processing project {project.id}.')
+
+        logger.debug(f"Organization {options['organization']} results projection was rebuilt.")
@@ -10,6 +10,7 @@ import ujson as json
 from core.feature_flags import flag_set
 from core.utils.db import fast_first
 from data_manager.prepare_params import ConjunctionEnum
+from data_manager.results_projection import results_projection_enabled
 from django.conf import settings
 from django.contrib.postgres.aggregates import ArrayAgg
 from django.db import models
@@ -19,6 +20,7 @@ from django.db.models import (
     Case,
     DateTimeField,
     Exists,
+    ExpressionWrapper,
     F,
     FloatField,
     OuterRef,
@@ -28,6 +30,7 @@ from django.db.models import (
     Value,
     When,
 )
+from django.db.models.expressions import OrderBy
 from django.db.models.fields.json import KeyTextTransform
 from django.db.models.functions import Cast, Coalesce, Concat
 from pydantic import BaseModel
@@ -95,11 +98,12 @@ def get_fields_for_filter_ordering(prepare_params):
     return result
 
 
-def get_fields_for_evaluation(prepare_params, user, skip_regular=True):
+def get_fields_for_evaluation(prepare_params, user, skip_regular=True, project=None):
     """Collecting field names to annotate them
 
     :param prepare_params: structure with filters and ordering
     :param user: user
+    :param project: project from prepare_params if it's already fetched
     :return: list of field names
     """
     from projects.models import Project
@@ -114,7 +118,9 @@ def get_fields_for_evaluation(prepare_params, user, skip_regular=True):
         from label_studio.data_manager.functions import TASKS
 
         GET_ALL_COLUMNS = load_func(settings.DATA_MANAGER_GET_ALL_COLUMNS)
-        all_columns = GET_ALL_COLUMNS(Project.objects.get(id=prepare_params.project), user)
+        if project is None:
+            project = Project.objects.get(id=prepare_params.project)
+        all_columns = GET_ALL_COLUMNS(project, user)
         all_columns = set(
             [TASKS + ('data.' if c.get('parent', None) == 'data' else '') + c['id'] for c in all_columns['columns']]
         )
@@ -180,6 +186,62 @@ def apply_ordering(queryset, ordering, project, request, view_data=None):
     return queryset
 
 
+def get_ordering_key(queryset):
+    """Get ordering field name and direction of the queryset ordered by apply_ordering
+
+    :return: (field name, ascending)
+    """
+    order_by = queryset.query.order_by
+    if not order_by:
+        return 'id', True
+
+    item = order_by[0]
+    if isinstance(item, str):
+        return item.lstrip('-'), not item.startswith('-')
+    if isinstance(item, OrderBy) and isinstance(item.expression, F):
+        return item.expression.name, not item.descending
+    raise ValueError(f'Unsupported ordering for keyset pagination: {item}')
+
+
+def apply_keyset_pagination(queryset, last_value=None, last_id=None):
+    """Seek tasks following the task with (last_value, last_id) in queryset ordering,
+    `id` is used as a tie-breaker, NULL values are last for both directions as in apply_ordering
+
+    :param queryset: queryset ordered by apply_ordering
+    :param last_value: ordering field value of the last task from the previous page
+    :param last_id: id of the last task from the previous page, None for the first page
+    :return: queryset ordered by (ordering field, id)
+    """
+    field_name, ascending = get_ordering_key(queryset)
+
+    if field_name == 'id':
+        queryset = queryset.order_by('id' if ascending else '-id')
+        if last_id is not None:
+            queryset = queryset.filter(id__gt=last_id) if ascending else queryset.filter(id__lt=last_id)
+        return queryset
+
+    f = F(field_name).asc(nulls_last=True) if ascending else F(field_name).desc(nulls_last=True)
+    queryset = queryset.order_by(f, 'id')
+    if last_id is None:
+        return queryset
+
+    annotation = queryset.query.annotations.get(field_name)
+    if annotation is not None:
+        # compare annotations by their output field, e.g. JSON key transforms have their own lookups for data fields
+        field_name = 'keyset_value'
+        queryset = queryset.alias(keyset_value=ExpressionWrapper(f.expression, output_field=annotation.output_field))
+
+    if last_value is None:
+        return queryset.filter(Q(**{f'{field_name}__isnull': True}) & Q(id__gt=last_id))
+
+    lookup = 'gt' if ascending else 'lt'
+    return queryset.filter(
+        Q(**{f'{field_name}__{lookup}': last_value})
+        | Q(**{field_name: last_value, 'id__gt': last_id})
+        | Q(**{f'{field_name}__isnull': True})
+    )
+
+
 def cast_value(_filter):
     # range (is between)
     if hasattr(_filter.value, 'max'):
@@ -205,8 +267,12 @@ def add_result_filter(field_name, _filter, filter_expressions, project):
 
     _class = Annotation if field_name == 'annotations_results' else Prediction
 
+    projection_field = 'results_projection__' + field_name
+    # Denormalized results text
+    if results_projection_enabled():
+        subquery = Q(**{projection_field + '__contains': _filter.value})
     # Annotation
-    if field_name == 'annotations_results':
+    elif field_name == 'annotations_results':
         subquery = Q(
             id__in=Annotation.objects.annotate(json_str=RawSQL('cast(result as text)', ''))
             .filter(Q(project=project) & Q(json_str__contains=_filter.value))
@@ -489,10 +555,11 @@ def apply_filters(queryset, filters, project, request):
 
 
 class TaskQuerySet(models.QuerySet):
-    def prepared(self, prepare_params=None):
+    def prepared(self, prepare_params=None, project=None):
         """Apply filters, ordering and selected items to queryset
 
         :param prepare_params: prepare params with project, filters, orderings, etc
+        :param project: project from prepare_params if it's already fetched
         :return: ordered and filtered queryset
         """
         from projects.models import Project
@@ -502,7 +569,8 @@ class TaskQuerySet(models.QuerySet):
         if prepare_params is None:
             return queryset
 
-        project = Project.objects.get(pk=prepare_params.project)
+        if project is None:
+            project = Project.objects.get(pk=prepare_params.project)
         request = prepare_params.request
         queryset = apply_filters(queryset, prepare_params.filters, project, request)
         queryset = apply_ordering(queryset, prepare_params.ordering, project, request, view_data=prepare_params.data)
@@ -612,8 +680,16 @@ def annotate_storage_filename(queryset: TaskQuerySet) -> TaskQuerySet:
     )
 
 
+def annotate_results_projection(queryset, field_name):
+    return queryset.annotate(
+        **{field_name: Coalesce(F('results_projection__' + field_name), Value(''), output_field=models.TextField())}
+    )
+
+
 def annotate_annotations_results(queryset):
-    if settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
+    if results_projection_enabled():
+        return annotate_results_projection(queryset, 'annotations_results')
+    elif settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
         return queryset.annotate(
             annotations_results=Coalesce(
                 GroupConcat('annotations__result'), Value(''), output_field=models.CharField()
@@ -624,7 +700,9 @@ def annotate_annotations_results(queryset):
 
 
 def annotate_predictions_results(queryset):
-    if settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
+    if results_projection_enabled():
+        return annotate_results_projection(queryset, 'predictions_results')
+    elif settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
         return queryset.annotate(
             predictions_results=Coalesce(
                 GroupConcat('predictions__result'), Value(''), output_field=models.CharField()
@@ -644,15 +722,16 @@ def annotate_annotators(queryset):
 
 
 def annotate_predictions_score(queryset):
-    first_task = queryset.first()
-    if not first_task:
-        return queryset
+    project = getattr(queryset, 'project', None)
+    if project is None:
+        first_task = queryset.first()
+        if not first_task:
+            return queryset
+        project = first_task.project
 
     # new approach with each ML backend contains it's version
-    if flag_set('ff_front_dev_1682_model_version_dropdown_070622_short', first_task.project.organization.created_by):
-        model_versions = list(
-            first_task.project.ml_backends.filter(project=first_task.project).values_list('model_version', flat=True)
-        )
+    if flag_set('ff_front_dev_1682_model_version_dropdown_070622_short', project.organization.created_by):
+        model_versions = list(project.ml_backends.filter(project=project).values_list('model_version', flat=True))
         if len(model_versions) == 0:
             return queryset.annotate(predictions_score=Avg('predictions__score'))
 
@@ -661,7 +740,7 @@ def annotate_predictions_score(queryset):
                 predictions_score=Avg('predictions__score', filter=Q(predictions__model_version__in=model_versions))
             )
     else:
-        model_version = first_task.project.model_version
+        model_version = project.model_version
         if model_version is None:
             return queryset.annotate(predictions_score=Avg('predictions__score'))
         else:
@@ -730,8 +809,17 @@ def update_annotation_map(obj):
 class PreparedTaskManager(models.Manager):
     @staticmethod
     def annotate_queryset(
-        queryset, fields_for_evaluation=None, all_fields=False, excluded_fields_for_evaluation=None, request=None
+        queryset,
+        fields_for_evaluation=None,
+        all_fields=False,
+        excluded_fields_for_evaluation=None,
+        request=None,
+        project=None,
     ):
+        """Add db annotations for task fields, annotations are composed lazily and no query is executed here
+
+        :param project: project of tasks, if it's not passed it's taken from the first task with an extra query
+        """
         annotations_map = get_annotations_map()
 
         if fields_for_evaluation is None:
@@ -740,13 +828,16 @@ class PreparedTaskManager(models.Manager):
         if excluded_fields_for_evaluation is None:
             excluded_fields_for_evaluation = []
 
-        first_task = queryset.first()
-        project = None if first_task is None else first_task.project
+        project_probed = project is not None
 
         # db annotations applied only if we need them in ordering or filters
         for field in annotations_map.keys():
             # Include field if it's explicitly requested or all_fields=True, but exclude if it's in the exclusion list
             if (field in fields_for_evaluation or all_fields) and field not in excluded_fields_for_evaluation:
+                if not project_probed:
+                    first_task = queryset.first()
+                    project = None if first_task is None else first_task.project
+                    project_probed = True
                 queryset.project = project
                 queryset.request = request
                 function = annotations_map[field]
@@ -755,17 +846,22 @@ class PreparedTaskManager(models.Manager):
         return queryset
 
     def get_queryset(
-        self, fields_for_evaluation=None, prepare_params=None, all_fields=False, excluded_fields_for_evaluation=None
+        self,
+        fields_for_evaluation=None,
+        prepare_params=None,
+        all_fields=False,
+        excluded_fields_for_evaluation=None,
+        project=None,
     ):
         """
         :param fields_for_evaluation: list of annotated fields in task
         :param prepare_params: filters, ordering, selected items
         :param all_fields: evaluate all fields for task
         :param excluded_fields_for_evaluation: list of fields to exclude even when all_fields=True
-        :param request: request for user extraction
+        :param project: project from prepare_params if it's already fetched
         :return: task queryset with annotated fields
         """
-        queryset = self.only_filtered(prepare_params=prepare_params)
+        queryset = self.only_filtered(prepare_params=prepare_params, project=project)
         # Expose view data to annotation functions for column-specific configuration
         queryset.view_data = getattr(prepare_params, 'data', None)
         return self.annotate_queryset(
@@ -774,14 +870,24 @@ class PreparedTaskManager(models.Manager):
             all_fields=all_fields,
             excluded_fields_for_evaluation=excluded_fields_for_evaluation,
             request=prepare_params.request,
+            project=queryset.project,
         )
 
-    def only_filtered(self, prepare_params=None):
+    def only_filtered(self, prepare_params=None, project=None):
+        from projects.models import Project
+
         request = prepare_params.request
-        queryset = TaskQuerySet(self.model).filter(project=prepare_params.project)
+        if project is None:
+            project = Project.objects.get(pk=prepare_params.project)
+        queryset = TaskQuerySet(self.model).filter(project=project)
         fields_for_filter_ordering = get_fields_for_filter_ordering(prepare_params)
-        queryset = self.annotate_queryset(queryset, fields_for_evaluation=fields_for_filter_ordering, request=request)
-        return queryset.prepared(prepare_params=prepare_params)
+        queryset = self.annotate_queryset(
+            queryset, fields_for_evaluation=fields_for_filter_ordering, request=request, project=project
+        )
+        queryset = queryset.prepared(prepare_params=prepare_params, project=project)
+        # annotation functions and callers take project from queryset
+        queryset.project = project
+        return queryset
 
 
 class TaskManager(models.Manager):
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.15 on 2026-10-17 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_manager", "0015_alter_view_options"),
+        ("tasks", "0057_annotation_proj_result_octlen_idx_async"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskResultsProjection",
+            fields=[
+                (
+                    "task",
+                    models.OneToOneField(
+                        help_text="Task ID",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="results_projection",
+                        serialize=False,
+                        to="tasks.task",
+                    ),
+                ),
+                (
+                    "annotations_results",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Results of all task annotations as text",
+                        verbose_name="annotations results",
+                    ),
+                ),
+                (
+                    "predictions_results",
+                    models.TextField(
+                        blank=True,
+                        default="",
+                        help_text="Results of all task predictions as text",
+                        verbose_name="predictions results",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Last update time",
+                        verbose_name="updated at",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+import logging
+
+from core.utils.common import trigram_migration_operations
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+
+def forwards(apps, schema_editor):
+    if not schema_editor.connection.vendor.startswith('postgres'):
+        logger.info('Database vendor: {}'.format(schema_editor.connection.vendor))
+        logger.info('Skipping migration without attempting to CREATE INDEX')
+        return
+
+    # the table is created empty by the previous migration, so indexes are built without CONCURRENTLY
+    schema_editor.execute(
+        'create index if not exists dm_results_projection_annotations_trgm_idx '
+        'on data_manager_taskresultsprojection using gin (annotations_results gin_trgm_ops);'
+    )
+    schema_editor.execute(
+        'create index if not exists dm_results_projection_predictions_trgm_idx '
+        'on data_manager_taskresultsprojection using gin (predictions_results gin_trgm_ops);'
+    )
+
+
+def backwards(apps, schema_editor):
+    if not schema_editor.connection.vendor.startswith('postgres'):
+        logger.info('Database vendor: {}'.format(schema_editor.connection.vendor))
+        logger.info('Skipping migration without attempting to DROP INDEX')
+        return
+
+    schema_editor.execute('drop index if exists dm_results_projection_annotations_trgm_idx;')
+    schema_editor.execute('drop index if exists dm_results_projection_predictions_trgm_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [('data_manager', '0016_task_results_projection')]
+
+    operations = trigram_migration_operations(migrations.RunPython(forwards, backwards))
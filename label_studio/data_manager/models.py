@@ -102,3 +102,26 @@ class Filter(models.Model):
     type = models.CharField(_('type'), max_length=1024, help_text='Field type')
     operator = models.CharField(_('operator'), max_length=1024, help_text='Filter operator')
     value = models.JSONField(_('value'), default=dict, null=True, help_text='Filter value')
+
+
+class TaskResultsProjection(models.Model):
+    """Results of all task annotations and predictions stored as text
+
+    Data Manager filters, ordering and columns read it instead of aggregating
+    all annotation results of the project on every request.
+    """
+
+    task = models.OneToOneField(
+        'tasks.Task',
+        primary_key=True,
+        related_name='results_projection',
+        on_delete=models.CASCADE,
+        help_text='Task ID',
+    )
+    annotations_results = models.TextField(
+        _('annotations results'), default='', blank=True, help_text='Results of all task annotations as text'
+    )
+    predictions_results = models.TextField(
+        _('predictions results'), default='', blank=True, help_text='Results of all task predictions as text'
+    )
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True, help_text='Last update time')
@@ -0,0 +1,73 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import logging
+from typing import Iterable
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Cast, Coalesce
+
+logger = logging.getLogger(__name__)
+
+
+def results_projection_enabled() -> bool:
+    return settings.DATA_MANAGER_RESULTS_PROJECTION
+
+
+def _results_text(model):
+    """Text of all distinct results of the task, the same text as `cast(result as text)` used by result filters"""
+    from data_manager.managers import GroupConcat
+
+    result = Cast('result', output_field=TextField())
+    if settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
+        aggregate = GroupConcat(result, output_field=TextField())
+    else:
+        aggregate = StringAgg(result, delimiter=', ', distinct=True)
+
+    results = model.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(text=aggregate)
+    return Coalesce(Subquery(results.values('text')), Value(''), output_field=TextField())
+
+
+def update_results_projection(task_ids: Iterable[int], create: bool = True) -> int:
+    """Recalculate results projection for tasks
+
+    :param task_ids: Task IDs, they are processed in batches of settings.BATCH_SIZE
+    :param create: Create missing projections, otherwise only existing ones are updated
+    :return: Number of updated projections
+    """
+    from data_manager.models import TaskResultsProjection
+    from tasks.models import Annotation, Prediction, Task
+
+    if not results_projection_enabled():
+        return 0
+
+    task_ids = list(task_ids)
+    updated = 0
+    for i in range(0, len(task_ids), settings.BATCH_SIZE):
+        tasks = Task.objects.filter(id__in=task_ids[i : i + settings.BATCH_SIZE])
+        if not create:
+            tasks = tasks.filter(results_projection__isnull=False)
+        rows = tasks.values_list('id', _results_text(Annotation), _results_text(Prediction))
+        projections = [
+            TaskResultsProjection(task_id=task_id, annotations_results=annotations, predictions_results=predictions)
+            for task_id, annotations, predictions in rows
+        ]
+        TaskResultsProjection.objects.bulk_create(
+            projections,
+            update_conflicts=True,
+            unique_fields=['task'],
+            update_fields=['annotations_results', 'predictions_results', 'updated_at'],
+        )
+        updated += len(projections)
+    return updated
+
+
+def rebuild_results_projection(project_id: int) -> int:
+    """Recalculate results projection for all project tasks, e.g. after the projection has been enabled"""
+    from tasks.models import Task
+
+    task_ids = Task.objects.filter(project_id=project_id).order_by('id').values_list('id', flat=True)
+    updated = update_results_projection(task_ids)
+    logger.info(f'Results projection rebuilt for {updated} tasks of project {project_id}')
+    return updated
@@ -304,6 +304,32 @@ class TestPreparedTaskManagerBehavior(TestCase):
                 "Field 'predictions_results' should not be processed (not in fields_for_evaluation)",
             )
 
+    def test_annotate_queryset_with_project_skips_first_task_probe(self):
+        """Test annotate_queryset doesn't query the first task when project is passed.
+
+        This test validates step by step:
+        - Passing project explicitly to annotate_queryset
+        - Verifying queryset.first() is not called
+        - Ensuring annotation functions get the project from queryset
+
+        Critical validation: Annotations are composed lazily without extra queries.
+        """
+        from data_manager.managers import PreparedTaskManager
+
+        mock_queryset = Mock()
+        project = Mock()
+        projects = []
+
+        def annotation_function(queryset):
+            projects.append(queryset.project)
+            return queryset
+
+        with patch('data_manager.managers.get_annotations_map', return_value={'completed_at': annotation_function}):
+            PreparedTaskManager().annotate_queryset(queryset=mock_queryset, all_fields=True, project=project)
+
+        mock_queryset.first.assert_not_called()
+        self.assertEqual(projects, [project])
+
 
 class TestGetQuerysetParameterPassing(TestCase):
     """Test that get_queryset properly passes excluded_fields_for_evaluation parameter.
@@ -1,7 +1,10 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 import base64
+import collections
 import concurrent.futures
+import contextlib
+import functools
 import itertools
 import json
 import logging
@@ -10,18 +13,22 @@ import sys
 import traceback as tb
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Any, Iterator, Union
 from urllib.parse import urljoin
 
 import django_rq
 import rq
 import rq.exceptions
-from core.feature_flags import flag_set
+from core.current_request import get_current_request
+from core.feature_flags import flag_set, flags_snapshot
 from core.redis import is_job_in_queue, is_job_on_worker, redis_connected
 from core.utils.common import load_func
+from core.utils.db import fast_first
 from core.utils.iterators import iterate_queryset
 from data_export.serializers import ExportDataSerializer
+from data_manager.counts import invalidate_task_counts
+from data_manager.results_projection import update_results_projection
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.db import models, transaction
@@ -31,9 +38,10 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_rq import job
 from io_storages.utils import StorageObject, get_uri_via_regex, parse_bucket_uri
+from projects.functions.project_counters import mark_project_counters_stale
 from rest_framework.exceptions import ValidationError
 from rq.job import Job
-from tasks.models import Annotation, Task
+from tasks.models import Annotation, Prediction, Task, bulk_update_stats_project_tasks
 from tasks.serializers import AnnotationSerializer, PredictionSerializer
 from webhooks.models import WebhookAction
 from webhooks.utils import emit_webhooks_for_instance
@@ -75,6 +83,12 @@ class StorageInfo(models.Model):
     )
     traceback = models.TextField(null=True, blank=True, help_text='Traceback report for the last failed sync')
     meta = JSONField('meta', null=True, default=dict, help_text='Meta and debug information about storage processes')
+    sync_watermark = JSONField(
+        'sync watermark',
+        null=True,
+        default=dict,
+        help_text='Max last modified time of synced objects and time of the last full sync, used by incremental sync',
+    )
 
     def info_set_job(self, job_id):
         self.last_sync_job = job_id
@@ -205,6 +219,15 @@ class StorageInfo(models.Model):
         self.meta['duration'] = (time_failure - self.time_in_progress).total_seconds()
         self.save(update_fields=['status', 'traceback', 'meta'])
 
+    def info_set_sync_watermark(self, last_modified, full_sync):
+        watermark = dict(self.sync_watermark or {})
+        if last_modified is not None:
+            watermark['last_modified'] = last_modified.isoformat()
+        if full_sync:
+            watermark['time_full_sync'] = str(timezone.now())
+        self.sync_watermark = watermark
+        self.save(update_fields=['sync_watermark'])
+
     def info_update_progress(self, last_sync_count, **kwargs):
         # update db counter once per 5 seconds to avid db overloads
         now = timezone.now()
@@ -310,6 +333,9 @@ class Storage(StorageInfo):
 
 
 class ImportStorage(Storage):
+    # object metadata provides modification time, so STORAGE_INCREMENTAL_SYNC can skip unchanged objects
+    supports_incremental_sync = True
+
     def iter_objects(self) -> Iterator[Any]:
         """
         Returns:
@@ -444,8 +470,9 @@ class ImportStorage(Storage):
 
         raise NotImplementedError
 
-    @classmethod
-    def add_task(cls, project, maximum_annotations, max_inner_id, storage, link_object: StorageObject, link_class):
+    @staticmethod
+    def _extract_task_data(link_object: StorageObject):
+        """Split storage object into link kwargs, task data, predictions and annotations"""
         link_kwargs = asdict(link_object)
         data = link_kwargs.pop('task_data', None)
 
@@ -459,13 +486,11 @@ class ImportStorage(Storage):
 
         # annotations
         annotations = data.get('annotations') or []
-        cancelled_annotations = 0
         if annotations:
             if 'data' not in data:
                 raise ValueError(
                     'If you use "annotations" field in the task, ' 'you must put "data" field in the task too'
                 )
-            cancelled_annotations = len([a for a in annotations if a.get('was_cancelled', False)])
 
         if 'data' in data and isinstance(data['data'], dict):
             if data['data'] is not None:
@@ -473,6 +498,13 @@ class ImportStorage(Storage):
             else:
                 data.pop('data')
 
+        return link_kwargs, data, predictions, annotations
+
+    @classmethod
+    def add_task(cls, project, maximum_annotations, max_inner_id, storage, link_object: StorageObject, link_class):
+        link_kwargs, data, predictions, annotations = cls._extract_task_data(link_object)
+        cancelled_annotations = len([a for a in annotations if a.get('was_cancelled', False)])
+
         with transaction.atomic():
             task = Task.objects.create(
                 data=data,
@@ -525,6 +557,260 @@ class ImportStorage(Storage):
         return task
         # FIXME: add_annotation_history / post_process_annotations should be here
 
+    @staticmethod
+    def _build_predictions(project, predictions) -> list[Prediction]:
+        """Validate predictions of one task with PredictionSerializer and build unsaved Prediction objects
+        (task is set later)
+
+        :raise ValidationError: if any of predictions is invalid
+        """
+        if not predictions:
+            return []
+        predictions = [
+            {**{k: v for k, v in p.items() if k != 'task'}, 'project': project.id} if isinstance(p, dict) else p
+            for p in predictions
+        ]
+        prediction_ser = PredictionSerializer(data=predictions, many=True)
+        # task is not created yet, so the relation to task is the only field that isn't required
+        prediction_ser.child.fields['task'].required = False
+        if not prediction_ser.is_valid():
+            raise ValidationError(prediction_ser.errors)
+
+        db_predictions = []
+        for item in prediction_ser.validated_data:
+            prediction = Prediction(**item)
+            # we need to call result normalizer here since "bulk_create" doesn't call save() method
+            prediction.result = Prediction.prepare_prediction_result(prediction.result, project)
+            db_predictions.append(prediction)
+        return db_predictions
+
+    @staticmethod
+    def _build_annotations(project, annotations) -> list[Annotation]:
+        """Validate annotations of one task and build unsaved Annotation objects (task is set later)
+
+        :raise ValidationError: if any of annotations is invalid
+        """
+        if not annotations:
+            return []
+        annotations = [
+            {**{k: v for k, v in a.items() if k != 'task'}, 'project': project.id} if isinstance(a, dict) else a
+            for a in annotations
+        ]
+        annotation_ser = AnnotationSerializer(data=annotations, many=True)
+        # task is not created yet, so the relation to task is the only field that isn't required
+        annotation_ser.child.fields['task'].required = False
+        if not annotation_ser.is_valid():
+            raise ValidationError(annotation_ser.errors)
+
+        # result_count and updated_by are set in save(), which is not called by "bulk_create"
+        request = get_current_request()
+        db_annotations = []
+        for item in annotation_ser.validated_data:
+            annotation = Annotation(**item)
+            annotation.result_count = len({r.get('id') for r in (annotation.result or [])})
+            if request:
+                annotation.updated_by = request.user
+            db_annotations.append(annotation)
+        return db_annotations
+
+    @classmethod
+    def add_tasks(
+        cls, project, maximum_annotations, max_inner_id, storage, link_objects: list[StorageObject], link_class
+    ) -> tuple[list[Task], list[str]]:
+        """Batched version of add_task: create tasks, storage links, predictions and annotations with bulk_create
+
+        Every storage object is validated with the same rules as in add_task. Objects failing validation
+        are skipped and reported, the rest of the batch is created and inner_id is kept sequential.
+
+        :return: list of created tasks and list of validation error messages
+        """
+        raise_exception = not flag_set(
+            'ff_fix_back_dev_3342_storage_scan_with_invalid_annotations', user=AnonymousUser()
+        )
+        raise_prediction_exception = (
+            flag_set('fflag_feat_utc_210_prediction_validation_15082025', user=project.organization.created_by)
+            or raise_exception
+        )
+
+        db_tasks, db_links, validation_errors = [], [], []
+        task_predictions, task_annotations = [], []
+        for link_object in link_objects:
+            link_kwargs, data, predictions, annotations = cls._extract_task_data(link_object)
+
+            try:
+                db_predictions = cls._build_predictions(project, predictions)
+            except ValidationError as e:
+                if raise_prediction_exception:
+                    validation_errors.append(f'Validation error for task from {link_object.key}: {e}')
+                    continue
+                logger.error(f'Invalid predictions for task from {link_object.key}: {e}')
+                db_predictions = []
+
+            try:
+                db_annotations = cls._build_annotations(project, annotations)
+            except ValidationError as e:
+                # Log validation errors but don't save invalid annotations
+                logger.error(f'Invalid annotations for task from {link_object.key}: {e}')
+                if raise_exception:
+                    validation_errors.append(f'Validation error for task from {link_object.key}: {e}')
+                    continue
+                db_annotations = []
+
+            cancelled_annotations = len([a for a in db_annotations if a.was_cancelled])
+            db_tasks.append(
+                Task(
+                    data=data,
+                    project=project,
+                    overlap=maximum_annotations,
+                    is_labeled=len(db_annotations) >= maximum_annotations,
+                    total_predictions=len(db_predictions),
+                    total_annotations=len(db_annotations) - cancelled_annotations,
+                    cancelled_annotations=cancelled_annotations,
+                    inner_id=max_inner_id + len(db_tasks),
+                )
+            )
+            db_links.append(link_class(storage=storage, object_exists=True, **link_kwargs))
+            task_predictions.append(db_predictions)
+            task_annotations.append(db_annotations)
+
+        if not db_tasks:
+            return [], validation_errors
+
+        with transaction.atomic():
+            # get task ids
+            if settings.DJANGO_DB == settings.DJANGO_DB_SQLITE:
+                last_task = fast_first(Task.objects.order_by('-id'))
+                current_id = last_task.id + 1 if last_task else 1
+                for task in db_tasks:
+                    task.id = current_id
+                    current_id += 1
+            db_tasks = Task.objects.bulk_create(db_tasks, batch_size=settings.BATCH_SIZE)
+
+            for task, link, predictions, annotations in zip(db_tasks, db_links, task_predictions, task_annotations):
+                link.task = task
+                for obj in itertools.chain(predictions, annotations):
+                    obj.task = task
+            link_class.objects.bulk_create(db_links, batch_size=settings.BATCH_SIZE)
+
+            db_predictions = list(itertools.chain.from_iterable(task_predictions))
+            Prediction.objects.bulk_create(db_predictions, batch_size=settings.BATCH_SIZE)
+
+            db_annotations = list(itertools.chain.from_iterable(task_annotations))
+            Annotation.objects.bulk_create(db_annotations, batch_size=settings.BATCH_SIZE)
+
+            logger.debug(
+                f'Create {len(db_tasks)} tasks with {len(db_predictions)} predictions '
+                f'and {len(db_annotations)} annotations for {storage.__class__.__name__} {storage.id}'
+            )
+
+            # bulk_create doesn't send signals, so update project summary and is_labeled explicitly
+            if hasattr(project, 'summary'):
+                project.summary.update_data_columns(db_tasks)
+                if db_annotations:
+                    project.summary.update_created_annotations_and_labels(db_annotations)
+            labeled_task_ids = [task.id for task, annotations in zip(db_tasks, task_annotations) if annotations]
+            if labeled_task_ids:
+                bulk_update_stats_project_tasks(Task.objects.filter(id__in=labeled_task_ids), project=project)
+            result_task_ids = [
+                task.id
+                for task, predictions, annotations in zip(db_tasks, task_predictions, task_annotations)
+                if predictions or annotations
+            ]
+            if result_task_ids:
+                update_results_projection(result_task_ids)
+            # post_save receivers of tasks, annotations and predictions
+            invalidate_task_counts(project.id)
+            mark_project_counters_stale(project.id)
+
+        # new annotations don't have drafts yet, so only ML backend training is left from annotation post_save
+        cls._start_ml_training(project, db_annotations)
+        return db_tasks, validation_errors
+
+    @staticmethod
+    def _start_ml_training(project, db_annotations):
+        """Train ML backends when created annotations reach the next min_annotations_to_start_training step,
+        like update_ml_backend receiver does for every saved annotation
+        """
+        step = project.min_annotations_to_start_training
+        created = len([annotation for annotation in db_annotations if not annotation.ground_truth])
+        if not step or not created:
+            return
+        annotation_count = Annotation.objects.filter(project=project).count()
+        if annotation_count // step > (annotation_count - created) // step:
+            for ml_backend in project.ml_backends.all():
+                ml_backend.train()
+
+    def incremental_sync_enabled(self) -> bool:
+        return settings.STORAGE_INCREMENTAL_SYNC and self.supports_incremental_sync
+
+    def is_incremental_sync(self) -> bool:
+        """Incremental sync is possible when the previous sync left a watermark
+        and the last full sync (reconcile) is not older than STORAGE_FULL_SYNC_INTERVAL
+        """
+        watermark = self.sync_watermark or {}
+        if not self.incremental_sync_enabled() or not watermark.get('last_modified'):
+            return False
+        if not watermark.get('time_full_sync'):
+            return False
+        time_full_sync = datetime.fromisoformat(watermark['time_full_sync'])
+        return timezone.now() - time_full_sync < timedelta(seconds=settings.STORAGE_FULL_SYNC_INTERVAL)
+
+    def iter_sync_keys(self, incremental: bool, watermark: dict) -> Iterator[str]:
+        """Iterate keys to sync, skipping objects not modified since the watermark in incremental mode.
+        S3, GCS and Azure list APIs can't filter by modification time, so the whole prefix is still listed,
+        incremental mode saves only reading and linking of unchanged objects.
+
+        :param incremental: list only objects modified after the stored watermark
+        :param watermark: dict to collect max 'last_modified' of listed objects into
+        """
+        # storages without modification time are listed in full without fetching metadata
+        if not self.incremental_sync_enabled():
+            yield from self.iter_keys()
+            return
+
+        since = datetime.fromisoformat(self.sync_watermark['last_modified']) if incremental else None
+        for obj in self.iter_objects():
+            metadata = self.get_unified_metadata(obj)
+            last_modified = metadata.get('last_modified')
+            # objects without modification time are always listed
+            if isinstance(last_modified, datetime):
+                if watermark.get('last_modified') is None or last_modified > watermark['last_modified']:
+                    watermark['last_modified'] = last_modified
+                # objects with the same time as the watermark are listed again, existing links skip them
+                if since and last_modified < since:
+                    continue
+            yield metadata['key']
+
+    @staticmethod
+    def iter_keys_in_pages(keys, page_size) -> Iterator[list]:
+        """Group keys into lists of page_size keys"""
+        keys = iter(keys)
+        while page := list(itertools.islice(keys, page_size)):
+            yield page
+
+    def iter_data_prefetched(self, executor, keys, prefetch_size) -> Iterator[tuple]:
+        """Submit get_data(key) to executor ahead of the consumer
+
+        :param executor: concurrent.futures executor, objects are fetched serially when it's None
+        :param keys: keys iterator
+        :param prefetch_size: max number of objects fetched ahead
+        :return: (key, fetch) tuples in the same order as keys, fetch() returns get_data(key) result
+        """
+        if executor is None:
+            for key in keys:
+                yield key, functools.partial(self.get_data, key)
+            return
+
+        futures = collections.deque()
+        for key in keys:
+            futures.append((key, executor.submit(self.get_data, key)))
+            if len(futures) >= prefetch_size:
+                key, future = futures.popleft()
+                yield key, future.result
+        while futures:
+            key, future = futures.popleft()
+            yield key, future.result
+
     def _scan_and_create_links(self, link_class):
         """
         TODO: deprecate this function and transform it to "pipeline" version  _scan_and_create_links_v2,
@@ -544,99 +830,134 @@ class ImportStorage(Storage):
             'fflag_fix_back_plt_804_check_file_extension_11072025_short', user=self.project.organization.created_by
         )
 
+        # storage objects are accumulated and written with add_tasks in batches
+        batch_size = min(settings.STORAGE_IMPORT_BATCH_SIZE, self.project.get_task_batch_size())
+        pending_link_objects = []
         tasks_for_webhook = []
-        for key in self.iter_keys():
-            # w/o Dataflow
-            # pubsub.push(topic, key)
-            # -> GF.pull(topic, key) + env -> add_task()
-            logger.debug(f'Scanning key {key}')
-            self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
 
-            # skip if key has already been synced
-            if n_tasks_linked := link_class.n_tasks_linked(key, self):
-                logger.debug(f'{self.__class__.__name__} already has {n_tasks_linked} tasks linked to {key=}')
-                tasks_existed += n_tasks_linked  # update progress counter
-                continue
-
-            logger.debug(f'{self}: found new key {key}')
-
-            # Check if file should be processed as JSON based on extension
-            # Skip non-JSON files if use_blob_urls is False
-            if check_file_extension and not self.use_blob_urls:
-                _, ext = os.path.splitext(key.lower())
-                # Only process files with JSON/JSONL/PARQUET extensions
-                json_extensions = {'.json', '.jsonl', '.parquet'}
-
-                if ext and ext not in json_extensions:
-                    raise UnsupportedFileFormatError(
-                        f'File "{key}" is not a JSON/JSONL/Parquet file. Only .json, .jsonl, and .parquet files can be processed.\n'
-                        f"If you're trying to import non-JSON data (images, audio, text, etc.), "
-                        f'edit storage settings and enable "Tasks" import method'
-                    )
+        def flush_pending_link_objects():
+            nonlocal max_inner_id, tasks_created, tasks_for_webhook
+            if not pending_link_objects:
+                return
 
-            try:
-                link_objects = self.get_data(key)
-            except (UnicodeDecodeError, json.decoder.JSONDecodeError) as exc:
-                logger.debug(exc, exc_info=True)
-                raise ValueError(
-                    f'Error loading JSON from file "{key}".\nIf you\'re trying to import non-JSON data '
-                    f'(images, audio, text, etc.), edit storage settings and enable '
-                    f'"Tasks" import method'
-                )
+            link_objects = list(pending_link_objects)
+            pending_link_objects.clear()
+            tasks, errors = self.add_tasks(
+                self.project, maximum_annotations, max_inner_id, self, link_objects, link_class=link_class
+            )
+            for error_message in errors:
+                # Log validation errors but continue processing other tasks
+                logger.error(error_message)
+            validation_errors.extend(errors)
+
+            # update progress counters for storage info
+            max_inner_id += len(tasks)
+            tasks_created += len(tasks)
+            self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
 
-            for link_object in link_objects:
-                # TODO: batch this loop body with add_task -> add_tasks in a single bulk write.
-                # See DIA-2062 for prerequisites
-                try:
-                    task = self.add_task(
-                        self.project,
-                        maximum_annotations,
-                        max_inner_id,
-                        self,
-                        link_object,
-                        link_class=link_class,
-                    )
-                    max_inner_id += 1
-
-                    # update progress counters for storage info
-                    tasks_created += 1
-
-                    # add task to webhook list
-                    tasks_for_webhook.append(task.id)
-                except ValidationError as e:
-                    # Log validation errors but continue processing other tasks
-                    error_message = f'Validation error for task from {link_object.key}: {e}'
-                    logger.error(error_message)
-                    validation_errors.append(error_message)
-                    continue
+            # settings.WEBHOOK_BATCH_SIZE
+            # `WEBHOOK_BATCH_SIZE` sets the maximum number of tasks sent in a single webhook call, ensuring manageable payload sizes.
+            # When `tasks_for_webhook` accumulates tasks equal to/exceeding `WEBHOOK_BATCH_SIZE`, they're sent in a webhook via
+            # `emit_webhooks_for_instance`, and `tasks_for_webhook` is cleared for new tasks.
+            # If tasks remain in `tasks_for_webhook` at process end (less than `WEBHOOK_BATCH_SIZE`), they're sent in a final webhook
+            # call to ensure all tasks are processed and no task is left unreported in the webhook.
+            tasks_for_webhook += [task.id for task in tasks]
+            while len(tasks_for_webhook) >= settings.WEBHOOK_BATCH_SIZE:
+                emit_webhooks_for_instance(
+                    self.project.organization,
+                    self.project,
+                    WebhookAction.TASKS_CREATED,
+                    tasks_for_webhook[: settings.WEBHOOK_BATCH_SIZE],
+                )
+                tasks_for_webhook = tasks_for_webhook[settings.WEBHOOK_BATCH_SIZE :]
+
+        # incremental sync lists only objects modified since the previous sync
+        incremental = self.is_incremental_sync()
+        watermark = {}
+        sync_keys = self.iter_sync_keys(incremental, watermark)
+
+        def iter_new_keys():
+            nonlocal tasks_existed
+            # resolve already synced keys for a whole page of keys with one query instead of one query per key
+            for keys in self.iter_keys_in_pages(sync_keys, settings.STORAGE_SCAN_KEYS_PAGE_SIZE):
+                linked_keys = link_class.n_tasks_linked_by_keys(keys, self)
+                for key in keys:
+                    # w/o Dataflow
+                    # pubsub.push(topic, key)
+                    # -> GF.pull(topic, key) + env -> add_task()
+                    logger.debug(f'Scanning key {key}')
+                    self.info_update_progress(last_sync_count=tasks_created, tasks_existed=tasks_existed)
+
+                    # skip if key has already been synced
+                    if n_tasks_linked := linked_keys.get(key, 0):
+                        logger.debug(f'{self.__class__.__name__} already has {n_tasks_linked} tasks linked to {key=}')
+                        tasks_existed += n_tasks_linked  # update progress counter
+                        continue
+
+                    logger.debug(f'{self}: found new key {key}')
+
+                    # Check if file should be processed as JSON based on extension
+                    # Skip non-JSON files if use_blob_urls is False
+                    if check_file_extension and not self.use_blob_urls:
+                        _, ext = os.path.splitext(key.lower())
+                        # Only process files with JSON/JSONL/PARQUET extensions
+                        json_extensions = {'.json', '.jsonl', '.parquet'}
+
+                        if ext and ext not in json_extensions:
+                            raise UnsupportedFileFormatError(
+                                f'File "{key}" is not a JSON/JSONL/Parquet file. Only .json, .jsonl, and .parquet files can be processed.\n'
+                                f"If you're trying to import non-JSON data (images, audio, text, etc.), "
+                                f'edit storage settings and enable "Tasks" import method'
+                            )
+
+                    yield key
+
+        # with several fetch workers objects are fetched and parsed in threads ahead of writing, but results are
+        # consumed in key order, so inner_id and progress reporting stay the same as with serial fetching
+        workers = settings.STORAGE_IMPORT_FETCH_WORKERS
+        try:
+            with ThreadPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext() as executor:
+                for key, fetch in self.iter_data_prefetched(executor, iter_new_keys(), workers):
+                    try:
+                        link_objects = fetch()
+                    except (UnicodeDecodeError, json.decoder.JSONDecodeError) as exc:
+                        logger.debug(exc, exc_info=True)
+                        raise ValueError(
+                            f'Error loading JSON from file "{key}".\nIf you\'re trying to import non-JSON data '
+                            f'(images, audio, text, etc.), edit storage settings and enable '
+                            f'"Tasks" import method'
+                        )
 
-                # settings.WEBHOOK_BATCH_SIZE
-                # `WEBHOOK_BATCH_SIZE` sets the maximum number of tasks sent in a single webhook call, ensuring manageable payload sizes.
-                # When `tasks_for_webhook` accumulates tasks equal to/exceeding `WEBHOOK_BATCH_SIZE`, they're sent in a webhook via
-                # `emit_webhooks_for_instance`, and `tasks_for_webhook` is cleared for new tasks.
-                # If tasks remain in `tasks_for_webhook` at process end (less than `WEBHOOK_BATCH_SIZE`), they're sent in a final webhook
-                # call to ensure all tasks are processed and no task is left unreported in the webhook.
-                if len(tasks_for_webhook) >= settings.WEBHOOK_BATCH_SIZE:
-                    emit_webhooks_for_instance(
-                        self.project.organization, self.project, WebhookAction.TASKS_CREATED, tasks_for_webhook
-                    )
-                    tasks_for_webhook = []
-        if tasks_for_webhook:
-            emit_webhooks_for_instance(
-                self.project.organization, self.project, WebhookAction.TASKS_CREATED, tasks_for_webhook
-            )
+                    pending_link_objects.extend(link_objects)
+                    if len(pending_link_objects) >= batch_size:
+                        flush_pending_link_objects()
+        finally:
+            # objects parsed before an error are still created, as they were when every object was added one by one
+            flush_pending_link_objects()
+            if tasks_for_webhook:
+                emit_webhooks_for_instance(
+                    self.project.organization, self.project, WebhookAction.TASKS_CREATED, tasks_for_webhook
+                )
 
         self.project.update_tasks_states(
             maximum_annotations_changed=False, overlap_cohort_percentage_changed=False, tasks_number_changed=True
         )
+        if settings.STORAGE_INCREMENTAL_SYNC:
+            self.info_set_sync_watermark(watermark.get('last_modified'), full_sync=not incremental)
+
         if validation_errors:
             # sync is finished, set completed with errors status for storage info
             self.info_set_completed_with_errors(
-                last_sync_count=tasks_created, tasks_existed=tasks_existed, validation_errors=validation_errors
+                last_sync_count=tasks_created,
+                tasks_existed=tasks_existed,
+                validation_errors=validation_errors,
+                incremental_sync=incremental,
             )
         else:
             # sync is finished, set completed status for storage info
-            self.info_set_completed(last_sync_count=tasks_created, tasks_existed=tasks_existed)
+            self.info_set_completed(
+                last_sync_count=tasks_created, tasks_existed=tasks_existed, incremental_sync=incremental
+            )
 
     def scan_and_create_links(self):
         """This is proto method - you can override it, or just replace ImportStorageLink by your own model"""
@@ -697,6 +1018,7 @@ class ProjectStorageMixin(models.Model):
 
 
 @job('low')
+@flags_snapshot()
 def import_sync_background(storage_class, storage_id, timeout=settings.RQ_LONG_JOB_TIMEOUT, **kwargs):
     storage = storage_class.objects.get(id=storage_id)
     try:
@@ -710,12 +1032,14 @@ def import_sync_background(storage_class, storage_id, timeout=settings.RQ_LONG_J
 
 
 @job('low', timeout=settings.RQ_LONG_JOB_TIMEOUT)
+@flags_snapshot()
 def export_sync_background(storage_class, storage_id, **kwargs):
     storage = storage_class.objects.get(id=storage_id)
     storage.save_all_annotations()
 
 
 @job('low', timeout=settings.RQ_LONG_JOB_TIMEOUT)
+@flags_snapshot()
 def export_sync_only_new_background(storage_class, storage_id, **kwargs):
     storage = storage_class.objects.get(id=storage_id)
     storage.save_only_new_annotations()
@@ -883,6 +1207,17 @@ class ImportStorageLink(models.Model):
     def n_tasks_linked(cls, key, storage):
         return cls.objects.filter(key=key, storage=storage.id).count()
 
+    @classmethod
+    def n_tasks_linked_by_keys(cls, keys, storage) -> dict[str, int]:
+        """Count linked tasks for multiple keys at once, keys without links are omitted"""
+        counts = (
+            cls.objects.filter(key__in=keys, storage=storage.id)
+            .values('key')
+            .annotate(n_tasks=models.Count('id'))
+            .values_list('key', 'n_tasks')
+        )
+        return dict(counts)
+
     @classmethod
     def create(cls, task, key, storage, row_index=None, row_group=None):
         link, created = cls.objects.get_or_create(
@@ -0,0 +1,113 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("io_storages", "0020_alter_azureblobexportstorage_status_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="azureblobexportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="azureblobimportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="gcsexportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="gcsimportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="localfilesexportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="localfilesimportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="redisexportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="redisimportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="s3exportstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+        migrations.AddField(
+            model_name="s3importstorage",
+            name="sync_watermark",
+            field=models.JSONField(
+                default=dict,
+                help_text="Max last modified time of synced objects and time of the last full sync, used by incremental sync",
+                null=True,
+                verbose_name="sync watermark",
+            ),
+        ),
+    ]
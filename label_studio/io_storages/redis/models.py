@@ -79,6 +79,9 @@ class RedisStorageMixin(models.Model):
 
 
 class RedisImportStorageBase(ImportStorage, RedisStorageMixin):
+    # redis keys have no modification time
+    supports_incremental_sync = False
+
     db = models.PositiveSmallIntegerField(_('db'), default=1, help_text='Server Database')
 
     def can_resolve_url(self, url):
@@ -218,6 +218,10 @@ class S3ImportStorageBase(S3StorageMixin, ImportStorage):
         for obj in self.iter_objects():
             yield obj.key
 
+    @catch_and_reraise_from_none
+    def iter_sync_keys(self, incremental, watermark):
+        yield from super().iter_sync_keys(incremental, watermark)
+
     def get_unified_metadata(self, obj):
         return {
             'key': obj.key,
@@ -237,10 +241,10 @@ class S3ImportStorageBase(S3StorageMixin, ImportStorage):
             task = {data_key: uri}
             return [StorageObject(key=key, task_data=task)]
 
-        # read task json from bucket and validate it
-        _, s3 = self.get_client_and_resource()
-        bucket = s3.Bucket(self.bucket)
-        obj = s3.Object(bucket.name, key).get()['Body'].read()
+        # read task json from bucket and validate it,
+        # low-level client is used because it's thread-safe unlike resources and it can be shared by fetch workers
+        client = self.get_client()
+        obj = client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
         return load_tasks_json(obj, key)
 
     @catch_and_reraise_from_none
@@ -2,6 +2,7 @@
 """
 import base64
 import fnmatch
+import inspect
 import logging
 import re
 from urllib.parse import urlparse
@@ -151,21 +152,37 @@ def catch_and_reraise_from_none(func):
     """
     For S3 storages - if s3_endpoint is not on a known domain, catch exception and
     raise a new one with the previous context suppressed. See also: https://peps.python.org/pep-0409/
+    Generator functions are wrapped too, exceptions raised during the iteration are caught.
     """
 
+    def reraise(self, e):
+        if self.s3_endpoint and (
+            domain := extractor.extract_urllib(urlparse(self.s3_endpoint)).registered_domain.lower()
+        ) not in [trusted_domain.lower() for trusted_domain in settings.S3_TRUSTED_STORAGE_DOMAINS]:
+            logger.error(f'Exception from unrecognized S3 domain: {e}', exc_info=True)
+            raise S3StorageError(
+                f'Debugging info is not available for s3 endpoints on domain: {domain}. '
+                'Please contact your Label Studio devops team if you require detailed error reporting for this domain.'
+            ) from None
+        else:
+            raise e
+
+    if inspect.isgeneratorfunction(func):
+
+        def generator_wrapper(self, *args, **kwargs):
+            try:
+                yield from func(self, *args, **kwargs)
+            except S3StorageError:
+                raise
+            except Exception as e:
+                reraise(self, e)
+
+        return generator_wrapper
+
     def wrapper(self, *args, **kwargs):
         try:
             return func(self, *args, **kwargs)
         except Exception as e:
-            if self.s3_endpoint and (
-                domain := extractor.extract_urllib(urlparse(self.s3_endpoint)).registered_domain.lower()
-            ) not in [trusted_domain.lower() for trusted_domain in settings.S3_TRUSTED_STORAGE_DOMAINS]:
-                logger.error(f'Exception from unrecognized S3 domain: {e}', exc_info=True)
-                raise S3StorageError(
-                    f'Debugging info is not available for s3 endpoints on domain: {domain}. '
-                    'Please contact your Label Studio devops team if you require detailed error reporting for this domain.'
-                ) from None
-            else:
-                raise e
+            reraise(self, e)
 
     return wrapper
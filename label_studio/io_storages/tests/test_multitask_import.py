@@ -1,10 +1,14 @@
 import json
+import threading
 
 import boto3
 import mock
 import pytest
+from django.test import override_settings
+from freezegun import freeze_time
 from io_storages.models import S3ImportStorage
 from io_storages.s3.models import S3ImportStorageLink
+from io_storages.s3.utils import S3StorageError
 from io_storages.tests.factories import (
     AzureBlobImportStorageFactory,
     GCSImportStorageFactory,
@@ -15,6 +19,7 @@ from io_storages.utils import StorageObject, load_tasks_json
 from moto import mock_s3
 from projects.tests.factories import ProjectFactory
 from rest_framework.test import APIClient
+from tests.conftest import set_feature_flag_envvar  # noqa: F401
 from tests.utils import azure_client_mock, gcs_client_mock, mock_feature_flag, redis_client_mock
 
 
@@ -181,6 +186,127 @@ def test_storagelink_fields(project, common_task_data):
         assert storage_links[1].row_group is None
 
 
+def test_sync_prefetch_keeps_key_order(project):
+    with mock_s3():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        bucket_name = 'pytest-s3-jsons'
+        s3.create_bucket(Bucket=bucket_name)
+        for i in range(6):
+            s3.put_object(Bucket=bucket_name, Key=f'{i}.json', Body=json.dumps([{'data': {'text': str(i)}}]))
+
+        storage = S3ImportStorage(
+            project=project,
+            bucket=bucket_name,
+            aws_access_key_id='example',
+            aws_secret_access_key='example',
+            use_blob_urls=False,
+        )
+        storage.save()
+
+        # every key waits until the next one is fetched, so fetching finishes in the reversed order
+        get_data = S3ImportStorage.get_data
+        fetched = [threading.Event() for _ in range(7)]
+        fetched[6].set()
+        fetch_order = []
+
+        def chained_get_data(self, key):
+            i = int(key[0])
+            assert fetched[i + 1].wait(timeout=10)
+            result = get_data(self, key)
+            fetch_order.append(i)
+            fetched[i].set()
+            return result
+
+        with override_settings(STORAGE_IMPORT_FETCH_WORKERS=6), mock.patch.object(
+            S3ImportStorage, 'get_data', chained_get_data
+        ):
+            storage.sync()
+
+        assert fetch_order == [5, 4, 3, 2, 1, 0]
+        tasks = project.tasks.order_by('inner_id')
+        assert [task.data['text'] for task in tasks] == [str(i) for i in range(6)]
+        assert [task.inner_id for task in tasks] == list(range(1, 7))
+
+
+@override_settings(STORAGE_INCREMENTAL_SYNC=True)
+def test_incremental_sync_s3(project, common_task_data):
+    with mock_s3():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        bucket_name = 'pytest-s3-jsons'
+        s3.create_bucket(Bucket=bucket_name)
+        storage = S3ImportStorage(
+            project=project,
+            bucket=bucket_name,
+            aws_access_key_id='example',
+            aws_secret_access_key='example',
+            use_blob_urls=False,
+        )
+        storage.save()
+
+        # the first sync is full and stores the watermark
+        with freeze_time('2025-01-01 08:00:00'):
+            s3.put_object(Bucket=bucket_name, Key='old.json', Body=json.dumps(common_task_data))
+        with freeze_time('2025-01-01 09:00:00'):
+            s3.put_object(Bucket=bucket_name, Key='latest.json', Body=json.dumps(common_task_data[:1]))
+        with freeze_time('2025-01-01 10:00:00'):
+            storage.sync()
+        storage.refresh_from_db()
+        assert storage.meta['incremental_sync'] is False
+        assert storage.sync_watermark['last_modified'] == '2025-01-01T09:00:00+00:00'
+        assert project.tasks.count() == 3
+
+        # the next sync lists only objects modified since the watermark
+        with freeze_time('2025-01-01 11:00:00'):
+            s3.put_object(Bucket=bucket_name, Key='new.json', Body=json.dumps(common_task_data[:1]))
+        with freeze_time('2025-01-01 12:00:00'):
+            storage.sync()
+        storage.refresh_from_db()
+        assert storage.meta['incremental_sync'] is True
+        # old.json isn't listed, latest.json has the same time as the watermark and is checked again
+        assert storage.meta['tasks_existed'] == 1
+        assert storage.last_sync_count == 1
+        assert storage.sync_watermark['last_modified'] == '2025-01-01T11:00:00+00:00'
+        assert project.tasks.count() == 4
+
+        # full sync is done again when STORAGE_FULL_SYNC_INTERVAL has passed
+        with freeze_time('2025-01-03 11:00:00'):
+            storage.sync()
+        storage.refresh_from_db()
+        assert storage.meta['incremental_sync'] is False
+        assert storage.meta['tasks_existed'] == 4
+        assert project.tasks.count() == 4
+
+
+@override_settings(STORAGE_INCREMENTAL_SYNC=True, S3_TRUSTED_STORAGE_DOMAINS=['amazonaws.com'])
+def test_incremental_sync_s3_hides_untrusted_errors(project):
+    storage = S3ImportStorage(project=project, bucket='pytest-s3-jsons', s3_endpoint='http://untrusted-domain.com')
+    with mock.patch.object(S3ImportStorage, 'get_client_and_bucket', side_effect=Exception('Original Exception')):
+        with pytest.raises(S3StorageError, match='Debugging info is not available'):
+            list(storage.iter_sync_keys(incremental=False, watermark={}))
+
+
+@override_settings(STORAGE_INCREMENTAL_SYNC=True)
+def test_incremental_sync_redis(project, common_task_data):
+    with redis_client_mock() as redis:
+        redis.set('test.json', json.dumps(common_task_data))
+        storage = RedisImportStorageFactory(project=project, path='', use_blob_urls=False)
+
+        # redis keys have no modification time, so keys are listed without fetching metadata
+        with mock.patch.object(type(storage), 'get_unified_metadata') as get_unified_metadata:
+            storage.sync()
+            storage.refresh_from_db()
+            assert storage.meta['incremental_sync'] is False
+            assert project.tasks.count() == 2
+
+            redis.set('new.json', json.dumps(common_task_data[:1]))
+            storage.sync()
+            storage.refresh_from_db()
+            assert storage.meta['incremental_sync'] is False
+            assert storage.meta['tasks_existed'] == 2
+            assert project.tasks.count() == 3
+        get_unified_metadata.assert_not_called()
+
+
 #
 # Unit tests for load_tasks_json()
 #
@@ -265,6 +391,108 @@ annots_preds_task_list = [
 ]
 
 
+def test_add_tasks_batch(storage):
+    project, storage = storage
+    task_data = annots_preds_task_list + [
+        {'data': {'text': 'Broken annotation'}, 'annotations': [{'result': {'a': 1}}]}
+    ]
+    link_objects = [
+        StorageObject(key='test.json', task_data=json.loads(json.dumps(data)), row_index=i)
+        for i, data in enumerate(task_data)
+    ]
+
+    tasks, errors = S3ImportStorage.add_tasks(project, 1, 10, storage, link_objects, S3ImportStorageLink)
+
+    # invalid annotations are skipped, but the task itself is created
+    assert errors == []
+    assert [t.inner_id for t in tasks] == [10, 11, 12]
+    links = S3ImportStorageLink.objects.filter(storage=storage).order_by('row_index')
+    assert list(links.values_list('task_id', 'row_index')) == [(t.id, i) for i, t in enumerate(tasks)]
+    assert tasks[2].annotations.count() == 0
+    assert tasks[0].predictions.count() == 1
+    assert tasks[0].annotations.count() == 1
+    assert tasks[0].annotations.first().result_count == 1
+    tasks[0].refresh_from_db()
+    assert tasks[0].is_labeled
+    assert tasks[0].total_predictions == 1
+    assert tasks[0].total_annotations == 1
+    assert 'label' in project.summary.created_labels
+
+
+def test_add_tasks_batch_validates_predictions(storage, set_feature_flag_envvar):  # noqa: F811
+    project, storage = storage
+    invalid_prediction = json.loads(json.dumps(annots_preds_task_list[0]['predictions'][0]))
+    invalid_prediction['result'][0]['from_name'] = 'unknown'
+    task_data = [
+        {'data': {'text': 'Valid prediction'}, 'predictions': annots_preds_task_list[0]['predictions']},
+        {'data': {'text': 'Invalid prediction'}, 'predictions': [invalid_prediction]},
+    ]
+    link_objects = [
+        StorageObject(key='test.json', task_data=json.loads(json.dumps(data)), row_index=i)
+        for i, data in enumerate(task_data)
+    ]
+
+    # predictions are validated by PredictionSerializer, the same way as in add_task
+    tasks, errors = S3ImportStorage.add_tasks(project, 1, 1, storage, link_objects, S3ImportStorageLink)
+
+    assert len(tasks) == 1
+    assert tasks[0].predictions.count() == 1
+    assert len(errors) == 1 and 'Error validating prediction' in errors[0]
+
+    # the default label config doesn't skip validation
+    project.label_config = '<View></View>'
+    project.save()
+    tasks, errors = S3ImportStorage.add_tasks(project, 1, 2, storage, link_objects[:1], S3ImportStorageLink)
+    assert tasks == []
+    assert len(errors) == 1
+
+
+def test_add_tasks_batch_requires_result(storage, set_feature_flag_envvar):  # noqa: F811
+    project, storage = storage
+    prediction = json.loads(json.dumps(annots_preds_task_list[0]['predictions'][0]))
+    prediction.pop('result')
+    task_data = [
+        {'data': {'text': 'Prediction without result'}, 'predictions': [prediction]},
+        {'data': {'text': 'Valid prediction'}, 'predictions': annots_preds_task_list[0]['predictions']},
+    ]
+    link_objects = [
+        StorageObject(key='test.json', task_data=json.loads(json.dumps(data)), row_index=i)
+        for i, data in enumerate(task_data)
+    ]
+
+    # required fields are validated, only the relation to the task isn't required
+    tasks, errors = S3ImportStorage.add_tasks(project, 1, 1, storage, link_objects, S3ImportStorageLink)
+
+    assert len(errors) == 1 and 'result' in errors[0]
+    assert [task.data['text'] for task in tasks] == ['Valid prediction']
+
+
+def test_sync_creates_parsed_tasks_before_error(project):
+    with mock_s3():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        bucket_name = 'pytest-s3-jsons'
+        s3.create_bucket(Bucket=bucket_name)
+        s3.put_object(Bucket=bucket_name, Key='0.json', Body=json.dumps([{'data': {'text': '0'}}]))
+        s3.put_object(Bucket=bucket_name, Key='1.json', Body='{broken')
+
+        storage = S3ImportStorage(
+            project=project,
+            bucket=bucket_name,
+            aws_access_key_id='example',
+            aws_secret_access_key='example',
+            use_blob_urls=False,
+        )
+        storage.save()
+
+        storage.sync()
+
+        storage.refresh_from_db()
+        assert storage.status == storage.Status.FAILED
+        assert '1.json' in storage.traceback
+        # the task parsed before the broken file is not dropped with the pending batch
+        assert [task.data['text'] for task in project.tasks.all()] == ['0']
+
+
 def test_bare_task(storage):
     task_data = bare_task_list[0]
 
@@ -413,3 +641,17 @@ def test_list_jsonl_with_datetimes(storage):
     assert list(output) == expected_output
 
     create_tasks(storage, list(output))
+
+
+def test_n_tasks_linked_by_keys(storage):
+    project, storage = storage
+    link_objects = [
+        StorageObject(key='a.jsonl', task_data={'data': {'text': 'first'}}, row_index=0),
+        StorageObject(key='a.jsonl', task_data={'data': {'text': 'second'}}, row_index=1),
+        StorageObject(key='b.json', task_data={'data': {'text': 'third'}}),
+    ]
+    S3ImportStorage.add_tasks(project, 1, 1, storage, link_objects, S3ImportStorageLink)
+
+    linked = S3ImportStorageLink.n_tasks_linked_by_keys(['a.jsonl', 'b.json', 'c.json'], storage)
+    assert linked == {'a.jsonl': 2, 'b.json': 1}
+    assert linked['a.jsonl'] == S3ImportStorageLink.n_tasks_linked('a.jsonl', storage)
@@ -1,11 +1,12 @@
 import logging
 
 from core.permissions import ViewClassPermission, all_permissions
+from core.redis import start_job_async_or_sync
 from django.db.models import CharField, Count, Q
 from django.db.models.functions import Cast
 from django.utils.decorators import method_decorator
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiResponse, extend_schema
 from labels_manager.serializers import (
     LabelBulkUpdateSerializer,
     LabelCreateSerializer,
@@ -234,7 +235,29 @@ class LabelLinkAPI(viewsets.ModelViewSet):
         summary='Bulk update labels',
         description="""
         If you want to update the labels in saved annotations, use this endpoint.
+        When background workers are available, labels are updated in a background job
+        and `job_id` is returned instead of the number of updated labels.
         """,
+        responses={
+            200: OpenApiResponse(
+                description='Number of updated labels, or background job ID and null number of updated labels',
+                response={
+                    'type': 'object',
+                    'properties': {
+                        'annotations_updated': {
+                            'type': 'integer',
+                            'nullable': True,
+                            'description': 'Number of updated labels, null when labels are updated in a job',
+                        },
+                        'job_id': {
+                            'type': 'string',
+                            'description': 'ID of the background job, returned only when labels are updated in a job',
+                        },
+                    },
+                    'required': ['annotations_updated'],
+                },
+            )
+        },
         extensions={
             'x-fern-sdk-group-name': ['projects', 'labels'],
             'x-fern-sdk-method-name': 'update_many',
@@ -252,10 +275,15 @@ class LabelBulkUpdateAPI(views.APIView):
         if project is not None:
             self.check_object_permissions(self.request, project)
 
-        updated_count = bulk_update_label(
+        result = start_job_async_or_sync(
+            bulk_update_label,
             old_label=serializer.validated_data['old_label'],
             new_label=serializer.validated_data['new_label'],
             organization=self.request.user.active_organization,
             project=project,
+            job_timeout=60 * 60 * 5,  # max allowed duration is 5 hours
         )
-        return Response({'annotations_updated': updated_count})
+        if isinstance(result, int):
+            return Response({'annotations_updated': result})
+        # labels are updated in the background, the number of updated labels is stored in the job meta
+        return Response({'annotations_updated': None, 'job_id': result.id})
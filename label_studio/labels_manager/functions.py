@@ -1,34 +1,108 @@
+import json
+import logging
+
+from core.redis import update_current_job_meta
+from data_manager.counts import invalidate_task_counts
+from data_manager.results_projection import update_results_projection
+from django.conf import settings
 from django.db import transaction
 from tasks.models import Annotation
 
+logger = logging.getLogger(__name__)
 
-def bulk_update_label(old_label, new_label, organization, project=None):
-    annotations = Annotation.objects.filter(project__organization=organization)
-    if project is not None:
-        annotations = annotations.filter(project=project)
+
+def _get_label_strings(label):
+    """Get all string values from label, e.g. ["A", ["B", "C"]] -> A, B, C"""
+    if isinstance(label, str):
+        yield label
+    elif isinstance(label, list):
+        for item in label:
+            yield from _get_label_strings(item)
+    elif isinstance(label, dict):
+        for item in label.values():
+            yield from _get_label_strings(item)
+
+
+def filter_annotations_with_label(annotations, label):
+    """Narrow annotations down to those which results text contains all strings of the label
+
+    It's a cheap database-side prefilter, the exact match must be checked on the result itself.
+    """
+    # SQLite stores JSON with escaped non-ascii symbols, PostgreSQL jsonb text keeps them as is
+    ensure_ascii = settings.DJANGO_DB == settings.DJANGO_DB_SQLITE
+    for value in set(_get_label_strings(label)):
+        annotations = annotations.filter(result__icontains=json.dumps(value, ensure_ascii=ensure_ascii)[1:-1])
+    return annotations
+
+
+def replace_label_in_result(result, old_label, new_label):
+    """Replace label value in result regions in place
+
+    :return: Number of replaced labels
+    """
+    count = 0
+    for region in result:
+        result_type = region.get('type')
+        if result_type is not None:
+            label = region['value'].get(result_type)
+            if label is not None and label == old_label:
+                region['value'][result_type] = new_label
+                count += 1
+    return count
+
+
+def update_annotation_results(annotations, update_result, start_after_id=0):
+    """Update annotation results in batches of BATCH_SIZE ordered by id, each batch is saved in its own transaction
+
+    The last processed annotation id is stored in the rq job meta, so an interrupted job can be restarted
+    with `start_after_id` instead of scanning all annotations again.
+
+    :param annotations: Annotation queryset, narrowed down to candidates
+    :param update_result: Function changing result in place and returning the number of changes
+    :param start_after_id: Skip annotations with id less or equal to this one
+    :return: Total number of changes
+    """
+    annotations = annotations.only('id', 'result', 'task_id', 'project_id').order_by('id')
 
     updated_count = 0
-    with transaction.atomic():
+    last_id = start_after_id
+    while True:
+        batch = list(annotations.filter(id__gt=last_id)[: settings.BATCH_SIZE])
+        if not batch:
+            break
+
         update_annotations = []
-        for annotation in annotations.only('result').all():
-            result = annotation.result
-
-            updated_result = []
-            need_update = False
-            for region in result:
-                result_type = region.get('type')
-                if result_type is not None:
-                    label = region['value'].get(result_type)
-                    if label is not None and label == old_label:
-                        region['value'][result_type] = new_label
-                        updated_count += 1
-                        need_update = True
-                updated_result.append(region)
-
-            if need_update:
-                annotation.result = updated_result
+        for annotation in batch:
+            count = update_result(annotation.result)
+            if count:
+                updated_count += count
                 update_annotations.append(annotation)
 
         if update_annotations:
-            Annotation.objects.bulk_update(update_annotations, ['result'])
+            with transaction.atomic():
+                Annotation.objects.bulk_update(update_annotations, ['result'])
+            # bulk_update doesn't send signals
+            update_results_projection({annotation.task_id for annotation in update_annotations})
+            for project_id in {annotation.project_id for annotation in update_annotations}:
+                invalidate_task_counts(project_id)
+
+        last_id = batch[-1].id
+        logger.info(f'Annotation results update: {updated_count} changes, last annotation id={last_id}')
+        update_current_job_meta(last_id=last_id, updated_count=updated_count)
+
     return updated_count
+
+
+def bulk_update_label(old_label, new_label, organization, project=None, start_after_id=0):
+    """Rename label in all annotations of the organization or project
+
+    :return: Number of replaced labels
+    """
+    annotations = Annotation.objects.filter(project__organization=organization)
+    if project is not None:
+        annotations = annotations.filter(project=project)
+    annotations = filter_annotations_with_label(annotations, old_label)
+
+    return update_annotation_results(
+        annotations, lambda result: replace_label_in_result(result, old_label, new_label), start_after_id
+    )
@@ -113,13 +113,14 @@ class MLApiResult:
     Class for storing the result of ML API request
     """
 
-    def __init__(self, url='', request='', response=None, headers=None, type='ok', status_code=200):
+    def __init__(self, url='', request='', response=None, headers=None, type='ok', status_code=200, exception=None):
         self.url = url
         self.request = request
         self.response = {} if response is None else response
         self.headers = {} if headers is None else headers
         self.type = type
         self.status_code = status_code
+        self.exception = exception
 
     @property
     def is_error(self):
@@ -161,7 +162,10 @@ class MLApi(BaseHTTPAPI):
         except requests.exceptions.RequestException as e:
             error_string = str(e)
             status_code = response.status_code if response is not None else 0
-            return MLApiResult(url, request, {'error': error_string}, headers, 'error', status_code=status_code)
+            error_response = {'error': error_string}
+            if response is not None:
+                error_response['response'] = response.text
+            return MLApiResult(url, request, error_response, headers, 'error', status_code=status_code, exception=e)
         status_code = response.status_code
         try:
             response = response.json()
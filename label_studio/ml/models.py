@@ -1,8 +1,12 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 import logging
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, List
 
+import requests
 from core.utils.common import conditional_atomic, db_is_not_sqlite, load_func
 from django.conf import settings
 from django.db import models, transaction
@@ -19,6 +23,11 @@ logger = logging.getLogger(__name__)
 
 MAX_JOBS_PER_PROJECT = 1
 
+# ML backend is overloaded or temporarily unavailable, /predict request is retried with backoff
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+# words in 5xx responses telling that the batch of tasks is too big for ML backend
+BATCH_SIZE_ERROR_HINTS = ('too large', 'too big', 'too many', 'payload', 'memory', 'timeout', 'timed out')
+
 InteractiveAnnotatingDataSerializer = load_func(settings.INTERACTIVE_DATA_SERIALIZER)
 
 
@@ -291,8 +300,21 @@ class MLBackend(models.Model):
 
     def _get_predictions_from_ml_backend(self, serialized_tasks: List[Dict]) -> List[Dict]:
         result = self.api.make_predictions(serialized_tasks, self.project)
+        responses = self._get_responses_from_result(result)
+        if not responses:
+            return []
+
+        if len(serialized_tasks) != len(responses):
+            # Number of tasks and responses are not equal
+            # It can happen if ML backend doesn't support batch processing but only process one task at a time
+            # In the future versions, we may better consider this as an error and deprecate this code branch
+            return self._get_predictions_from_ml_backend_one_by_one(serialized_tasks, responses)
+
+        return self._get_predictions_from_responses(serialized_tasks, responses)
 
-        # response validation
+    @staticmethod
+    def _get_responses_from_result(result) -> List:
+        """Validate ML backend /predict result and return its per-task responses, or empty list on error"""
         if result.is_error:
             logger.error(f'Error occurred: {result.error_message}')
             return []
@@ -304,16 +326,10 @@ class MLBackend(models.Model):
                 'ML backend returns an incorrect response, results field must be a list with at least one item'
             )
             return []
+        return result.response['results']
 
-        responses = result.response['results']
-
+    def _get_predictions_from_responses(self, serialized_tasks: List[Dict], responses: List) -> List[Dict]:
         predictions = []
-        if len(serialized_tasks) != len(responses):
-            # Number of tasks and responses are not equal
-            # It can happen if ML backend doesn't support batch processing but only process one task at a time
-            # In the future versions, we may better consider this as an error and deprecate this code branch
-            return self._get_predictions_from_ml_backend_one_by_one(serialized_tasks, responses)
-
         # ML backend supports batch processing
         for task, response in zip(serialized_tasks, responses):
             if isinstance(response, dict):
@@ -339,30 +355,220 @@ class MLBackend(models.Model):
                 )
         return predictions
 
+    @staticmethod
+    def _make_predictions_with_retries(api, serialized_tasks: List[Dict], project):
+        """Send one batch to ML backend, retry overloaded backend responses with exponential backoff"""
+        retries = settings.ML_PREDICT_MAX_RETRIES
+        for attempt in range(retries + 1):
+            result = api.make_predictions(serialized_tasks, project)
+            if not result.is_error or result.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return result
+            delay = settings.ML_PREDICT_RETRY_BACKOFF * 2**attempt
+            logger.debug(f'ML backend responds with {result.status_code}, retry in {delay} seconds')
+            time.sleep(delay)
+
+    @staticmethod
+    def _is_batch_size_error(result):
+        """Errors that can be fixed by sending fewer tasks: timeouts, 413 and 5xx responses with a payload size hint"""
+        if result.status_code == 0:
+            return isinstance(result.exception, requests.exceptions.Timeout) and not isinstance(
+                result.exception, requests.exceptions.ConnectTimeout
+            )
+        if result.status_code in (413, 504):
+            return True
+        if result.status_code >= 500:
+            text = f'{result.error_message} {result.response.get("response", "")}'.lower()
+            return any(hint in text for hint in BATCH_SIZE_ERROR_HINTS)
+        return False
+
+    @staticmethod
+    def _is_connection_error(result):
+        return result.status_code == 0 and isinstance(result.exception, requests.exceptions.ConnectionError)
+
+    def _iter_predictions_from_ml_backend(self, tasks):
+        """Get predictions for tasks with concurrent batched requests to ML backend
+
+        At most ML_PREDICT_MAX_CONCURRENT_REQUESTS requests are in flight, tasks are serialized
+        only when their batch is sent. A batch failed because of its size is split in halves and sent again
+        with a smaller batch size for the following batches, other failed batches are skipped. The run is stopped
+        when ML backend is unreachable. A backend that doesn't support batches is switched to one task per request.
+
+        :param tasks: Task queryset
+        :return: Generator of prediction lists, one list per completed batch
+        """
+        from tasks.models import Task
+
+        task_ids = list(tasks.order_by('id').values_list('id', flat=True))
+        max_batch_size = max(settings.ML_PREDICT_BATCH_SIZE, 1)
+        batch_size = max_batch_size
+        batches_supported = True
+        position = 0
+        retry_batches = deque()
+
+        api, project = self.api, self.project
+        max_workers = max(settings.ML_PREDICT_MAX_CONCURRENT_REQUESTS, 1)
+
+        def next_batch():
+            nonlocal position
+            if retry_batches:
+                return retry_batches.popleft()
+            if position >= len(task_ids):
+                return None
+            ids = task_ids[position : position + batch_size]
+            position += len(ids)
+            return TaskSimpleSerializer(Task.objects.filter(id__in=ids).order_by('id'), many=True).data
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            while True:
+                while len(futures) < max_workers:
+                    batch = next_batch()
+                    if not batch:
+                        break
+                    futures[executor.submit(self._make_predictions_with_retries, api, batch, project)] = batch
+                if not futures:
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = futures.pop(future)
+                    result = future.result()
+
+                    if result.is_error and self._is_connection_error(result):
+                        logger.error(f'ML backend {self} is unreachable: {result.error_message}, stop predicting')
+                        return
+
+                    if result.is_error and len(batch) > 1 and self._is_batch_size_error(result):
+                        # too big batch can cause timeouts or memory errors on ML backend side
+                        logger.warning(
+                            f'ML backend {self} failed to predict {len(batch)} tasks: {result.error_message}, '
+                            f'retry with smaller batches'
+                        )
+                        batch_size = max(batch_size // 2, 1)
+                        middle = len(batch) // 2
+                        retry_batches.extend([batch[:middle], batch[middle:]])
+                        continue
+
+                    responses = self._get_responses_from_result(result)
+                    if not responses:
+                        continue
+
+                    if len(batch) != len(responses):
+                        if len(responses) == 1:
+                            if batches_supported:
+                                logger.warning(
+                                    f"'ML backend '{self.title}' doesn't support batch processing of tasks, "
+                                    f'switched to one-by-one task retrieval'
+                                )
+                                batches_supported = False
+                                batch_size = 1
+                            retry_batches.extend([task] for task in batch)
+                        else:
+                            logger.error(
+                                f'Number of tasks and responses are not equal: '
+                                f'{len(batch)} tasks != {len(responses)} responses. '
+                                f'Returning empty predictions.'
+                            )
+                        continue
+
+                    if batches_supported and len(batch) == batch_size:
+                        batch_size = min(batch_size * 2, max_batch_size)
+                    yield self._get_predictions_from_responses(batch, responses)
+
     def predict_tasks(self, tasks):
         model_version = self.update_state()
         if self.not_ready:
             logger.debug(f'ML backend {self} is not ready')
             return
 
+        tasks = self._exclude_predicted_tasks(tasks, model_version)
+        if not tasks.exists():
+            logger.debug(f'All tasks already have prediction from model version={self.model_version}')
+            return model_version
+        instances = []
+        # predictions are saved as soon as their batch is completed
+        for predictions in self._iter_predictions_from_ml_backend(tasks):
+            with conditional_atomic(predicate=db_is_not_sqlite):
+                prediction_ser = PredictionSerializer(data=predictions, many=True)
+                prediction_ser.is_valid(raise_exception=True)
+                instances.extend(prediction_ser.save())
+        return instances
+
+    @staticmethod
+    def _exclude_predicted_tasks(tasks, model_version):
+        """Filter tasks that already contain the current model version in predictions"""
         if isinstance(tasks, list):
             from tasks.models import Task
 
             tasks = Task.objects.filter(id__in=[task.id for task in tasks])
 
-        # Filter tasks that already contain the current model version in predictions
-        tasks = tasks.annotate(predictions_count=Count('predictions')).exclude(
+        return tasks.annotate(predictions_count=Count('predictions')).exclude(
             Q(predictions_count__gt=0) & Q(predictions__model_version=model_version)
         )
+
+    def predict_tasks_in_bulk(self, tasks):
+        """Get predictions for tasks and save them with one bulk insert per completed batch
+
+        Unlike predict_tasks, invalid predictions are skipped instead of failing the whole batch,
+        and task counters are updated once per batch.
+
+        :param tasks: Task queryset or list of tasks
+        :return: List of created predictions
+        """
+        from core.feature_flags import flag_set
+        from core.label_config import get_label_interface
+        from data_manager.counts import invalidate_task_counts
+        from projects.functions.project_counters import mark_project_counters_stale
+        from tasks.functions import update_tasks_counters
+        from tasks.models import Prediction, Task
+
+        model_version = self.update_state()
+        if self.not_ready:
+            logger.debug(f'ML backend {self} is not ready')
+            return []
+
+        tasks = self._exclude_predicted_tasks(tasks, model_version)
         if not tasks.exists():
             logger.debug(f'All tasks already have prediction from model version={self.model_version}')
-            return model_version
-        tasks_ser = TaskSimpleSerializer(tasks, many=True).data
-        predictions = self._get_predictions_from_ml_backend(tasks_ser)
-        with conditional_atomic(predicate=db_is_not_sqlite):
-            prediction_ser = PredictionSerializer(data=predictions, many=True)
-            prediction_ser.is_valid(raise_exception=True)
-            instances = prediction_ser.save()
+            return []
+
+        label_interface = None
+        if flag_set('fflag_feat_utc_210_prediction_validation_15082025', user=self.project.organization.created_by):
+            label_interface = get_label_interface(self.project.label_config)
+
+        instances = []
+        for predictions in self._iter_predictions_from_ml_backend(tasks):
+            db_predictions = []
+            for prediction in predictions:
+                if label_interface is not None:
+                    errors = label_interface.validate_prediction(prediction, return_errors=True)
+                    if errors:
+                        logger.error(
+                            f'ML backend {self} returns invalid prediction for task {prediction["task"]}: {errors}'
+                        )
+                        continue
+                try:
+                    db_predictions.append(
+                        Prediction(
+                            task_id=prediction['task'],
+                            project_id=prediction['project'],
+                            result=Prediction.prepare_prediction_result(prediction['result'], self.project),
+                            score=prediction['score'],
+                            model_version=prediction['model_version'],
+                        )
+                    )
+                except Exception as exc:
+                    logger.error(
+                        f'ML backend {self} returns incorrect prediction for task {prediction["task"]}: {exc}'
+                    )
+
+            created = Prediction.objects.bulk_create(db_predictions, batch_size=settings.BATCH_SIZE)
+            # bulk_create doesn't send signals, so task counters are updated explicitly
+            update_tasks_counters(Task.objects.filter(id__in={instance.task_id for instance in created}))
+            instances.extend(created)
+
+        invalidate_task_counts(self.project_id)
+        mark_project_counters_stale(self.project_id)
         return instances
 
     def interactive_annotating(self, task, context=None, user=None):
@@ -0,0 +1,99 @@
+"""
+Background prediction fill for Data Manager page loads.
+
+When a project evaluates predictions automatically, every Data Manager page load used to call
+the ML backend synchronously for tasks without predictions and then reload each task one by one.
+Concurrent page loads of the same tasks sent duplicate requests to the ML backend and stored
+duplicate predictions.
+
+This module marks tasks as in-flight in Redis before requesting predictions, so the same task is requested
+only once for all concurrent page loads of all web workers. Without Redis the marks are kept in the Django cache
+of the process. Tasks are sent to the ML backend
+in batches by background jobs, and predictions are stored with a single bulk insert per batch.
+With async workers predictions appear on the next page load, without workers they are ready
+right after scheduling.
+"""
+
+import logging
+from typing import Iterable, List
+
+from core.redis import redis_connected, start_job_async_or_sync
+from django.conf import settings
+from django.core.cache import cache
+from django_rq import get_connection
+
+logger = logging.getLogger(__name__)
+
+ML_PREDICTION_FILL_KEY_PREFIX = 'ml_prediction_fill'
+
+
+def _get_in_flight_key(backend_id: int, task_id: int) -> str:
+    """Get cache key marking the task prediction as requested from the ML backend"""
+    return f'{ML_PREDICTION_FILL_KEY_PREFIX}:{backend_id}:{task_id}'
+
+
+def mark_in_flight(backend_id: int, task_id: int) -> bool:
+    """Mark the task prediction as requested
+
+    :return: False if the task is already marked
+    """
+    key = _get_in_flight_key(backend_id, task_id)
+    ttl = settings.ML_PREDICTION_FILL_IN_FLIGHT_TTL
+    if redis_connected():
+        return bool(get_connection().set(key, 1, nx=True, ex=ttl))
+    return cache.add(key, 1, ttl)
+
+
+def release_in_flight(backend_id: int, task_ids: List[int]) -> None:
+    """Release in-flight marks of the tasks, so their predictions can be requested again"""
+    keys = [_get_in_flight_key(backend_id, task_id) for task_id in task_ids]
+    if not keys:
+        return
+    if redis_connected():
+        get_connection().delete(*keys)
+    else:
+        cache.delete_many(keys)
+
+
+def fill_predictions(backend_id: int, task_ids: List[int]) -> int:
+    """Request predictions for a batch of tasks and release their in-flight marks
+
+    :param backend_id: MLBackend ID
+    :param task_ids: Task IDs
+    :return: Number of created predictions
+    """
+    from ml.models import MLBackend
+    from tasks.models import Task
+
+    try:
+        backend = MLBackend.objects.filter(id=backend_id).select_related('project').first()
+        if backend is None:
+            return 0
+        tasks = Task.objects.filter(id__in=task_ids, project_id=backend.project_id)
+        return len(backend.predict_tasks_in_bulk(tasks))
+    finally:
+        try:
+            release_in_flight(backend_id, task_ids)
+        except Exception as e:
+            logger.error(f'Failed to release in-flight marks of backend {backend_id} predictions: {e}')
+
+
+def schedule_predictions_fill(backend, task_ids: Iterable[int]) -> List[int]:
+    """Start background jobs requesting predictions for tasks that are not in-flight yet
+
+    :param backend: MLBackend instance
+    :param task_ids: IDs of tasks without predictions
+    :return: IDs of tasks scheduled by this call
+    """
+    scheduled = []
+    for task_id in task_ids:
+        try:
+            if mark_in_flight(backend.id, task_id):
+                scheduled.append(task_id)
+        except Exception as e:
+            logger.error(f'Failed to mark task {task_id} prediction as in-flight: {e}')
+
+    batch_size = settings.ML_PREDICTION_FILL_BATCH_SIZE
+    for i in range(0, len(scheduled), batch_size):
+        start_job_async_or_sync(fill_predictions, backend.id, scheduled[i : i + batch_size], queue_name='default')
+    return scheduled
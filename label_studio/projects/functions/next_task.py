@@ -8,8 +8,10 @@ from core.utils.db import fast_first
 from django.conf import settings
 from django.db.models import BooleanField, Case, Count, Exists, F, Max, OuterRef, Q, QuerySet, Value, When
 from django.db.models.fields import DecimalField
+from projects.functions.next_task_queue import get_next_task_from_queue, next_task_queue_enabled
 from projects.functions.stream_history import add_stream_history
 from projects.models import Project
+from tasks.locks import get_fully_locked_task_ids
 from tasks.models import Annotation, Task
 from users.models import User
 
@@ -25,14 +27,21 @@ def get_next_task_logging_level(user: User) -> int:
     return level
 
 
-def _get_random_unlocked(task_query: QuerySet[Task], user: User, upper_limit=None) -> Union[Task, None]:
-    for task in task_query.order_by('?').only('id')[: settings.RANDOM_NEXT_TASK_SAMPLE_SIZE]:
+def _get_random_unlocked(
+    task_query: QuerySet[Task], user: User, upper_limit=None, skip_fully_locked=True
+) -> Union[Task, None]:
+    sample = list(task_query.order_by('?').values_list('id', 'overlap')[: settings.RANDOM_NEXT_TASK_SAMPLE_SIZE])
+    # tasks taken by collaborators up to their overlap are skipped in bulk
+    fully_locked_ids = get_fully_locked_task_ids(sample, user) if skip_fully_locked else set()
+    for task_id, _ in sample:
+        if task_id in fully_locked_ids:
+            continue
         try:
-            task = Task.objects.select_for_update(skip_locked=True).get(pk=task.id)
+            task = Task.objects.select_for_update(skip_locked=True).get(pk=task_id)
             if not task.has_lock(user):
                 return task
         except Task.DoesNotExist:
-            logger.debug('Task with id {} locked'.format(task.id))
+            logger.debug('Task with id {} locked'.format(task_id))
 
 
 def _get_first_unlocked(tasks_query: QuerySet[Task], user) -> Union[Task, None]:
@@ -56,7 +65,8 @@ def _try_ground_truth(tasks: QuerySet[Task], project: Project, user: User) -> Un
     if not_solved_tasks_with_ground_truths.exists():
         if project.sampling == project.SEQUENCE:
             return _get_first_unlocked(not_solved_tasks_with_ground_truths, user)
-        return _get_random_unlocked(not_solved_tasks_with_ground_truths, user)
+        # ground truth tasks ignore locks in onboarding mode, so they are checked one by one
+        return _get_random_unlocked(not_solved_tasks_with_ground_truths, user, skip_fully_locked=False)
 
 
 def _try_tasks_with_overlap(tasks: QuerySet[Task]) -> Tuple[Union[Task, None], QuerySet[Task]]:
@@ -240,6 +250,19 @@ def get_next_task_without_dm_queue(
         next_task = _get_first_unlocked(not_solved_tasks, user)
         queue_info += (' & ' if queue_info else '') + 'Low agreement queue'
 
+    if (
+        not next_task
+        and not prioritized_low_agreement
+        and not project.show_ground_truth_first
+        and next_task_queue_enabled()
+    ):
+        # precomputed queue is already ordered by overlap first, breadth first and sampling rules,
+        # ground truth first is left to the regular stream, because onboarding tasks can be labeled already
+        logger.debug(f'User={user} tries precomputed queue')
+        next_task = get_next_task_from_queue(not_solved_tasks, project, user)
+        if next_task:
+            queue_info += (' & ' if queue_info else '') + 'Precomputed queue'
+
     if not next_task and project.show_ground_truth_first:
         logger.debug(f'User={user} tries ground truth from prepared tasks')
         next_task = _try_ground_truth(not_solved_tasks, project, user)
@@ -393,7 +416,7 @@ def get_next_task(
                 count = next_task.annotations.filter(was_cancelled=False).count()
                 task_overlap_reached = count >= next_task.overlap
                 global_overlap_reached = count >= project.maximum_annotations
-                locks = next_task.locks.count() > project.maximum_annotations - next_task.annotations.count()
+                locks = next_task.num_locks > project.maximum_annotations - next_task.annotations.count()
                 if next_task.is_labeled or task_overlap_reached or global_overlap_reached or locks:
                     from tasks.serializers import TaskSimpleSerializer
 
@@ -0,0 +1,201 @@
+"""
+Precomputed per-project candidate queue for the label stream.
+
+Picking the next task from scratch requires several heavy queries over all project tasks
+(`order_by('?')`, ground truth and overlap probes, breadth-first aggregations). With many annotators
+working on a big project this becomes the slowest endpoint. This module keeps a bounded Redis list
+of unlabeled task ids per project, already ordered by the project sampling rules, so that
+`get_next_task` only needs to validate a small window of candidates for the current user.
+
+The queue is shared by all annotators of the project, so candidates are never popped on read:
+user-specific conditions (solved, postponed, locked tasks) are checked against the window,
+and task ids are removed only when tasks become labeled. The queue is refilled in the background
+when it is missing or runs short, and it is invalidated when project settings affecting the order change.
+
+The queue is built in the background without a user and a Data Manager view, so its order is close to
+the regular label stream, but not the same:
+- sequence sampling follows task ids, not the ordering of the view the annotator works in
+- breadth first uses the stored `total_annotations` counter, which counts annotations of the current user too
+- projects showing ground truth first don't use the queue, in onboarding mode ground truth tasks can be
+  labeled already, and they are picked by the regular label stream
+"""
+
+import logging
+import random
+from typing import List, Optional
+
+from core.redis import redis_connected, start_job_async_or_sync
+from django.conf import settings
+from django.db.models import F, Min, Q, QuerySet
+from django_rq import get_connection
+from tasks.locks import get_fully_locked_task_ids
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+# Redis keys
+NEXT_TASK_QUEUE_KEY_PREFIX = 'next_task_queue'
+NEXT_TASK_QUEUE_REFILL_KEY_PREFIX = f'{NEXT_TASK_QUEUE_KEY_PREFIX}_refill'
+
+# Number of task ids pushed to Redis in one command during refill
+REDIS_PUSH_CHUNK_SIZE = 1000
+
+
+def _get_queue_key(project_id: int) -> str:
+    """Get Redis key for project candidate queue."""
+    return f'{NEXT_TASK_QUEUE_KEY_PREFIX}:{project_id}'
+
+
+def _get_refill_key(project_id: int) -> str:
+    """Get Redis key used to deduplicate queue refill jobs."""
+    return f'{NEXT_TASK_QUEUE_REFILL_KEY_PREFIX}:{project_id}'
+
+
+def next_task_queue_enabled() -> bool:
+    """Precomputed queue mode is opt-in and requires Redis"""
+    return settings.NEXT_TASK_QUEUE_ENABLED and redis_connected()
+
+
+def get_next_task_queue_candidates(project) -> List[int]:
+    """Build ordered list of candidate task ids for the project label stream
+
+    The order follows the same priorities as the regular label stream:
+    overlap first, breadth first and then project sampling (sequence, uniform or uncertainty).
+
+    :param project: Project instance
+    :return: List of task ids, not longer than NEXT_TASK_QUEUE_MAX_SIZE
+    """
+    tasks = Task.objects.filter(project=project, is_labeled=False)
+    ordering = []
+
+    if project.show_overlap_first:
+        tasks = tasks.annotate(has_overlap=Q(overlap__gt=1))
+        ordering.append(F('has_overlap').desc())
+
+    if project.maximum_annotations > 1:
+        # try to complete tasks that are already in progress
+        ordering.append(F('total_annotations').desc())
+
+    if project.sampling == project.SEQUENCE:
+        ordering.append('id')
+    elif project.sampling == project.UNCERTAINTY:
+        tasks = tasks.annotate(
+            current_score=Min('predictions__score', filter=Q(predictions__model_version=project.model_version))
+        )
+        ordering.extend([F('current_score').asc(nulls_last=True), '?'])
+    else:
+        ordering.append('?')
+
+    tasks = tasks.order_by(*ordering).values_list('id', flat=True)
+    return list(tasks[: settings.NEXT_TASK_QUEUE_MAX_SIZE])
+
+
+def refill_next_task_queue(project_id: int) -> int:
+    """Recalculate candidate queue for the project and store it in Redis
+
+    :param project_id: Project ID
+    :return: Number of task ids in the queue
+    """
+    from projects.models import Project
+
+    project = Project.objects.filter(id=project_id).first()
+    if project is None or not redis_connected():
+        return 0
+
+    task_ids = get_next_task_queue_candidates(project)
+    key = _get_queue_key(project_id)
+
+    redis_client = get_connection()
+    pipeline = redis_client.pipeline()
+    pipeline.delete(key)
+    for i in range(0, len(task_ids), REDIS_PUSH_CHUNK_SIZE):
+        pipeline.rpush(key, *task_ids[i : i + REDIS_PUSH_CHUNK_SIZE])
+    pipeline.expire(key, settings.NEXT_TASK_QUEUE_TTL)
+    pipeline.execute()
+
+    logger.debug(f'Next task queue for project {project_id} refilled with {len(task_ids)} tasks')
+    return len(task_ids)
+
+
+def schedule_next_task_queue_refill(project_id: int) -> bool:
+    """Start refill job unless another refill was started recently
+
+    :return: True if refill job was scheduled
+    """
+    redis_client = get_connection()
+    if not redis_client.set(_get_refill_key(project_id), 1, nx=True, ex=settings.NEXT_TASK_QUEUE_REFILL_INTERVAL):
+        return False
+    start_job_async_or_sync(refill_next_task_queue, project_id, queue_name='low')
+    return True
+
+
+def invalidate_next_task_queue(project_id: int) -> None:
+    """Drop candidate queue, it will be rebuilt on the next label stream call"""
+    if not next_task_queue_enabled():
+        return
+    try:
+        get_connection().delete(_get_queue_key(project_id), _get_refill_key(project_id))
+    except Exception as e:
+        logger.error(f'Failed to invalidate next task queue for project {project_id}: {e}')
+
+
+def remove_tasks_from_next_task_queue(project_id: int, task_ids: List[int]) -> None:
+    """Remove tasks from candidate queue, e.g. when they become labeled"""
+    if not task_ids or not next_task_queue_enabled():
+        return
+    try:
+        key = _get_queue_key(project_id)
+        pipeline = get_connection().pipeline()
+        for task_id in task_ids:
+            pipeline.lrem(key, 0, task_id)
+        pipeline.execute()
+    except Exception as e:
+        logger.error(f'Failed to remove tasks from next task queue for project {project_id}: {e}')
+
+
+def get_next_task_from_queue(not_solved_tasks: QuerySet[Task], project, user) -> Optional[Task]:
+    """Get next unlocked task for the user from the precomputed candidate queue
+
+    Only a window of NEXT_TASK_QUEUE_WINDOW candidates is checked against `not_solved_tasks`
+    with a single query. If the window doesn't contain any available task, None is returned
+    and the regular label stream is used as a fallback.
+
+    :param not_solved_tasks: Tasks available for the user
+    :param project: Project instance
+    :param user: User who requests the next task
+    :return: Locked for update task or None
+    """
+    key = _get_queue_key(project.id)
+    try:
+        redis_client = get_connection()
+        window = settings.NEXT_TASK_QUEUE_WINDOW
+        pipeline = redis_client.pipeline()
+        pipeline.lrange(key, 0, window - 1)
+        pipeline.llen(key)
+        raw_ids, queue_size = pipeline.execute()
+        if queue_size < window:
+            schedule_next_task_queue_refill(project.id)
+    except Exception as e:
+        logger.error(f'Failed to read next task queue for project {project.id}: {e}')
+        return None
+
+    if not raw_ids:
+        return None
+
+    task_ids = [int(task_id) for task_id in raw_ids]
+    available = list(not_solved_tasks.filter(pk__in=task_ids).values_list('id', 'overlap'))
+    available_ids = {task_id for task_id, _ in available}
+    # tasks taken by collaborators up to their overlap are skipped in bulk
+    available_ids -= get_fully_locked_task_ids(available, user)
+    candidates = [task_id for task_id in task_ids if task_id in available_ids]
+    if project.sampling == project.UNIFORM:
+        # the queue is already shuffled, but annotators shouldn't walk it in the same order
+        random.shuffle(candidates)
+
+    for task_id in candidates:
+        try:
+            task = Task.objects.select_for_update(skip_locked=True).get(pk=task_id)
+            if not task.has_lock(user):
+                return task
+        except Task.DoesNotExist:
+            logger.debug('Task with id {} locked'.format(task_id))
@@ -0,0 +1,124 @@
+"""
+Materialized project counters for project list endpoints.
+
+`ProjectManager.with_counts_annotate` aggregates tasks, annotations and predictions of every listed project
+on each request, which takes seconds for organizations with many big projects. When enabled, the counters
+are stored in `ProjectCounters` rows and project lists read them with a single join.
+
+Every task, annotation or prediction write marks the project counters as stale, the stale flag is switched
+only once per burst of writes. Stale counters are recalculated by a delayed background job, or right before
+the project list is read when there are no async workers. The stale flag is reset before counting, so writes
+made during recalculation mark the counters stale again and nothing is lost.
+`reconcile_project_counters` recalculates all counters of an organization from scratch.
+"""
+
+import logging
+from typing import Iterable, List
+
+from core.redis import redis_connected, start_job_async_or_sync
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Coalesce
+
+logger = logging.getLogger(__name__)
+
+
+def project_counters_enabled() -> bool:
+    return settings.PROJECT_COUNTERS_MATERIALIZED
+
+
+def mark_project_counters_stale(project_id: int) -> None:
+    """Mark project counters as outdated and schedule their recalculation"""
+    from projects.models import ProjectCounters
+
+    if project_id is None or not project_counters_enabled():
+        return
+
+    try:
+        updated = ProjectCounters.objects.filter(project_id=project_id, is_stale=False).update(is_stale=True)
+    except Exception as e:
+        logger.error(f'Failed to mark counters of project {project_id} as stale: {e}')
+        return
+
+    # without async workers stale counters are recalculated on read
+    if updated and redis_connected():
+        transaction.on_commit(
+            lambda: start_job_async_or_sync(
+                refresh_project_counters,
+                [project_id],
+                in_seconds=settings.PROJECT_COUNTERS_REFRESH_DELAY,
+                queue_name='low',
+            )
+        )
+
+
+def refresh_project_counters(project_ids: Iterable[int]) -> int:
+    """Recalculate counters of projects, missing counters are created
+
+    :param project_ids: Project IDs
+    :return: Number of recalculated counters
+    """
+    from projects.models import Project, ProjectCounters, ProjectManager
+
+    project_ids = list(project_ids)
+    ProjectCounters.objects.bulk_create(
+        [ProjectCounters(project_id=project_id) for project_id in project_ids], ignore_conflicts=True
+    )
+    ProjectCounters.objects.filter(project_id__in=project_ids).update(is_stale=False)
+
+    projects = ProjectManager.with_counts_annotate(Project.objects.filter(id__in=project_ids))
+    counters = [
+        ProjectCounters(project_id=row.pop('id'), is_stale=False, **row)
+        for row in projects.values('id', *ProjectManager.COUNTER_FIELDS)
+    ]
+    ProjectCounters.objects.bulk_create(
+        counters,
+        update_conflicts=True,
+        unique_fields=['project'],
+        update_fields=ProjectManager.COUNTER_FIELDS + ['updated_at'],
+    )
+    return len(counters)
+
+
+def refresh_stale_project_counters(projects: QuerySet) -> int:
+    """Recalculate missing and stale counters of the projects
+
+    With async workers stale counters are already scheduled for recalculation, so only missing ones are created.
+
+    :param projects: Project queryset
+    :return: Number of recalculated counters
+    """
+    condition = Q(counters__isnull=True)
+    if not redis_connected():
+        condition |= Q(counters__is_stale=True)
+    project_ids = list(projects.filter(condition).order_by().values_list('id', flat=True))
+
+    refreshed = 0
+    for i in range(0, len(project_ids), settings.BATCH_SIZE):
+        refreshed += refresh_project_counters(project_ids[i : i + settings.BATCH_SIZE])
+    return refreshed
+
+
+def annotate_project_counters(projects: QuerySet, fields: List[str] = None) -> QuerySet:
+    """Annotate projects with materialized counters, the same names as `ProjectManager.with_counts_annotate` uses"""
+    from projects.models import ProjectManager
+
+    refresh_stale_project_counters(projects)
+
+    counter_fields = ProjectManager.COUNTER_FIELDS
+    if fields is not None:
+        counter_fields = [field for field in counter_fields if field in fields]
+    return projects.annotate(**{field: Coalesce(F(f'counters__{field}'), 0) for field in counter_fields})
+
+
+def reconcile_project_counters(organization_id: int) -> int:
+    """Recalculate all counters of organization projects from scratch, e.g. after counters have been enabled"""
+    from projects.models import Project
+
+    project_ids = list(Project.objects.filter(organization_id=organization_id).values_list('id', flat=True))
+    refreshed = 0
+    for i in range(0, len(project_ids), settings.BATCH_SIZE):
+        refreshed += refresh_project_counters(project_ids[i : i + settings.BATCH_SIZE])
+    logger.info(f'Counters of {refreshed} projects of organization {organization_id} are reconciled')
+    return refreshed
@@ -8,53 +8,80 @@ ANNOTATION_ID_KEY = 'annotationId'
 
 
 def add_stream_history(next_task, user, project):
-    if next_task is not None:
-        with transaction.atomic():
-            history, created = LabelStreamHistory.objects.get_or_create(user=user, project=project)
-            new_history_data = {TASK_ID_KEY: next_task.id, ANNOTATION_ID_KEY: None}
-            if created:
-                history.data = [new_history_data]
-            else:
-                task_ids = set([h[TASK_ID_KEY] for h in history.data])
-                if next_task.id not in task_ids:
-                    history.data.append(new_history_data)
-                if len(task_ids) + 1 > settings.LABEL_STREAM_HISTORY_LIMIT:
-                    history.data = history.data[-settings.LABEL_STREAM_HISTORY_LIMIT :]
-            history.save()
+    """Append task to the user label stream history, the history row is written only if the task is new"""
+    if next_task is None:
+        return
+
+    # the same task is often returned several times in a row, check it without locking and writing
+    data = LabelStreamHistory.objects.filter(user=user, project=project).values_list('data', flat=True).first()
+    if data is not None and any(item[TASK_ID_KEY] == next_task.id for item in data):
+        return
+
+    with transaction.atomic():
+        history, created = LabelStreamHistory.objects.select_for_update().get_or_create(user=user, project=project)
+        if any(item[TASK_ID_KEY] == next_task.id for item in history.data):
+            return
+        history.data.append({TASK_ID_KEY: next_task.id, ANNOTATION_ID_KEY: None})
+        # keep only the latest items
+        history.data = history.data[-settings.LABEL_STREAM_HISTORY_LIMIT :]
+        history.save(update_fields=['data'])
 
 
 def fill_history_annotation(user, task, annotation):
     history = user.histories.filter(project=task.project).first()
     if history and history.data:
+        changed = False
         for item in history.data:
-            if item[TASK_ID_KEY] == task.id:
+            if item[TASK_ID_KEY] == task.id and item[ANNOTATION_ID_KEY] != annotation.id:
                 item[ANNOTATION_ID_KEY] = annotation.id
-        history.save()
+                changed = True
+        if changed:
+            history.save(update_fields=['data'])
 
 
 def get_label_stream_history(user, project):
-    result = []
+    """Get label stream history without deleted tasks and annotations
 
-    with transaction.atomic():
-        history = user.histories.filter(project=project).first()
-        if history is None:
-            return result
-
-        data = history.data
+    Stale items are cleaned up lazily here, the history row is written only if something was removed.
+    """
+    history = user.histories.filter(project=project).first()
+    if history is None or not history.data:
+        return []
 
-        task_ids = set([h[TASK_ID_KEY] for h in history.data])
-        annotation_ids = set([h[ANNOTATION_ID_KEY] for h in history.data])
-        existing_task_ids = set(Task.objects.filter(pk__in=task_ids).values_list('id', flat=True))
+    data = history.data
+    task_ids = {item[TASK_ID_KEY] for item in data}
+    annotation_ids = {item[ANNOTATION_ID_KEY] for item in data if item[ANNOTATION_ID_KEY] is not None}
+    existing_task_ids = set(Task.objects.filter(pk__in=task_ids).values_list('id', flat=True))
+    existing_annotation_ids = set()
+    if annotation_ids:
         existing_annotation_ids = set(Annotation.objects.filter(pk__in=annotation_ids).values_list('id', flat=True))
 
-        result = []
-        for item in data:
-            if item[TASK_ID_KEY] not in existing_task_ids:
-                continue
-            if item[ANNOTATION_ID_KEY] not in existing_annotation_ids:
-                item[ANNOTATION_ID_KEY] = None
-            result.append(item)
-        history.data = result
-        history.save(update_fields=['data'])
+    result = []
+    changed = False
+    for item in data:
+        if item[TASK_ID_KEY] not in existing_task_ids:
+            changed = True
+            continue
+        if item[ANNOTATION_ID_KEY] is not None and item[ANNOTATION_ID_KEY] not in existing_annotation_ids:
+            item[ANNOTATION_ID_KEY] = None
+            changed = True
+        result.append(item)
+
+    if changed:
+        # the history can be appended concurrently, so only the validated items are removed or cleared
+        with transaction.atomic():
+            history = LabelStreamHistory.objects.select_for_update().get(id=history.id)
+            history.data = [
+                {
+                    TASK_ID_KEY: item[TASK_ID_KEY],
+                    ANNOTATION_ID_KEY: item[ANNOTATION_ID_KEY]
+                    if item[ANNOTATION_ID_KEY] in existing_annotation_ids
+                    or item[ANNOTATION_ID_KEY] not in annotation_ids
+                    else None,
+                }
+                for item in history.data
+                if item[TASK_ID_KEY] in existing_task_ids or item[TASK_ID_KEY] not in task_ids
+            ]
+            history.save(update_fields=['data'])
 
     return result
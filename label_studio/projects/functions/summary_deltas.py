@@ -0,0 +1,93 @@
+"""
+Pending project summary counter deltas.
+
+Every annotation save removes the previous annotation from `ProjectSummary` counters and adds the new one,
+and every task data change updates data columns. Each of these calls rewrites whole JSON fields
+(`created_annotations`, `created_labels`, `all_data_columns`) of the single summary row, so concurrent
+annotators of one project serialize on it.
+
+When enabled, these hot paths only increment small counters in a Redis hash per project. Counters
+are keyed by (kind, *names): ('annotations', annotation tuple), ('labels', from_name, label) and
+('columns', column). The pending deltas are folded into the locked summary row lazily, right before the summary
+is read, and they are dropped when the summary is recalculated from scratch.
+"""
+
+import json
+import logging
+from collections import Counter
+from typing import Dict, Tuple
+
+from core.redis import redis_connected
+from django.conf import settings
+from django.db import transaction
+from django_rq import get_connection
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_DELTAS_KEY_PREFIX = 'project_summary_deltas'
+
+ANNOTATIONS = 'annotations'
+LABELS = 'labels'
+COLUMNS = 'columns'
+
+
+def _get_deltas_key(project_id: int) -> str:
+    """Get Redis key for project summary deltas."""
+    return f'{SUMMARY_DELTAS_KEY_PREFIX}:{project_id}'
+
+
+def summary_deltas_enabled() -> bool:
+    """Delta mode is opt-in and requires Redis"""
+    return settings.PROJECT_SUMMARY_DELTAS and redis_connected()
+
+
+def record_summary_deltas(project_id: int, deltas: Counter) -> None:
+    """Add counter deltas to the pending deltas of the project once the current transaction is committed
+
+    If Redis is not available, deltas are applied to the summary row directly.
+
+    :param project_id: Project ID
+    :param deltas: Counter with (kind, *names) keys
+    """
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    def _record():
+        try:
+            pipeline = get_connection().pipeline()
+            for key, value in deltas.items():
+                pipeline.hincrby(_get_deltas_key(project_id), json.dumps(key), value)
+            pipeline.execute()
+        except Exception as e:
+            logger.error(f'Failed to record summary deltas for project {project_id}: {e}')
+            from projects.models import ProjectSummary
+
+            summary = ProjectSummary.objects.filter(project_id=project_id).first()
+            if summary is not None:
+                summary.apply_summary_deltas(deltas)
+
+    transaction.on_commit(_record)
+
+
+def restore_summary_deltas(project_id: int, deltas: Dict[Tuple, int]) -> None:
+    """Put popped deltas back to the pending deltas of the project, e.g. when they failed to be applied"""
+    try:
+        pipeline = get_connection().pipeline()
+        for key, value in deltas.items():
+            pipeline.hincrby(_get_deltas_key(project_id), json.dumps(key), value)
+        pipeline.execute()
+    except Exception as e:
+        logger.error(f'Failed to restore summary deltas for project {project_id}: {e}')
+
+
+def pop_summary_deltas(project_id: int) -> Dict[Tuple, int]:
+    """Read and remove pending deltas of the project in one Redis transaction
+
+    :return: Dict with (kind, *names) keys and counter deltas
+    """
+    pipeline = get_connection().pipeline()
+    pipeline.hgetall(_get_deltas_key(project_id))
+    pipeline.delete(_get_deltas_key(project_id))
+    raw_deltas, _ = pipeline.execute()
+    return {tuple(json.loads(key)): int(value) for key, value in raw_deltas.items()}
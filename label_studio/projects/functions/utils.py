@@ -95,6 +95,7 @@ def recalculate_created_annotations_and_labels_from_scratch(
     """
     logger.info(f'Reset cache started for project {project.id} and organization {organization_id}')
     logger.info(f'recalculate_created_annotations_and_labels_from_scratch project_id={project.id}')
+    summary.drop_summary_deltas()
     summary.all_data_columns = {}
     summary.common_data_columns = []
     summary.update_data_columns(project.tasks.only('data'))
@@ -0,0 +1,18 @@
+import logging
+
+from core.redis import start_job_async_or_sync
+from django.core.management.base import BaseCommand
+from projects.functions.project_counters import reconcile_project_counters
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Recalculate materialized project list counters of organization projects from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization', type=int, help='organization id')
+
+    def handle(self, *args, **options):
+        logger.debug(f"Start reconciling project counters for Organization {options['organization']}.")
+        start_job_async_or_sync(reconcile_project_counters, options['organization'])
@@ -0,0 +1,110 @@
+# Generated by Django 5.1.15 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0030_project_search_vector_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectCounters",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        help_text="Project ID",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="counters",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                (
+                    "task_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Total task number in project",
+                        verbose_name="task number",
+                    ),
+                ),
+                (
+                    "finished_task_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Finished tasks",
+                        verbose_name="finished task number",
+                    ),
+                ),
+                (
+                    "total_predictions_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Total predictions number in project",
+                        verbose_name="total predictions number",
+                    ),
+                ),
+                (
+                    "total_annotations_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Total annotations number in project without skipped",
+                        verbose_name="total annotations number",
+                    ),
+                ),
+                (
+                    "num_tasks_with_annotations",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Tasks with annotations count",
+                        verbose_name="num tasks with annotations",
+                    ),
+                ),
+                (
+                    "useful_annotation_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Useful annotation number in project",
+                        verbose_name="useful annotation number",
+                    ),
+                ),
+                (
+                    "ground_truth_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Honeypot annotation number in project",
+                        verbose_name="ground truth number",
+                    ),
+                ),
+                (
+                    "skipped_annotations_number",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Skipped by collaborators annotation number in project",
+                        verbose_name="skipped annotations number",
+                    ),
+                ),
+                (
+                    "is_stale",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Counters must be recalculated",
+                        verbose_name="is stale",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="Last update time",
+                        verbose_name="updated at",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -2,6 +2,7 @@
 """
 import json
 import logging
+from collections import Counter
 from typing import Any, Mapping, Optional
 
 from annoying.fields import AutoOneToOneField
@@ -15,6 +16,7 @@ from core.label_config import (
     get_all_object_tag_names,
     get_all_types,
     get_annotation_tuple,
+    get_compiled_label_config,
     get_original_fromname_by_regex,
     get_sample_task,
     validate_label_config,
@@ -26,6 +28,7 @@ from core.utils.common import (
     merge_labels_counters,
 )
 from core.utils.db import batch_update_with_retry, fast_first
+from data_manager.counts import invalidate_task_counts
 from django.conf import settings
 from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MaxLengthValidator, MinLengthValidator
@@ -46,6 +49,17 @@ from projects.functions import (
     annotate_total_predictions_number,
     annotate_useful_annotation_number,
 )
+from projects.functions.next_task_queue import invalidate_next_task_queue
+from projects.functions.project_counters import mark_project_counters_stale
+from projects.functions.summary_deltas import (
+    ANNOTATIONS,
+    COLUMNS,
+    LABELS,
+    pop_summary_deltas,
+    record_summary_deltas,
+    restore_summary_deltas,
+    summary_deltas_enabled,
+)
 from projects.functions.utils import make_queryset_from_iterable
 from projects.signals import ProjectSignals
 from rest_framework.exceptions import ValidationError
@@ -292,6 +306,7 @@ class Project(ProjectMixin, models.Model):
         self.__maximum_annotations = self.maximum_annotations
         self.__overlap_cohort_percentage = self.overlap_cohort_percentage
         self.__skip_queue = self.skip_queue
+        self.__next_task_queue_settings = self._get_next_task_queue_settings()
 
         # TODO: once bugfix with incorrect data types in List
         # logging.warning('! Please, remove code below after patching of all projects (extract_data_types)')
@@ -456,6 +471,15 @@ class Project(ProjectMixin, models.Model):
         elif tasks_number_changed and self.overlap_cohort_percentage < 100 and self.maximum_annotations > 1:
             self._rearrange_overlap_cohort()
 
+        # overlap and is_labeled might be changed, so candidate order for the label stream is not valid anymore
+        invalidate_next_task_queue(self.id)
+        invalidate_task_counts(self.id)
+        mark_project_counters_stale(self.id)
+
+    def _get_next_task_queue_settings(self):
+        """Project settings which define the order of the precomputed label stream queue"""
+        return self.sampling, self.show_ground_truth_first, self.show_overlap_first, self.model_version
+
     def _batch_update_with_retry(self, queryset, batch_size=500, max_retries=3, **update_fields):
         batch_update_with_retry(queryset, batch_size, max_retries, **update_fields)
 
@@ -549,6 +573,8 @@ class Project(ProjectMixin, models.Model):
         with transaction.atomic():
             # Lock summary for update to avoid race conditions
             summary = ProjectSummary.objects.select_for_update().get(project=self)
+            summary.fold_summary_deltas()
+            self.summary._copy_summary_counters(summary)
 
             if self.num_tasks == 0:
                 logger.debug(f'Project {self} has no tasks: nothing to validate here. Ensure project summary is empty')
@@ -622,6 +648,7 @@ class Project(ProjectMixin, models.Model):
                 return None
             return f'{count} {type}{"s" if count > 1 else ""}'
 
+        tag_types = [tag_info['type'] for tag_info in get_compiled_label_config(config_string).parsed.values()]
         for control_tag_from_data, labels_from_data in created_labels.items():
             # Check if labels created in annotations, and their control tag has been removed
             if (
@@ -639,8 +666,6 @@ class Project(ProjectMixin, models.Model):
             labels_from_config_by_tag = set(
                 labels_from_config[get_original_fromname_by_regex(config_string, control_tag_from_data)]
             )
-            parsed_config = parse_config(config_string)
-            tag_types = [tag_info['type'] for _, tag_info in parsed_config.items()]
             # DEV-1990 Workaround for Video labels as there are no labels in VideoRectangle tag
             if 'VideoRectangle' in tag_types:
                 for key in labels_from_config:
@@ -801,6 +826,10 @@ class Project(ProjectMixin, models.Model):
             self.__maximum_annotations = self.maximum_annotations
             self.__overlap_cohort_percentage = self.overlap_cohort_percentage
 
+        if exists and self.__next_task_queue_settings != self._get_next_task_queue_settings():
+            invalidate_next_task_queue(self.id)
+        self.__next_task_queue_settings = self._get_next_task_queue_settings()
+
         if self.__skip_queue != self.skip_queue:
             bulk_update_stats_project_tasks(
                 self.tasks.filter(Q(annotations__isnull=False) & Q(annotations__ground_truth=False))
@@ -1280,6 +1309,36 @@ class ProjectMember(models.Model):
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
 
+class ProjectCounters(models.Model):
+    """Project counters materialized for project list endpoints, see projects.functions.project_counters"""
+
+    project = models.OneToOneField(
+        Project, primary_key=True, on_delete=models.CASCADE, related_name='counters', help_text='Project ID'
+    )
+    task_number = models.IntegerField(_('task number'), default=0, help_text='Total task number in project')
+    finished_task_number = models.IntegerField(_('finished task number'), default=0, help_text='Finished tasks')
+    total_predictions_number = models.IntegerField(
+        _('total predictions number'), default=0, help_text='Total predictions number in project'
+    )
+    total_annotations_number = models.IntegerField(
+        _('total annotations number'), default=0, help_text='Total annotations number in project without skipped'
+    )
+    num_tasks_with_annotations = models.IntegerField(
+        _('num tasks with annotations'), default=0, help_text='Tasks with annotations count'
+    )
+    useful_annotation_number = models.IntegerField(
+        _('useful annotation number'), default=0, help_text='Useful annotation number in project'
+    )
+    ground_truth_number = models.IntegerField(
+        _('ground truth number'), default=0, help_text='Honeypot annotation number in project'
+    )
+    skipped_annotations_number = models.IntegerField(
+        _('skipped annotations number'), default=0, help_text='Skipped by collaborators annotation number in project'
+    )
+    is_stale = models.BooleanField(_('is stale'), default=True, help_text='Counters must be recalculated')
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True, help_text='Last update time')
+
+
 class ProjectSummary(models.Model):
 
     project = AutoOneToOneField(Project, primary_key=True, on_delete=models.CASCADE, related_name='summary')
@@ -1306,11 +1365,15 @@ class ProjectSummary(models.Model):
         _('created labels in drafts'), null=True, default=dict, help_text='Unique drafts labels'
     )
 
+    # fields updated by pending counter deltas
+    SUMMARY_DELTAS_FIELDS = ['created_annotations', 'created_labels', 'all_data_columns', 'common_data_columns']
+
     def has_permission(self, user):
         user.project = self.project  # link for activity log
         return self.project.has_permission(user)
 
     def reset(self, tasks_data_based=True):
+        self.drop_summary_deltas()
         if tasks_data_based:
             self.all_data_columns = {}
             self.common_data_columns = []
@@ -1319,9 +1382,89 @@ class ProjectSummary(models.Model):
         self.created_labels_drafts = {}
         self.save()
 
-    def update_data_columns(self, tasks):
-        common_data_columns = set()
+    def fold_summary_deltas(self):
+        """Apply pending counter deltas recorded by deferred updates, see projects.functions.summary_deltas
+
+        Deltas are popped while the summary row is locked, so concurrent folds don't apply them twice
+        or overwrite each other.
+        """
+        if not summary_deltas_enabled():
+            return
+        with transaction.atomic():
+            summary = ProjectSummary.objects.select_for_update().get(pk=self.pk)
+            try:
+                deltas = pop_summary_deltas(self.project_id)
+            except Exception as e:
+                logger.error(f'Failed to fold summary deltas for project {self.project_id}: {e}')
+                return
+            if deltas:
+                try:
+                    summary._apply_summary_deltas(deltas)
+                except Exception:
+                    # popped deltas would be lost otherwise
+                    restore_summary_deltas(self.project_id, deltas)
+                    raise
+        self._copy_summary_counters(summary)
+
+    def drop_summary_deltas(self):
+        """Forget pending counter deltas, e.g. when the summary is recalculated from scratch"""
+        if not summary_deltas_enabled():
+            return
+        try:
+            pop_summary_deltas(self.project_id)
+        except Exception as e:
+            logger.error(f'Failed to drop summary deltas for project {self.project_id}: {e}')
+
+    def apply_summary_deltas(self, deltas):
+        """Add counter deltas with (kind, *names) keys to the locked summary row and remove counters reaching zero"""
+        with transaction.atomic():
+            summary = ProjectSummary.objects.select_for_update().get(pk=self.pk)
+            summary._apply_summary_deltas(deltas)
+        self._copy_summary_counters(summary)
+
+    def _copy_summary_counters(self, summary):
+        for field in self.SUMMARY_DELTAS_FIELDS:
+            setattr(self, field, getattr(summary, field))
+
+    def _apply_summary_deltas(self, deltas):
+        def add(counters, key, value):
+            counters[key] = counters.get(key, 0) + value
+            if counters[key] <= 0:
+                counters.pop(key)
+                return False
+            return True
+
+        created_annotations = dict(self.created_annotations)
+        created_labels = {from_name: dict(labels) for from_name, labels in self.created_labels.items()}
         all_data_columns = dict(self.all_data_columns)
+        removed_columns = set()
+        for key, value in deltas.items():
+            if key[0] == ANNOTATIONS:
+                add(created_annotations, key[1], value)
+            elif key[0] == LABELS:
+                labels = created_labels.setdefault(key[1], {})
+                add(labels, key[2], value)
+                if not labels:
+                    created_labels.pop(key[1])
+            elif key[0] == COLUMNS:
+                if not add(all_data_columns, key[1], value):
+                    removed_columns.add(key[1])
+
+        self.created_annotations = created_annotations
+        self.created_labels = created_labels
+        self.all_data_columns = all_data_columns
+        self.common_data_columns = [
+            column for column in self.common_data_columns or [] if column not in removed_columns
+        ]
+        self.save(update_fields=self.SUMMARY_DELTAS_FIELDS)
+
+    def update_data_columns(self, tasks, deferred=False):
+        """Count data columns of new tasks
+
+        :param deferred: record counters as pending deltas, if they are enabled
+        """
+        common_data_columns = set()
+        deltas = Counter()
         for task in tasks:
             try:
                 task_data = get_attr_or_item(task, 'data')
@@ -1329,20 +1472,46 @@ class ProjectSummary(models.Model):
                 task_data = task
             task_data_keys = task_data.keys()
             for column in task_data_keys:
-                all_data_columns[column] = all_data_columns.get(column, 0) + 1
+                deltas[(COLUMNS, column)] += 1
             if not common_data_columns:
                 common_data_columns = set(task_data_keys)
             else:
                 common_data_columns &= set(task_data_keys)
 
-        self.all_data_columns = all_data_columns
         if not self.common_data_columns:
-            self.common_data_columns = list(sorted(common_data_columns))
+            common_data_columns = list(sorted(common_data_columns))
         else:
-            self.common_data_columns = list(sorted(set(self.common_data_columns) & common_data_columns))
+            common_data_columns = list(sorted(set(self.common_data_columns) & common_data_columns))
+
+        if deferred and summary_deltas_enabled():
+            record_summary_deltas(self.project_id, deltas)
+            # common columns change rarely, so the summary row is mostly untouched
+            if common_data_columns != self.common_data_columns:
+                self.common_data_columns = common_data_columns
+                self.save(update_fields=['common_data_columns'])
+            return
+
+        all_data_columns = dict(self.all_data_columns)
+        for (_kind, column), count in deltas.items():
+            all_data_columns[column] = all_data_columns.get(column, 0) + count
+        self.all_data_columns = all_data_columns
+        self.common_data_columns = common_data_columns
         self.save(update_fields=['all_data_columns', 'common_data_columns'])
 
-    def remove_data_columns(self, tasks):
+    def remove_data_columns(self, tasks, deferred=False):
+        """Decrease data columns counters of removed tasks
+
+        :param deferred: record counters as pending deltas, if they are enabled
+        """
+        if deferred and summary_deltas_enabled():
+            deltas = Counter()
+            for task in tasks:
+                for column in get_attr_or_item(task, 'data').keys():
+                    deltas[(COLUMNS, column)] -= 1
+            record_summary_deltas(self.project_id, deltas)
+            return
+
+        self.fold_summary_deltas()
         all_data_columns = dict(self.all_data_columns)
         keys_to_remove = []
 
@@ -1402,7 +1571,32 @@ class ProjectSummary(models.Model):
                 labels.append(str(label))
         return labels
 
-    def update_created_annotations_and_labels(self, annotations):
+    def count_annotations_and_labels(self, annotations, sign=1):
+        """Count annotation types and labels as summary deltas with (kind, *names) keys"""
+        deltas = Counter()
+        for annotation in annotations:
+            results = get_attr_or_item(annotation, 'result') or []
+            if not isinstance(results, list):
+                continue
+
+            for result in results:
+                key = self._get_annotation_key(result)
+                if not key:
+                    continue
+                deltas[(ANNOTATIONS, key)] += sign
+                for label in self._get_labels(result):
+                    deltas[(LABELS, result['from_name'], label)] += sign
+        return deltas
+
+    def update_created_annotations_and_labels(self, annotations, deferred=False):
+        """Count annotation types and labels of new annotations
+
+        :param deferred: record counters as pending deltas, if they are enabled
+        """
+        if deferred and summary_deltas_enabled():
+            record_summary_deltas(self.project_id, self.count_annotations_and_labels(annotations))
+            return
+
         created_annotations = dict(self.created_annotations)
         labels = dict(self.created_labels)
         for annotation in annotations:
@@ -1431,7 +1625,17 @@ class ProjectSummary(models.Model):
         self.created_labels = labels
         self.save(update_fields=['created_annotations', 'created_labels'])
 
-    def remove_created_annotations_and_labels(self, annotations):
+    def remove_created_annotations_and_labels(self, annotations, deferred=False):
+        """Decrease annotation types and labels counters of removed annotations
+
+        :param deferred: record counters as pending deltas, if they are enabled
+        """
+        if deferred and summary_deltas_enabled():
+            record_summary_deltas(self.project_id, self.count_annotations_and_labels(annotations, sign=-1))
+            return
+
+        # pending deltas must be applied before counters are reset
+        self.fold_summary_deltas()
         # we are going to remove all annotations, so we'll reset the corresponding fields on the summary
         remove_all_annotations = self.project.annotations.count() == len(annotations)
         created_annotations, created_labels = (
@@ -2,8 +2,8 @@
 """
 import bleach
 from constants import SAFE_HTML_ATTRIBUTES, SAFE_HTML_TAGS
+from core.label_config import get_label_interface
 from django.db.models import Q
-from label_studio_sdk.label_interface import LabelInterface
 from label_studio_sdk.label_interface.control_tags import (
     BrushLabelsTag,
     BrushTag,
@@ -111,7 +111,7 @@ class ProjectSerializer(FlexFieldsModelSerializer):
 
     @staticmethod
     def get_config_suitable_for_bulk_annotation(project) -> bool:
-        li = LabelInterface(project.label_config)
+        li = get_label_interface(project.label_config)
 
         # List of tags that should not be present
         disallowed_tags = [
@@ -131,6 +131,14 @@ logger = logging.getLogger(__name__)
                 '* **ordering**: list of fields to order by. Currently, ordering is supported by only one parameter. <br/>\n'
                 '                   Example: `["completed_at"]`',
             ),
+            OpenApiParameter(
+                name='cursor',
+                type=OpenApiTypes.STR,
+                location='query',
+                description='Use keyset pagination instead of page numbers: pass an empty cursor to get the first page '
+                'and `next_cursor` from the previous response to get the next one. Totals are returned with the first '
+                'page only.',
+            ),
         ],
         responses={
             '200': OpenApiResponse(
@@ -158,6 +166,11 @@ logger = logging.getLogger(__name__)
                             'description': 'Total number of predictions',
                             'type': 'integer',
                         },
+                        'next_cursor': {
+                            'description': 'Cursor of the next page for keyset pagination, null for the last page',
+                            'type': 'string',
+                            'nullable': True,
+                        },
                     },
                 },
             )
@@ -353,6 +366,8 @@ class TaskAPI(generics.RetrieveUpdateDestroyAPIView):
         project = self.request.query_params.get('project') or self.request.data.get('project')
         if not project:
             project = task.project.id
+            # reuse fetched project instead of getting it again by id
+            kwargs['project'] = task.project
         return self.prefetch(
             Task.prepared.get_queryset(
                 prepare_params=PrepareParams(project=project, selectedItems=selected, request=self.request), **kwargs
@@ -12,6 +12,7 @@ from data_export.mixins import ExportMixin
 from data_export.models import DataExport
 from data_export.serializers import ExportDataSerializer
 from data_manager.managers import TaskQuerySet
+from data_manager.results_projection import results_projection_enabled, update_results_projection
 from django.conf import settings
 from django.db.models import Count, F, Q
 from django.db.models.lookups import GreaterThanOrEqual
@@ -196,6 +197,9 @@ def update_tasks_counters(queryset, from_scratch=True):
             Q(total_annotations__gt=0) | Q(cancelled_annotations__gt=0) | Q(total_predictions__gt=0)
         )
 
+    if results_projection_enabled():
+        update_results_projection(queryset.values_list('id', flat=True))
+
     # filter our tasks with 0 annotations and 0 predictions and update them with 0
     queryset.filter(annotations__isnull=True, predictions__isnull=True).update(
         total_annotations=0, cancelled_annotations=0, total_predictions=0
@@ -0,0 +1,296 @@
+"""
+Task lock backends.
+
+Locks keep a task reserved for annotators who took it in the label stream, up to the task overlap.
+By default locks are `TaskLock` rows: every next task call counts them per task and deletes expired rows,
+so busy projects produce a lot of table churn.
+
+The Redis backend keeps locks of a task in a sorted set of user ids scored by expiration timestamps,
+plus a sorted set of locked task ids per user. Counting not expired locks is a single ZCOUNT,
+lock acquisition checks the overlap and adds the lock in one optimistic transaction, and expired
+locks are trimmed on the next acquisition or disappear together with the key, without DELETE queries.
+
+The backend is selected by TASK_LOCK_BACKEND. Locks are not migrated between backends,
+so existing locks are ignored for their TTL after switching.
+"""
+
+import datetime
+import logging
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from core.redis import redis_connected
+from django.conf import settings
+from django.db.models import Count, QuerySet
+from django.utils.timezone import now
+from django_rq import get_connection
+
+logger = logging.getLogger(__name__)
+
+TASK_LOCK_BACKEND_DB = 'db'
+TASK_LOCK_BACKEND_REDIS = 'redis'
+
+# Redis keys
+TASK_LOCKS_KEY_PREFIX = 'task_locks'
+TASK_LOCK_IDS_KEY_PREFIX = 'task_lock_ids'
+USER_TASK_LOCKS_KEY_PREFIX = 'user_task_locks'
+
+
+class TaskLockBackend:
+    """Storage of task locks, only not expired locks are counted and returned"""
+
+    def acquire(self, task, user, ttl: int, limit: int) -> bool:
+        """Lock the task by the user for `ttl` seconds if the task has less than `limit` locks,
+        the existing lock of the user is prolonged
+
+        :return: True if the lock is acquired
+        """
+        raise NotImplementedError
+
+    def release(self, task, user=None) -> None:
+        """Release the user lock of the task or all task locks if user is not specified"""
+        raise NotImplementedError
+
+    def release_user_locks(self, user) -> None:
+        """Release all locks of the user"""
+        raise NotImplementedError
+
+    def clear_expired(self, task) -> None:
+        """Remove expired locks of the task from the storage"""
+
+    def count(self, task, exclude_user=None) -> int:
+        """Count task locks, optionally without the lock of `exclude_user`"""
+        raise NotImplementedError
+
+    def count_many(self, task_ids: Iterable[int], exclude_user=None) -> Dict[int, int]:
+        """Count locks of many tasks at once
+
+        :return: Dict task id => number of locks, tasks without locks may be missing
+        """
+        raise NotImplementedError
+
+    def get_locks(self, task) -> List[Tuple[int, datetime.datetime]]:
+        """Get (user id, expire at) pairs of task locks"""
+        raise NotImplementedError
+
+    def get_lock_id(self, task, user) -> Optional[str]:
+        """Get unique id of the user lock, it's used by the frontend to identify the lock"""
+        raise NotImplementedError
+
+    def filter_locked_by(self, tasks: QuerySet, user) -> QuerySet:
+        """Narrow tasks down to those locked by the user"""
+        raise NotImplementedError
+
+
+class DatabaseTaskLockBackend(TaskLockBackend):
+    """Locks stored as TaskLock rows"""
+
+    def acquire(self, task, user, ttl, limit):
+        from tasks.models import TaskLock
+
+        if self.count(task) >= limit:
+            return False
+
+        expire_at = now() + datetime.timedelta(seconds=ttl)
+        try:
+            task_lock = TaskLock.objects.get(task=task, user=user)
+        except TaskLock.DoesNotExist:
+            TaskLock.objects.create(task=task, user=user, expire_at=expire_at)
+        else:
+            task_lock.expire_at = expire_at
+            task_lock.save()
+        return True
+
+    def release(self, task, user=None):
+        if user is not None:
+            task.locks.filter(user=user).delete()
+        else:
+            task.locks.all().delete()
+
+    def release_user_locks(self, user):
+        user.task_locks.all().delete()
+
+    def clear_expired(self, task):
+        task.locks.filter(expire_at__lt=now()).delete()
+
+    def count(self, task, exclude_user=None):
+        locks = task.locks.filter(expire_at__gt=now())
+        if exclude_user is not None:
+            locks = locks.exclude(user=exclude_user)
+        return locks.count()
+
+    def count_many(self, task_ids, exclude_user=None):
+        from tasks.models import TaskLock
+
+        locks = TaskLock.objects.filter(task_id__in=list(task_ids), expire_at__gt=now())
+        if exclude_user is not None:
+            locks = locks.exclude(user=exclude_user)
+        return dict(locks.values('task_id').annotate(num=Count('id')).values_list('task_id', 'num'))
+
+    def get_locks(self, task):
+        return list(task.locks.values_list('user', 'expire_at'))
+
+    def get_lock_id(self, task, user):
+        lock = task.locks.filter(user=user).first()
+        if lock:
+            return lock.unique_id
+
+    def filter_locked_by(self, tasks, user):
+        return tasks.filter(locks__user=user, locks__expire_at__gt=now())
+
+
+class RedisTaskLockBackend(TaskLockBackend):
+    """Locks stored in Redis sorted sets scored by expiration timestamps"""
+
+    @staticmethod
+    def _get_task_key(task_id: int) -> str:
+        """Get Redis key for the sorted set of user ids locking the task"""
+        return f'{TASK_LOCKS_KEY_PREFIX}:{task_id}'
+
+    @staticmethod
+    def _get_lock_ids_key(task_id: int) -> str:
+        """Get Redis key for the hash of user id => unique lock id"""
+        return f'{TASK_LOCK_IDS_KEY_PREFIX}:{task_id}'
+
+    @staticmethod
+    def _get_user_key(user_id: int) -> str:
+        """Get Redis key for the sorted set of task ids locked by the user"""
+        return f'{USER_TASK_LOCKS_KEY_PREFIX}:{user_id}'
+
+    @staticmethod
+    def _not_expired(timestamp: float) -> str:
+        """Min score of not expired locks, exclusive"""
+        return f'({timestamp}'
+
+    def acquire(self, task, user, ttl, limit):
+        connection = get_connection()
+        task_key = self._get_task_key(task.id)
+        lock_ids_key = self._get_lock_ids_key(task.id)
+        user_key = self._get_user_key(user.id)
+
+        def _acquire(pipeline):
+            current = time.time()
+            if pipeline.zcount(task_key, self._not_expired(current), '+inf') >= limit:
+                return False
+            expired_user_ids = pipeline.zrangebyscore(task_key, '-inf', current)
+            # keys live as long as their longest lock
+            key_ttl = max(ttl, pipeline.ttl(task_key))
+            user_key_ttl = max(ttl, pipeline.ttl(user_key))
+
+            pipeline.multi()
+            pipeline.zremrangebyscore(task_key, '-inf', current)
+            pipeline.zadd(task_key, {user.id: current + ttl})
+            pipeline.expire(task_key, key_ttl)
+            if expired_user_ids:
+                pipeline.hdel(lock_ids_key, *expired_user_ids)
+            pipeline.hsetnx(lock_ids_key, user.id, str(uuid.uuid4()))
+            pipeline.expire(lock_ids_key, key_ttl)
+            pipeline.zremrangebyscore(user_key, '-inf', current)
+            pipeline.zadd(user_key, {task.id: current + ttl})
+            pipeline.expire(user_key, user_key_ttl)
+            return True
+
+        # the transaction is retried if another annotator changes task locks concurrently
+        return connection.transaction(_acquire, task_key, value_from_callable=True)
+
+    def release(self, task, user=None):
+        connection = get_connection()
+        task_key = self._get_task_key(task.id)
+        if user is not None:
+            user_ids = [user.id]
+        else:
+            user_ids = [int(user_id) for user_id in connection.zrange(task_key, 0, -1)]
+
+        pipeline = connection.pipeline()
+        if user is not None:
+            pipeline.zrem(task_key, user.id)
+            pipeline.hdel(self._get_lock_ids_key(task.id), user.id)
+        else:
+            pipeline.delete(task_key, self._get_lock_ids_key(task.id))
+        for user_id in user_ids:
+            pipeline.zrem(self._get_user_key(user_id), task.id)
+        pipeline.execute()
+
+    def release_user_locks(self, user):
+        connection = get_connection()
+        user_key = self._get_user_key(user.id)
+        task_ids = [int(task_id) for task_id in connection.zrange(user_key, 0, -1)]
+
+        pipeline = connection.pipeline()
+        for task_id in task_ids:
+            pipeline.zrem(self._get_task_key(task_id), user.id)
+            pipeline.hdel(self._get_lock_ids_key(task_id), user.id)
+        pipeline.delete(user_key)
+        pipeline.execute()
+
+    def count(self, task, exclude_user=None):
+        return self.count_many([task.id], exclude_user).get(task.id, 0)
+
+    def count_many(self, task_ids, exclude_user=None):
+        task_ids = list(task_ids)
+        current = time.time()
+        pipeline = get_connection().pipeline(transaction=False)
+        for task_id in task_ids:
+            pipeline.zcount(self._get_task_key(task_id), self._not_expired(current), '+inf')
+            if exclude_user is not None:
+                pipeline.zscore(self._get_task_key(task_id), exclude_user.id)
+        results = iter(pipeline.execute())
+
+        counts = {}
+        for task_id in task_ids:
+            num = next(results)
+            if exclude_user is not None:
+                user_score = next(results)
+                if user_score is not None and user_score > current:
+                    num -= 1
+            counts[task_id] = num
+        return counts
+
+    def get_locks(self, task):
+        locks = get_connection().zrangebyscore(
+            self._get_task_key(task.id), self._not_expired(time.time()), '+inf', withscores=True
+        )
+        return [
+            (int(user_id), datetime.datetime.fromtimestamp(score, tz=datetime.timezone.utc))
+            for user_id, score in locks
+        ]
+
+    def get_lock_id(self, task, user):
+        connection = get_connection()
+        score = connection.zscore(self._get_task_key(task.id), user.id)
+        if score is None or score <= time.time():
+            return None
+        lock_id = connection.hget(self._get_lock_ids_key(task.id), user.id)
+        return lock_id.decode() if lock_id is not None else None
+
+    def filter_locked_by(self, tasks, user):
+        task_ids = get_connection().zrangebyscore(self._get_user_key(user.id), self._not_expired(time.time()), '+inf')
+        return tasks.filter(pk__in=[int(task_id) for task_id in task_ids])
+
+
+_db_backend = DatabaseTaskLockBackend()
+_redis_backend = RedisTaskLockBackend()
+
+
+def get_task_lock_backend() -> TaskLockBackend:
+    """Get the configured task lock backend, Redis backend falls back to the database if Redis is not connected"""
+    if settings.TASK_LOCK_BACKEND == TASK_LOCK_BACKEND_REDIS and redis_connected():
+        return _redis_backend
+    return _db_backend
+
+
+def get_fully_locked_task_ids(tasks: Iterable[Tuple[int, int]], user) -> set:
+    """Get ids of tasks locked by other users up to the task overlap, using one lock backend call
+
+    Such tasks are locked for the user regardless of annotations, so the label stream can skip them
+    before checking the rest one by one.
+
+    :param tasks: (task id, overlap) pairs
+    :param user: User looking for the next task
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return set()
+    num_locks = get_task_lock_backend().count_many([task_id for task_id, _ in tasks], exclude_user=user)
+    return {task_id for task_id, overlap in tasks if num_locks.get(task_id, 0) >= overlap}
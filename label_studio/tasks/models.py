@@ -1,7 +1,6 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 import base64
-import datetime
 import logging
 import numbers
 import os
@@ -26,7 +25,9 @@ from core.utils.common import (
 from core.utils.db import batch_delete, fast_first
 from core.utils.params import get_env
 from data_import.models import FileUpload
+from data_manager.counts import invalidate_task_counts
 from data_manager.managers import PreparedTaskManager, TaskManager
+from data_manager.results_projection import update_results_projection
 from django.conf import settings
 from django.db import OperationalError, models, transaction
 from django.db.models import CheckConstraint, F, JSONField, Q
@@ -35,11 +36,11 @@ from django.db.models.signals import post_delete, post_save, pre_delete, pre_sav
 from django.dispatch import Signal, receiver
 from django.urls import reverse
 from django.utils.timesince import timesince
-from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from label_studio_sdk.label_interface.objects import PredictionValue
 from rest_framework.exceptions import ValidationError
 from tasks.choices import ActionType
+from tasks.locks import get_task_lock_backend
 
 logger = logging.getLogger(__name__)
 
@@ -195,18 +196,12 @@ class Task(TaskMixin, models.Model):
     @classmethod
     def get_locked_by(cls, user, project=None, tasks=None):
         """Retrieve the task locked by specified user. Returns None if the specified user didn't lock anything."""
-        lock = None
         if project is not None:
-            lock = fast_first(TaskLock.objects.filter(user=user, expire_at__gt=now(), task__project=project))
-        elif tasks is not None:
-            locked_task = fast_first(tasks.filter(locks__user=user, locks__expire_at__gt=now()))
-            if locked_task:
-                return locked_task
-        else:
+            tasks = cls.objects.filter(project=project)
+        elif tasks is None:
             raise Exception('Neither project or tasks passed to get_locked_by')
 
-        if lock:
-            return lock.task
+        return fast_first(get_task_lock_backend().filter_locked_by(tasks, user))
 
     def get_predictions_for_prelabeling(self):
         """This is called to return either new predictions from the
@@ -296,7 +291,7 @@ class Task(TaskMixin, models.Model):
                 f'Num takes={num} > overlap={self.overlap} for task={self.id}, '
                 f"skipped mode {self.project.skip_queue} - it's a bug",
                 extra=dict(
-                    lock_ttl=self.locks.values_list('user', 'expire_at'),
+                    lock_ttl=get_task_lock_backend().get_locks(self),
                     num_locks=num_locks,
                     num_annotations=num_annotations,
                 ),
@@ -317,7 +312,7 @@ class Task(TaskMixin, models.Model):
 
     @property
     def num_locks(self):
-        return self.locks.filter(expire_at__gt=now()).count()
+        return get_task_lock_backend().count(self)
 
     def overlap_with_agreement_threshold(self, num, num_locks):
         # Limit to one extra annotator at a time when the task is under the threshold and meets the overlap criteria,
@@ -343,7 +338,7 @@ class Task(TaskMixin, models.Model):
         return self.overlap
 
     def num_locks_user(self, user):
-        return self.locks.filter(expire_at__gt=now()).exclude(user=user).count()
+        return get_task_lock_backend().count(self, exclude_user=user)
 
     def get_storage_filename(self):
         for link_name in settings.IO_STORAGES_IMPORT_LINK_NAMES:
@@ -357,35 +352,26 @@ class Task(TaskMixin, models.Model):
         return mixin_has_permission and self.project.has_permission(user)
 
     def clear_expired_locks(self):
-        self.locks.filter(expire_at__lt=now()).delete()
+        get_task_lock_backend().clear_expired(self)
 
     def set_lock(self, user):
         """Lock current task by specified user. Lock lifetime is set by `expire_in_secs`"""
         from projects.functions.next_task import get_next_task_logging_level
 
-        num_locks = self.num_locks
-        if num_locks < self.overlap:
-            lock_ttl = settings.TASK_LOCK_TTL
-            if (
-                flag_set('fflag_feat_all_leap_1534_custom_task_lock_timeout_short', user=user)
-                and self.project.custom_task_lock_ttl
-            ):
-                lock_ttl = self.project.custom_task_lock_ttl
-            expire_at = now() + datetime.timedelta(seconds=lock_ttl)
-            try:
-                task_lock = TaskLock.objects.get(task=self, user=user)
-            except TaskLock.DoesNotExist:
-                TaskLock.objects.create(task=self, user=user, expire_at=expire_at)
-            else:
-                task_lock.expire_at = expire_at
-                task_lock.save()
+        lock_ttl = settings.TASK_LOCK_TTL
+        if (
+            flag_set('fflag_feat_all_leap_1534_custom_task_lock_timeout_short', user=user)
+            and self.project.custom_task_lock_ttl
+        ):
+            lock_ttl = self.project.custom_task_lock_ttl
+        if get_task_lock_backend().acquire(self, user, lock_ttl, self.overlap):
             logger.log(
                 get_next_task_logging_level(user),
                 f'User={user} acquires a lock for the task={self} ttl: {lock_ttl}',
             )
         else:
             logger.error(
-                f'Current number of locks for task {self.id} is {num_locks}, but overlap={self.overlap}: '
+                f'Current number of locks for task {self.id} is {self.num_locks}, but overlap={self.overlap}: '
                 f"that's a bug because this task should not be taken in a label stream (task should be locked)"
             )
         self.clear_expired_locks()
@@ -395,10 +381,7 @@ class Task(TaskMixin, models.Model):
         If user specified, it checks whether lock is released by the user who previously has locked that task
         """
 
-        if user is not None:
-            self.locks.filter(user=user).delete()
-        else:
-            self.locks.all().delete()
+        get_task_lock_backend().release(self, user)
         self.clear_expired_locks()
 
     def get_storage_link(self):
@@ -508,12 +491,12 @@ class Task(TaskMixin, models.Model):
     def increase_project_summary_counters(self):
         if hasattr(self.project, 'summary'):
             summary = self.project.summary
-            summary.update_data_columns([self])
+            summary.update_data_columns([self], deferred=True)
 
     def decrease_project_summary_counters(self):
         if hasattr(self.project, 'summary'):
             summary = self.project.summary
-            summary.remove_data_columns([self])
+            summary.remove_data_columns([self], deferred=True)
 
     def ensure_unique_groundtruth(self, annotation_id):
         self.annotations.exclude(id=annotation_id).update(ground_truth=False)
@@ -733,13 +716,13 @@ class Annotation(AnnotationMixin, models.Model):
         if hasattr(self.project, 'summary'):
             logger.debug(f'Increase project.summary counters from {self}')
             summary = self.project.summary
-            summary.update_created_annotations_and_labels([self])
+            summary.update_created_annotations_and_labels([self], deferred=True)
 
     def decrease_project_summary_counters(self):
         if hasattr(self.project, 'summary'):
             logger.debug(f'Decrease project.summary counters from {self}')
             summary = self.project.summary
-            summary.remove_created_annotations_and_labels([self])
+            summary.remove_created_annotations_and_labels([self], deferred=True)
 
     def update_task(self):
         update_fields = ['updated_at']
@@ -1308,6 +1291,15 @@ def update_project_summary_annotations_and_is_labeled(sender, instance, created,
     logger.debug(f'Updated total_annotations and cancelled_annotations for {instance.task.id}.')
 
 
+@receiver(post_save, sender=Annotation)
+def remove_labeled_task_from_next_task_queue(sender, instance, **kwargs):
+    """Labeled tasks are not candidates for the label stream anymore"""
+    from projects.functions.next_task_queue import remove_tasks_from_next_task_queue
+
+    if instance.task.is_labeled:
+        remove_tasks_from_next_task_queue(instance.task.project_id, [instance.task_id])
+
+
 @receiver(pre_delete, sender=Prediction)
 def remove_predictions_from_project(sender, instance, **kwargs):
     """Remove predictions counters"""
@@ -1327,6 +1319,42 @@ def save_predictions_to_project(sender, instance, **kwargs):
 # =========== END OF PROJECT SUMMARY UPDATES ===========
 
 
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Annotation)
+@receiver(post_delete, sender=Annotation)
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def invalidate_data_manager_task_counts(sender, instance, **kwargs):
+    """Task counts cached for the Data Manager are stale after any task, annotation or prediction change"""
+    invalidate_task_counts(instance.project_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Annotation)
+@receiver(post_delete, sender=Annotation)
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def mark_project_counters_stale_on_change(sender, instance, **kwargs):
+    """Materialized project list counters are stale after any task, annotation or prediction change"""
+    from projects.functions.project_counters import mark_project_counters_stale
+
+    mark_project_counters_stale(instance.project_id)
+
+
+@receiver(post_save, sender=Annotation)
+@receiver(post_delete, sender=Annotation)
+@receiver(post_save, sender=Prediction)
+@receiver(post_delete, sender=Prediction)
+def update_data_manager_results_projection(sender, instance, signal, update_fields=None, **kwargs):
+    """Keep results text used by Data Manager filters in sync with annotations and predictions"""
+    if update_fields is not None and 'result' not in update_fields:
+        return
+    # the task can be deleted together with its annotations, so existing projection is only updated on delete
+    update_results_projection([instance.task_id], create=signal is post_save)
+
+
 @receiver(post_save, sender=Annotation)
 def delete_draft(sender, instance, **kwargs):
     task = instance.task
@@ -1385,6 +1413,8 @@ def deprecated_bulk_update_stats_project_tasks(tasks, project=None):
     :param tasks:
     :return:
     """
+    from projects.functions.project_counters import mark_project_counters_stale
+
     # recalc accuracy
     if not tasks:
         # break if tasks is empty
@@ -1392,6 +1422,8 @@ def deprecated_bulk_update_stats_project_tasks(tasks, project=None):
     # get project if it's not in params
     if project is None:
         project = tasks[0].project
+    invalidate_task_counts(project.id)
+    mark_project_counters_stale(project.id)
 
     with transaction.atomic():
         use_overlap = project._can_use_overlap()
@@ -1428,6 +1460,7 @@ def deprecated_bulk_update_stats_project_tasks(tasks, project=None):
 
 def bulk_update_stats_project_tasks(tasks, project=None):
     # Avoid circular import
+    from projects.functions.project_counters import mark_project_counters_stale
     from projects.functions.utils import get_unique_ids_list
 
     bulk_update_is_labeled = load_func(settings.BULK_UPDATE_IS_LABELED)
@@ -1443,6 +1476,8 @@ def bulk_update_stats_project_tasks(tasks, project=None):
             project = first_task.project
 
         bulk_update_is_labeled(task_ids, project)
+        invalidate_task_counts(project.id)
+        mark_project_counters_stale(project.id)
     else:
         return deprecated_bulk_update_stats_project_tasks(tasks, project)
 
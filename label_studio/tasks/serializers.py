@@ -4,13 +4,12 @@ import logging
 
 import ujson as json
 from core.feature_flags import flag_set
-from core.label_config import replace_task_data_undefined_with_config_field
+from core.label_config import get_label_interface, replace_task_data_undefined_with_config_field
 from core.utils.common import load_func, retry_database_locked
 from core.utils.db import fast_first
 from django.conf import settings
 from django.db import IntegrityError, transaction
 from drf_spectacular.utils import extend_schema_field
-from label_studio_sdk.label_interface import LabelInterface
 from projects.models import Project
 from rest_flex_fields import FlexFieldsModelSerializer
 from rest_framework import generics, serializers
@@ -19,6 +18,7 @@ from rest_framework.fields import SkipField
 from rest_framework.serializers import ModelSerializer
 from rest_framework.settings import api_settings
 from tasks.exceptions import AnnotationDuplicateError
+from tasks.locks import get_task_lock_backend
 from tasks.models import Annotation, AnnotationDraft, Prediction, PredictionMeta, Task
 from tasks.validation import TaskValidator
 from users.models import User
@@ -96,7 +96,7 @@ class PredictionSerializer(ModelSerializer):
             raise ValidationError('Project is required for prediction validation')
 
         # Validate prediction using LabelInterface
-        li = LabelInterface(project.label_config)
+        li = get_label_interface(project.label_config)
         validation_errors = li.validate_prediction(data, return_errors=True)
 
         if validation_errors:
@@ -472,7 +472,7 @@ class BaseTaskSerializerBulk(serializers.ListSerializer):
                 # Validate prediction only when project label config is not default
                 if should_validate:
                     try:
-                        li = LabelInterface(self.project.label_config) if should_validate else None
+                        li = get_label_interface(self.project.label_config) if should_validate else None
                         validation_errors_list = li.validate_prediction(prediction, return_errors=True)
 
                         if validation_errors_list:
@@ -771,9 +771,7 @@ class NextTaskSerializer(TaskWithAnnotationsAndPredictionsAndDraftsSerializer):
 
     def get_unique_lock_id(self, task):
         user = self.context['request'].user
-        lock = task.locks.filter(user=user).first()
-        if lock:
-            return lock.unique_id
+        return get_task_lock_backend().get_lock_id(task, user)
 
     def get_predictions(self, task):
         predictions = task.get_predictions_for_prelabeling()
@@ -3,8 +3,10 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 from data_import.models import FileUpload
+from django.core.files.base import ContentFile
 from organizations.tests.factories import OrganizationFactory
 from projects.tests.factories import ProjectFactory
+from rest_framework.exceptions import ValidationError
 from users.tests.factories import UserFactory
 
 pytestmark = pytest.mark.django_db
@@ -34,12 +36,12 @@ class TestStreamingImport:
             mock_file_upload1 = MagicMock()
             mock_file_upload1.format = '.json'
             mock_file_upload1.id = 1
-            mock_file_upload1.read_tasks.return_value = [{'data': {'text': f'Task {i}'}} for i in range(10)]
+            mock_file_upload1.iter_tasks.return_value = iter([{'data': {'text': f'Task {i}'}} for i in range(10)])
 
             mock_file_upload2 = MagicMock()
             mock_file_upload2.format = '.json'
             mock_file_upload2.id = 2
-            mock_file_upload2.read_tasks.return_value = [{'data': {'text': f'Task {i+10}'}} for i in range(10)]
+            mock_file_upload2.iter_tasks.return_value = iter([{'data': {'text': f'Task {i+10}'}} for i in range(10)])
 
             mock_filter.return_value = [mock_file_upload1, mock_file_upload2]
 
@@ -73,3 +75,50 @@ class TestStreamingImport:
             assert len(batches[0][0]) == 0  # Empty tasks
             assert batches[0][1] == {}  # Empty formats
             assert batches[0][2] == set()  # Empty columns
+
+    @pytest.mark.parametrize(
+        'filename, content',
+        [
+            ('tasks.json', b'[{"text": "Task 0"}, {"data": {"text": "Task 1"}}, {"text": "Task 2", "score": 0.5}]'),
+            ('tasks.json', b'{"text": "Task 0"}\n{"data": {"text": "Task 1"}}\n{"text": "Task 2", "score": 0.5}\n'),
+            ('tasks.csv', b'text,score\nTask 0,\nTask 1,\nTask 2,0.5\n'),
+            ('tasks.txt', b'Task 0\nTask 1\r\nTask 2'),
+        ],
+    )
+    def test_load_tasks_from_uploaded_files_streaming_parses_files_lazily(
+        self, user, project, settings, filename, content
+    ):
+        """Test that tasks are read from real files in batches"""
+        settings.IMPORT_CSV_CHUNK_SIZE = 2
+        file_upload = FileUpload.objects.create(user=user, project=project, file=ContentFile(content, name=filename))
+
+        batches = list(FileUpload.load_tasks_from_uploaded_files_streaming(project, batch_size=2))
+
+        assert [len(batch_tasks) for batch_tasks, _, _ in batches] == [2, 1]
+        tasks = [task for batch_tasks, _, _ in batches for task in batch_tasks]
+        data_key = 'text' if filename != 'tasks.txt' else settings.DATA_UNDEFINED_NAME
+        assert [task['data'][data_key] for task in tasks] == ['Task 0', 'Task 1', 'Task 2']
+        assert all(task['file_upload_id'] == file_upload.id for task in tasks)
+        assert file_upload.read_tasks() == [{'data': task['data']} for task in tasks]
+
+    def test_read_tasks_raises_for_invalid_json(self, user, project):
+        """Test that errors found in the middle of a file are reported as validation errors"""
+        file_upload = FileUpload.objects.create(
+            user=user, project=project, file=ContentFile(b'[{"text": "Task 0"}, ["Task 1"]]', name='tasks.json')
+        )
+
+        with pytest.raises(ValidationError, match='Failed to parse input file'):
+            file_upload.read_tasks()
+
+    def test_load_tasks_from_uploaded_files_streaming_validates_file_first(self, user, project):
+        """Test that errors in the middle of a file are raised before any of its tasks is yielded"""
+        FileUpload.objects.create(
+            user=user,
+            project=project,
+            file=ContentFile(b'[{"text": "Task 0"}, {"text": "Task 1"}, {"text": "Task 2"}, ', name='tasks.json'),
+        )
+
+        batches = FileUpload.load_tasks_from_uploaded_files_streaming(project, batch_size=2)
+
+        with pytest.raises(ValidationError, match='Failed to parse input file'):
+            next(batches)
@@ -89,3 +89,26 @@ def test_cache_labels_job(source, control_tag, with_counters, expected_cache_col
             expected_cache = ', '.join(sorted(list(set(all_labels))))
 
         assert cached_labels == expected_cache
+
+
+@pytest.mark.django_db
+def test_cache_labels_job_in_chunks(settings, django_assert_max_num_queries):
+    settings.BATCH_SIZE = 2
+    User = get_user_model()
+    test_user = User.objects.create(username='test_user')
+    project = Project.objects.create(title='Test Project', created_by=test_user)
+
+    tasks = [Task.objects.create(project=project, data={'text': f'This is task {i}'}) for i in range(5)]
+    for i, task in enumerate(tasks):
+        for labels in (['Label_1'], ['Label_1', f'Label_{i + 2}']):
+            result = [{'from_name': 'label', 'to_name': 'text', 'type': 'labels', 'value': {'labels': labels}}]
+            Annotation.objects.create(task=task, project=project, completed_by=test_user, result=result)
+
+    request_data = {'source': 'annotations', 'control_tag': 'ALL', 'with_counters': 'Yes'}
+    # number of queries depends on the number of chunks, not on the number of tasks
+    with django_assert_max_num_queries(16):
+        cache_labels_job(project, Task.objects.filter(project=project), request_data=request_data)
+
+    for i, task in enumerate(tasks):
+        task.refresh_from_db()
+        assert task.data['cache_all'] == f'Label_1: 2, Label_{i + 2}: 1'
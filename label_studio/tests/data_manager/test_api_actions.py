@@ -2,8 +2,10 @@
 """
 
 import json
+from unittest import mock
 
 import pytest
+from data_manager.actions.remove_duplicates import find_duplicated_tasks_by_data
 from django.db import transaction
 from io_storages.azure_blob.models import (
     AzureBlobImportStorage,
@@ -225,6 +227,22 @@ def test_action_remove_duplicates_with_annotations(business_client, project_id):
     assert task2.annotations.filter(was_cancelled=True).count() == 1, 'was_cancelled counter wrong'
 
 
+@pytest.mark.django_db
+def test_find_duplicated_tasks_by_data_checks_hash_collisions(project_id):
+    project = Project.objects.get(pk=project_id)
+    task1 = make_task({'data': {'image': 'first.jpg', 'text': 'a'}}, project)
+    task2 = make_task({'data': {'text': 'a', 'image': 'first.jpg'}}, project)
+    task3 = make_task({'data': {'image': 'second.jpg'}}, project)
+
+    # all tasks get the same hash, but only tasks with equal data are duplicates
+    with mock.patch('data_manager.actions.remove_duplicates.hashlib') as hashlib:
+        hashlib.md5.return_value.digest.return_value = b'collision'
+        duplicates = find_duplicated_tasks_by_data(project, project.tasks.order_by('id'))
+
+    assert [[task['id'] for task in tasks] for tasks in duplicates.values()] == [[task1.id, task2.id]]
+    assert task3.id not in [task['id'] for tasks in duplicates.values() for task in tasks]
+
+
 @pytest.mark.django_db
 def test_action_cache_labels(business_client, project_id):
     """This test checks that the "cache_labels" action works correctly
@@ -1,9 +1,17 @@
 """This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
 """
 import json
+from unittest import mock
 
 import pytest
+from data_manager.counts import TaskCountPaginator
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from fakeredis import FakeRedis
 from projects.models import Project
+from tasks.models import Task
 
 from ..utils import make_annotation, make_prediction, make_task, project_id  # noqa
 
@@ -128,3 +136,149 @@ def test_views_total_counters(tasks_count, annotations_count, predictions_count,
     assert response_data['total'] == tasks_count, response_data
     assert response_data['total_annotations'] == tasks_count * annotations_count, response_data
     assert response_data['total_predictions'] == tasks_count * predictions_count, response_data
+
+
+@pytest.fixture
+def task_counts_redis():
+    redis = FakeRedis()
+    with mock.patch('data_manager.counts.redis_connected', return_value=True), mock.patch(
+        'data_manager.counts.get_connection', return_value=redis
+    ):
+        yield redis
+
+
+@pytest.mark.django_db
+@override_settings(DATA_MANAGER_COUNTS_CACHE_TTL=60)
+def test_views_total_counters_cache(business_client, project_id, task_counts_redis):
+    project = Project.objects.get(pk=project_id)
+    task_id = make_task({'data': {}}, project).id
+    make_annotation({'result': []}, task_id)
+
+    response = business_client.get(f'/api/tasks?project={project_id}')
+    response_data = response.json()
+    assert response_data['total'] == 1
+    assert response_data['total_annotations'] == 1
+
+    # bulk created tasks don't send signals, so cached counts are returned
+    Task.objects.bulk_create([Task(data={}, project=project) for _ in range(2)])
+    response_data = business_client.get(f'/api/tasks?project={project_id}').json()
+    assert response_data['total'] == 1
+    assert len(response_data['tasks']) == 3
+
+    # any task write invalidates cached counts
+    make_task({'data': {}}, project)
+    response_data = business_client.get(f'/api/tasks?project={project_id}').json()
+    assert response_data['total'] == 4
+    assert response_data['total_annotations'] == 1
+
+    # ordering doesn't change counts, so it shares the cached counts, while filters don't
+    Task.objects.bulk_create([Task(data={}, project=project)])
+    query = json.dumps({'ordering': ['-tasks:id']})
+    assert business_client.get(f'/api/tasks?project={project_id}&query={query}').json()['total'] == 4
+    filters = {
+        'conjunction': 'and',
+        'items': [{'filter': 'filter:tasks:id', 'operator': 'greater', 'type': 'Number', 'value': 0}],
+    }
+    query = json.dumps({'filters': filters})
+    assert business_client.get(f'/api/tasks?project={project_id}&query={query}').json()['total'] == 5
+
+    # the data version is shared by all processes through Redis
+    task_counts_redis.incr(f'dm:task_counts:version:{project_id}')
+    assert business_client.get(f'/api/tasks?project={project_id}').json()['total'] == 5
+
+
+@pytest.mark.django_db
+@override_settings(DATA_MANAGER_COUNTS_CACHE_TTL=60, DATA_MANAGER_ESTIMATED_COUNT_THRESHOLD=100)
+def test_views_estimated_count_skips_totals(business_client, project_id, mocker, task_counts_redis):
+    project = Project.objects.get(pk=project_id)
+    task_id = make_task({'data': {}}, project).id
+    make_annotation({'result': []}, task_id)
+    mocker.patch('data_manager.api.estimate_queryset_count', return_value=1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        response_data = business_client.get(f'/api/tasks?project={project_id}').json()
+    assert response_data['total'] == 1000
+    assert response_data['total_annotations'] is None
+    assert response_data['total_predictions'] is None
+    assert len(response_data['tasks']) == 1
+    assert not [q for q in queries if 'SUM(' in q['sql'].upper()]
+
+    # totals are cached together with the estimated count
+    response_data = business_client.get(f'/api/tasks?project={project_id}').json()
+    assert response_data['total'] == 1000
+    assert response_data['total_annotations'] is None
+
+
+def test_task_count_paginator():
+    paginator = TaskCountPaginator(list(range(10)), 4, count=2)
+    assert paginator.count == 2
+    # precalculated count doesn't limit pages
+    assert list(paginator.page(2)) == [4, 5, 6, 7]
+    assert list(paginator.page(3)) == [8, 9]
+    with pytest.raises(EmptyPage):
+        paginator.page(0)
+
+
+@pytest.mark.parametrize(
+    'ordering, sort_key',
+    [
+        ([], lambda i, task_id: task_id),
+        (['-tasks:total_annotations'], lambda i, task_id: (-(i % 2), task_id)),
+        # tasks without the data key go last
+        (['tasks:data.text'], lambda i, task_id: (i == 5, str(i % 3), task_id)),
+    ],
+)
+@pytest.mark.django_db
+def test_tasks_keyset_pagination(ordering, sort_key, business_client, project_id):
+    project = Project.objects.get(pk=project_id)
+    keys = []
+    for i in range(7):
+        # repeated and missing values check id tie-breaker and NULLs ordering
+        data = {'text': str(i % 3)} if i != 5 else {}
+        task_id = make_task({'data': data}, project).id
+        keys.append((sort_key(i, task_id), task_id))
+        for _ in range(i % 2):
+            make_annotation({'result': []}, task_id)
+    expected = [task_id for _, task_id in sorted(keys)]
+
+    query = json.dumps({'ordering': ordering})
+    response_data = business_client.get(f'/api/tasks?project={project_id}&page_size=3&query={query}&cursor=').json()
+    assert response_data['total'] == 7
+    assert response_data['total_annotations'] == 3
+    crawled = [task['id'] for task in response_data['tasks']]
+    while response_data['next_cursor'] and len(crawled) <= len(expected):
+        response = business_client.get(
+            f'/api/tasks?project={project_id}&page_size=3&query={query}&cursor={response_data["next_cursor"]}'
+        )
+        assert response.status_code == 200, response.content
+        response_data = response.json()
+        assert 'total' not in response_data
+        crawled += [task['id'] for task in response_data['tasks']]
+
+    assert crawled == expected
+
+
+@pytest.mark.django_db
+def test_tasks_keyset_pagination_invalid_cursor(business_client, project_id):
+    response = business_client.get(f'/api/tasks?project={project_id}&cursor=invalid')
+    assert response.status_code == 400, response.content
+
+
+@pytest.mark.django_db
+def test_tasks_page_reuses_ordering_annotations(business_client, project_id):
+    project = Project.objects.get(pk=project_id)
+    for label in ['b', 'c', 'a']:
+        task_id = make_task({'data': {'text': label}}, project).id
+        make_annotation({'result': [{'value': {'choices': [label]}}]}, task_id)
+
+    query = json.dumps({'ordering': ['tasks:annotations_results']})
+    with CaptureQueriesContext(connection) as queries:
+        response = business_client.get(f'/api/tasks?project={project_id}&fields=all&query={query}')
+    assert response.status_code == 200, response.content
+
+    tasks = response.json()['tasks']
+    assert [task['data']['text'] for task in tasks] == ['a', 'b', 'c']
+    assert all(task['data']['text'] in task['annotations_results'] for task in tasks)
+    # results are aggregated once by the page query, not again for the page ids
+    annotated = [q['sql'] for q in queries.captured_queries if 'AS "annotations_results"' in q['sql']]
+    assert len(annotated) == 1
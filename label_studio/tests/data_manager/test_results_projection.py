@@ -0,0 +1,118 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import json
+
+import boto3
+import pytest
+from data_manager.models import TaskResultsProjection
+from data_manager.results_projection import rebuild_results_projection
+from django.test import override_settings
+from io_storages.models import S3ImportStorage
+from moto import mock_s3
+from projects.models import Project
+from tasks.models import Annotation, Prediction
+
+from ..utils import make_annotation, make_prediction, make_task, project_id  # noqa
+
+
+def _filter_task_ids(business_client, project_id, field, operator, value):
+    filters = {
+        'conjunction': 'and',
+        'items': [{'filter': f'filter:tasks:{field}', 'operator': operator, 'type': 'String', 'value': value}],
+    }
+    response = business_client.post(
+        '/api/dm/views/',
+        data=json.dumps({'project': project_id, 'data': {'filters': filters}}),
+        content_type='application/json',
+    )
+    assert response.status_code == 201, response.content
+
+    response = business_client.get(f'/api/tasks/?view={response.json()["id"]}')
+    assert response.status_code == 200, response.content
+    return sorted(task['id'] for task in response.json()['tasks'])
+
+
+@pytest.mark.django_db
+@override_settings(DATA_MANAGER_RESULTS_PROJECTION=True)
+def test_results_projection(business_client, project_id):
+    project = Project.objects.get(pk=project_id)
+    task_first = make_task({'data': {'text': 'first'}}, project)
+    task_second = make_task({'data': {'text': 'second'}}, project)
+    result = [{'from_name': 'text_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['class_A']}}]
+    annotation = make_annotation({'result': result, 'completed_by': business_client.user}, task_first.id)
+    make_prediction({'result': result, 'model_version': 'v1'}, task_second.id)
+
+    # projections are updated on annotation and prediction save
+    projection = TaskResultsProjection.objects.get(task=task_first)
+    assert 'class_A' in projection.annotations_results
+    assert projection.predictions_results == ''
+    assert 'class_A' in TaskResultsProjection.objects.get(task=task_second).predictions_results
+
+    assert _filter_task_ids(business_client, project_id, 'annotations_results', 'contains', 'class_A') == [
+        task_first.id
+    ]
+    assert _filter_task_ids(business_client, project_id, 'annotations_results', 'not_contains', 'class_A') == [
+        task_second.id
+    ]
+    assert _filter_task_ids(business_client, project_id, 'predictions_results', 'contains', 'class_A') == [
+        task_second.id
+    ]
+
+    response = business_client.get(f'/api/tasks/?project={project_id}&fields=all')
+    tasks = {task['id']: task for task in response.json()['tasks']}
+    assert 'class_A' in tasks[task_first.id]['annotations_results']
+    assert tasks[task_second.id]['annotations_results'] == ''
+
+    # and on delete
+    annotation.delete()
+    assert TaskResultsProjection.objects.get(task=task_first).annotations_results == ''
+    task_first.delete()
+    assert not TaskResultsProjection.objects.filter(task_id=task_first.id).exists()
+
+    # rebuild restores projections of tasks created without signals, e.g. by bulk imports
+    TaskResultsProjection.objects.all().delete()
+    assert Annotation.objects.filter(project_id=project_id).count() == 0
+    assert Prediction.objects.filter(task=task_second).exists()
+    assert rebuild_results_projection(project_id) == 1
+    assert 'class_A' in TaskResultsProjection.objects.get(task=task_second).predictions_results
+
+
+@pytest.mark.django_db
+@override_settings(DATA_MANAGER_RESULTS_PROJECTION=True)
+def test_results_projection_storage_sync(business_client, project_id):
+    project = Project.objects.get(pk=project_id)
+    result = [
+        {
+            'from_name': 'test_batch_predictions',
+            'to_name': 'text',
+            'type': 'choices',
+            'value': {'choices': ['class_B']},
+        }
+    ]
+    task_data = [
+        {'data': {'text': 'with prediction'}, 'predictions': [{'result': result, 'model_version': 'v1'}]},
+        {'data': {'text': 'with annotation'}, 'annotations': [{'result': result}]},
+        {'data': {'text': 'bare'}},
+    ]
+    with mock_s3():
+        s3 = boto3.client('s3', region_name='us-east-1')
+        s3.create_bucket(Bucket='pytest-s3-jsons')
+        s3.put_object(Bucket='pytest-s3-jsons', Key='tasks.json', Body=json.dumps(task_data))
+        storage = S3ImportStorage.objects.create(
+            project=project,
+            bucket='pytest-s3-jsons',
+            aws_access_key_id='example',
+            aws_secret_access_key='example',
+            use_blob_urls=False,
+        )
+        # tasks, annotations and predictions are created in bulk without signals
+        storage.sync()
+
+    tasks = {task.data['text']: task.id for task in project.tasks.all()}
+    assert len(tasks) == 3
+    assert _filter_task_ids(business_client, project_id, 'predictions_results', 'contains', 'class_B') == [
+        tasks['with prediction']
+    ]
+    assert _filter_task_ids(business_client, project_id, 'annotations_results', 'contains', 'class_B') == [
+        tasks['with annotation']
+    ]
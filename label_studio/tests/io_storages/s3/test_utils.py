@@ -39,3 +39,24 @@ def test_catch_and_reraise_from_none_with_trusted_domain():
         with pytest.raises(Exception) as excinfo:
             function_to_test(instance)
         assert 'Original Exception' in str(excinfo.value)
+
+
+@override_settings(S3_TRUSTED_STORAGE_DOMAINS=['trusted-domain.com'])
+def test_catch_and_reraise_from_none_with_generator():
+    class TestClass:
+        s3_endpoint = 'http://untrusted-domain.com'
+
+    instance = TestClass()
+
+    @catch_and_reraise_from_none
+    def generator_to_test(self):
+        yield 'key1'
+        raise Exception('Original Exception')
+
+    with patch('io_storages.s3.utils.extractor.extract_urllib') as mock_extract:
+        mock_extract.return_value.registered_domain = 'untrusted-domain.com'
+        keys = generator_to_test(instance)
+        assert next(keys) == 'key1'
+        with pytest.raises(S3StorageError) as excinfo:
+            next(keys)
+        assert 'Debugging info is not available for s3 endpoints on domain: untrusted-domain.com' in str(excinfo.value)
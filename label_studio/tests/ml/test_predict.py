@@ -1,8 +1,14 @@
 import json
+from unittest import mock
 
 import pytest
+import requests
+from fakeredis import FakeRedis
+from ml.models import MLBackend
+from ml.prediction_fill import fill_predictions, mark_in_flight
+from tasks.models import Prediction, Task
 
-from label_studio.tests.utils import make_project, make_task
+from label_studio.tests.utils import make_project, make_task, register_ml_backend_mock
 
 
 @pytest.mark.django_db
@@ -89,3 +95,178 @@ def test_get_multiple_predictions_on_task(business_client, ml_backend_for_test_p
     assert payload['predictions'][0]['model_version'] == 'ModelA'
     assert payload['predictions'][1]['result'][0]['value']['choices'][0] == 'label_B'
     assert payload['predictions'][1]['model_version'] == 'ModelB'
+
+
+@pytest.mark.django_db
+def test_data_manager_fills_missing_predictions(business_client, ml_backend_for_test_predict):
+    project = make_project(
+        config=dict(
+            is_published=True,
+            label_config="""
+                <View>
+                  <Text name="text" value="$text"></Text>
+                  <Choices name="label" choice="single" toName="text">
+                    <Choice value="label_A"></Choice>
+                    <Choice value="label_B"></Choice>
+                  </Choices>
+                </View>""",
+            title='test_data_manager_fills_missing_predictions',
+            evaluate_predictions_automatically=True,
+        ),
+        user=business_client.user,
+        use_ml_backend=False,
+    )
+    tasks = [make_task({'data': {'text': f'test {i}'}}, project) for i in range(3)]
+
+    backend = MLBackend.objects.create(
+        project=project, title='ModelSingle', url='http://test.ml.backend.for.sdk.com:9092'
+    )
+
+    # the last task is already requested by another page load
+    mark_in_flight(backend.id, tasks[-1].id)
+
+    for _ in range(2):
+        response = business_client.get(f'/api/tasks?fields=all&project={project.id}')
+        assert response.status_code == 200
+        predictions = {task['id']: task['predictions'] for task in response.json()['tasks']}
+
+        for task in tasks[:-1]:
+            assert len(predictions[task.id]) == 1
+            assert predictions[task.id][0]['model_version'] == 'ModelSingle'
+        assert predictions[tasks[-1].id] == []
+
+    assert Prediction.objects.filter(project=project).count() == 2
+    assert Task.objects.get(id=tasks[0].id).total_predictions == 1
+
+
+def test_prediction_fill_in_flight_marks_in_redis():
+    redis = FakeRedis()
+    with mock.patch('ml.prediction_fill.redis_connected', return_value=True), mock.patch(
+        'ml.prediction_fill.get_connection', return_value=redis
+    ):
+        assert mark_in_flight(1, 10)
+        # marks are shared by all processes using the same Redis
+        assert not mark_in_flight(1, 10)
+        assert 0 < redis.ttl('ml_prediction_fill:1:10') <= 600
+
+        # the job releases marks even when the backend is gone
+        with mock.patch('ml.models.MLBackend.objects') as backends:
+            backends.filter.return_value.select_related.return_value.first.return_value = None
+            assert fill_predictions(1, [10]) == 0
+        assert mark_in_flight(1, 10)
+
+
+@pytest.mark.django_db
+def test_predict_tasks_splits_failed_batches_and_retries(business_client, ml_backend, settings):
+    settings.ML_PREDICT_BATCH_SIZE = 4
+    settings.ML_PREDICT_MAX_CONCURRENT_REQUESTS = 1
+    settings.ML_PREDICT_RETRY_BACKOFF = 0
+    project = make_project(
+        config=dict(
+            is_published=True,
+            label_config="""
+                <View>
+                  <Text name="text" value="$text"></Text>
+                  <Choices name="label" choice="single" toName="text">
+                    <Choice value="label_A"></Choice>
+                    <Choice value="label_B"></Choice>
+                  </Choices>
+                </View>""",
+            title='test_predict_tasks_splits_failed_batches_and_retries',
+        ),
+        user=business_client.user,
+        use_ml_backend=False,
+    )
+    tasks = [make_task({'data': {'text': f'test {i}'}}, project) for i in range(7)]
+
+    url = 'http://test.ml.backend.for.sdk.com:9094'
+    register_ml_backend_mock(ml_backend, url=url, setup_model_version='ModelBatch')
+    batch_sizes = []
+
+    def predict(request, context):
+        batch = request.json()['tasks']
+        batch_sizes.append(len(batch))
+        if len(batch_sizes) == 1:
+            # backend is overloaded, the request is retried
+            context.status_code = 503
+            return {}
+        if len(batch) > 2:
+            # batch is too big for backend, it's split in halves
+            context.status_code = 500
+            return {'error': 'Out of memory'}
+        return {
+            'results': [
+                {
+                    'model_version': 'ModelBatch',
+                    'score': 0.5,
+                    'result': [
+                        {'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['label_B']}}
+                    ],
+                }
+                for _ in batch
+            ]
+        }
+
+    ml_backend.post(f'{url}/predict', json=predict)
+    backend = MLBackend.objects.create(project=project, title='ModelBatch', url=url)
+
+    instances = backend.predict_tasks(project.tasks.all())
+
+    assert len(instances) == len(tasks)
+    # retry after 503, split after 500, batch size grows back after success
+    assert batch_sizes == [4, 4, 2, 2, 3, 1, 2]
+    for task in tasks:
+        assert Prediction.objects.filter(task=task, model_version='ModelBatch').count() == 1
+
+
+@pytest.mark.parametrize(
+    'status_code, exc, expected_batch_sizes',
+    [
+        # persistent errors aren't fixed by smaller batches, every batch is sent once
+        (500, None, [4, 3]),
+        (400, None, [4, 3]),
+        # unreachable backend stops the whole run
+        (None, requests.exceptions.ConnectionError, [4]),
+    ],
+)
+@pytest.mark.django_db
+def test_predict_tasks_doesnt_split_persistent_errors(
+    business_client, ml_backend, settings, status_code, exc, expected_batch_sizes
+):
+    settings.ML_PREDICT_BATCH_SIZE = 4
+    settings.ML_PREDICT_MAX_CONCURRENT_REQUESTS = 1
+    settings.ML_PREDICT_RETRY_BACKOFF = 0
+    project = make_project(
+        config=dict(
+            is_published=True,
+            label_config="""
+                <View>
+                  <Text name="text" value="$text"></Text>
+                  <Choices name="label" choice="single" toName="text">
+                    <Choice value="label_A"></Choice>
+                  </Choices>
+                </View>""",
+            title='test_predict_tasks_doesnt_split_persistent_errors',
+        ),
+        user=business_client.user,
+        use_ml_backend=False,
+    )
+    for i in range(7):
+        make_task({'data': {'text': f'test {i}'}}, project)
+
+    url = 'http://test.ml.backend.for.sdk.com:9095'
+    register_ml_backend_mock(ml_backend, url=url, setup_model_version='ModelBroken')
+    batch_sizes = []
+
+    def predict(request, context):
+        batch_sizes.append(len(request.json()['tasks']))
+        if exc:
+            raise exc('Connection refused')
+        context.status_code = status_code
+        return {'error': 'Broken model'}
+
+    ml_backend.post(f'{url}/predict', json=predict)
+    backend = MLBackend.objects.create(project=project, title='ModelBroken', url=url)
+
+    assert backend.predict_tasks(project.tasks.all()) == []
+    assert batch_sizes == expected_batch_sizes
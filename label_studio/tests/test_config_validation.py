@@ -5,11 +5,24 @@ import io
 import json
 import logging
 import os
+from unittest import mock
 
 import pytest
 import yaml
-from core.label_config import parse_config, parse_config_to_json, validate_label_config
+from core.label_config import (
+    config_essential_data_has_changed,
+    get_all_control_tag_tuples,
+    get_all_labels,
+    get_all_types,
+    get_compiled_label_config,
+    get_label_interface,
+    parse_config,
+    parse_config_to_json,
+    validate_label_config,
+)
+from label_studio_sdk._extensions.label_studio_tools.core import label_config as sdk_label_config
 from projects.models import Project
+from rest_framework.exceptions import ValidationError
 
 from label_studio.tests.utils import make_annotation, make_prediction, make_task, project_id  # noqa
 
@@ -220,3 +233,64 @@ def test_label_config_versions(business_client, project_id):
         )
         logger.warning(f'Test: {test_name}')
         assert response.status_code == test_content['status_code']
+
+
+def test_compiled_label_config_is_parsed_once():
+    config = """
+        <View>
+          <Text name="text" value="$text"/>
+          <Choices name="sentiment" toName="text">
+            <Choice value="Positive"/>
+            <Choice value="Negative"/>
+          </Choices>
+          <TextArea name="comment" toName="text"/>
+        </View>"""
+    with mock.patch.object(sdk_label_config, 'parse_config', wraps=sdk_label_config.parse_config) as parse_mock:
+        compiled = get_compiled_label_config(config)
+        for _ in range(2):
+            assert get_compiled_label_config(config) is compiled
+            assert compiled.control_tag_tuples == ['sentiment|text|choices', 'comment|text|textarea']
+            assert compiled.types == ['choices', 'textarea']
+            assert compiled.data_types == {'text': 'Text'}
+            labels, dynamic_labels = get_all_labels(config)
+            assert labels == {'sentiment': ['Positive', 'Negative']}
+            assert not dynamic_labels
+        assert parse_mock.call_count == 1
+    assert get_label_interface(config) is compiled.label_interface
+
+    # callers get their own copies of shared values
+    labels['sentiment'].append('Neutral')
+    labels['comment']
+    assert get_all_labels(config)[0] == {'sentiment': ['Positive', 'Negative']}
+
+
+def test_compiled_label_config_keeps_validation_error():
+    config = (
+        '<View><Text name="text" value="$text"/>'
+        '<Choices name="text" toName="text"><Choice value="A"/></Choices></View>'
+    )
+    for _ in range(2):
+        with pytest.raises(ValidationError, match='non-unique names'):
+            validate_label_config(config)
+
+
+@pytest.mark.parametrize('config', [None, ''])
+def test_compiled_label_config_empty(config):
+    assert get_compiled_label_config(config).parsed == {}
+    assert get_all_labels(config) == ({}, {})
+    assert get_all_control_tag_tuples(config) == []
+    assert get_all_types(config) == []
+    assert not config_essential_data_has_changed(config, config)
+
+
+@pytest.mark.django_db
+def test_patch_label_config_of_project_without_config(business_client, project_id):
+    Project.objects.filter(id=project_id).update(label_config=None)
+    payload = {'label_config': '<View><Text name="text" value="$text"/></View>'}
+    response = business_client.patch(
+        f'/api/projects/{project_id}',
+        data=json.dumps(payload),
+        content_type='application/json',
+    )
+    assert response.status_code == 200, response.content
+    assert Project.objects.get(id=project_id).label_config == payload['label_config']
@@ -1,7 +1,9 @@
 import json
+from unittest import mock
 
 import pytest
 import responses
+from django.test import RequestFactory
 
 
 @responses.activate
@@ -19,3 +21,68 @@ def test_contextlog(business_client, contextlog_test_config):
     assert responses.calls
     assert r.status_code == 200
     assert 'env' not in json.loads(responses.calls[0].request.body)
+
+
+@responses.activate
+def test_contextlog_sender_drops_over_queue_size(settings):
+    from core.utils.contextlog import ContextLogSender
+
+    responses.add(responses.POST, ContextLogSender.url, json={'ok': 'true'}, status=201)
+    settings.CONTEXTLOG_QUEUE_SIZE = 2
+    sender = ContextLogSender()
+
+    # requests never wait for the sender, items over the queue size are dropped
+    with mock.patch.object(sender, '_ensure_started'):
+        for i in range(3):
+            sender.enqueue(json.dumps({'body': i}).encode())
+    assert sender.dropped == 1
+
+    sender._ensure_started()
+    sender.queue.join()
+    responses.assert_call_count(ContextLogSender.url, 2)
+    assert [json.loads(call.request.body)['body'] for call in responses.calls] == [0, 1]
+    assert sender.queued_bytes == 0
+
+
+def test_contextlog_sender_drops_over_queue_max_bytes(settings):
+    from core.utils.contextlog import ContextLogSender
+
+    settings.CONTEXTLOG_QUEUE_MAX_BYTES = 10
+    sender = ContextLogSender()
+
+    with mock.patch.object(sender, '_ensure_started'):
+        sender.enqueue(b'{"a": 1}')
+        sender.enqueue(b'{"b": 2}')
+        sender.enqueue(b'{}')
+    assert sender.dropped == 1
+    assert sender.queue.qsize() == 2
+    assert sender.queued_bytes == 10
+
+
+@responses.activate
+@pytest.mark.django_db
+def test_contextlog_queues_serialized_payloads(business_client, contextlog_test_config, settings):
+    from core.utils.contextlog import ContextLogSender
+
+    settings.CONTEXTLOG_SYNC = False
+    with mock.patch.object(ContextLogSender, 'enqueue') as enqueue:
+        r = business_client.get('/api/users/')
+
+    assert r.status_code == 200
+    enqueue.assert_called_once()
+    data = enqueue.call_args.args[0]
+    assert isinstance(data, bytes)
+    assert json.loads(data)['view_name'] == 'user-list'
+
+
+def test_contextlog_large_body_is_not_logged(settings):
+    from core.utils.contextlog import ContextLog
+
+    settings.COLLECT_ANALYTICS = True
+    settings.CONTEXTLOG_MAX_BODY_SIZE = 10
+    factory = RequestFactory()
+    log = ContextLog()
+
+    assert log.read_body(factory.post('/api/', data='{"a": 1}', content_type='application/json')) == b'{"a": 1}'
+    assert log.read_body(factory.post('/api/', data='{"a": "long value"}', content_type='application/json')) is None
+    assert log._parse_body(b'{"a": 1}') == {'a': 1}
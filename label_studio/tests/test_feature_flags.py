@@ -0,0 +1,44 @@
+from unittest import mock
+
+import pytest
+from core.feature_flags import base as feature_flags
+from core.feature_flags import clear_flags_cache, flag_set, flags_snapshot
+from django.contrib.auth.models import AnonymousUser
+
+FLAG = 'fflag_test_feature_flags_cache_short'
+
+
+@pytest.mark.django_db
+def test_flag_set_snapshot_cache(business_client):
+    user = business_client.user
+    with mock.patch.object(feature_flags.client, 'variation', return_value=True) as variation:
+        with flags_snapshot():
+            assert all(flag_set(FLAG, user=user) for _ in range(5))
+            assert flag_set(FLAG, user=user, override_system_default=True)
+        assert variation.call_count == 2
+
+        # evaluations of authenticated users are not cached outside of snapshots and requests
+        flag_set(FLAG, user=user)
+        flag_set(FLAG, user=user)
+        assert variation.call_count == 4
+
+
+def test_flag_set_anonymous_process_cache(settings):
+    settings.FEATURE_FLAGS_CACHE_TTL = 10
+    clear_flags_cache()
+    evaluated = feature_flags.flag_cache_stats['evaluated']
+    avoided = feature_flags.flag_cache_stats['avoided']
+
+    with mock.patch.object(feature_flags.client, 'variation', return_value=False) as variation:
+        for user in ['auto', None, AnonymousUser()]:
+            assert not flag_set(FLAG, user=user)
+        assert variation.call_count == 1
+
+        clear_flags_cache()
+        settings.FEATURE_FLAGS_CACHE_TTL = 0
+        flag_set(FLAG, user='auto')
+        flag_set(FLAG, user='auto')
+        assert variation.call_count == 3
+
+    assert feature_flags.flag_cache_stats['evaluated'] - evaluated == 3
+    assert feature_flags.flag_cache_stats['avoided'] - avoided == 2
@@ -0,0 +1,72 @@
+"""This file and its contents are licensed under the Apache License 2.0. Please see the included NOTICE for copyright information and LICENSE for a copy of the license.
+"""
+import json
+
+import pytest
+from labels_manager.functions import bulk_update_label
+from projects.models import Project
+
+from .utils import make_annotation, make_task, project_id  # noqa
+
+
+def _choices(*labels):
+    return [{'from_name': 'label', 'to_name': 'text', 'type': 'choices', 'value': {'choices': list(labels)}}]
+
+
+@pytest.mark.django_db
+def test_bulk_update_label_in_batches(settings, project_id):
+    settings.BATCH_SIZE = 2
+    project = Project.objects.get(pk=project_id)
+    annotations = []
+    for labels in (['pos'], ['neg'], ['pos'], ['pos', 'neg'], ['pos'], ['positive']):
+        task = make_task({'data': {'text': 'text'}}, project)
+        annotations.append(make_annotation({'result': _choices(*labels)}, task.id))
+
+    # resume after the first annotation, it stays untouched
+    updated_count = bulk_update_label(
+        ['pos'], ['negative'], project.organization, project=project, start_after_id=annotations[0].id
+    )
+
+    assert updated_count == 2
+    results = []
+    for annotation in annotations:
+        annotation.refresh_from_db()
+        results.append(annotation.result[0]['value']['choices'])
+    assert results == [['pos'], ['neg'], ['negative'], ['pos', 'neg'], ['negative'], ['positive']]
+
+
+@pytest.mark.django_db
+def test_bulk_update_label_api(business_client, project_id):
+    project = Project.objects.get(pk=project_id)
+    task = make_task({'data': {'text': 'text'}}, project)
+    annotation = make_annotation({'result': _choices('pos')}, task.id)
+
+    response = business_client.post(
+        '/api/labels/bulk',
+        data=json.dumps({'project': project.id, 'old_label': ['pos'], 'new_label': ['neg']}),
+        content_type='application/json',
+    )
+
+    assert response.status_code == 200
+    # without background workers labels are updated synchronously and the number of updated labels is returned
+    assert response.json() == {'annotations_updated': 1}
+    annotation.refresh_from_db()
+    assert annotation.result[0]['value']['choices'] == ['neg']
+
+
+@pytest.mark.django_db
+def test_bulk_update_label_api_job(business_client, project_id, mocker):
+    project = Project.objects.get(pk=project_id)
+    job = mocker.Mock(id='job-1')
+    start_job = mocker.patch('labels_manager.api.start_job_async_or_sync', return_value=job)
+
+    response = business_client.post(
+        '/api/labels/bulk',
+        data=json.dumps({'project': project.id, 'old_label': ['pos'], 'new_label': ['neg']}),
+        content_type='application/json',
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {'annotations_updated': None, 'job_id': 'job-1'}
+    assert start_job.call_args.args == (bulk_update_label,)
+    assert start_job.call_args.kwargs['project'] == project
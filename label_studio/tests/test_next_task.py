@@ -18,6 +18,7 @@ from .utils import (
     make_annotator,
     make_project,
     make_task,
+    mock_feature_flag,
 )
 
 _project_for_text_choices_onto_A_B_classes = dict(
@@ -1327,3 +1328,151 @@ def test_overlap_first(business_client, setup_before_upload, show_overlap_first)
     else:
         assert not all_tasks_with_overlap_are_labeled
         assert not all_tasks_without_overlap_are_not_labeled
+
+
+@pytest.mark.django_db
+def test_next_task_precomputed_queue(business_client, settings):
+    from fakeredis import FakeRedis
+    from projects.functions.next_task_queue import _get_queue_key
+
+    settings.NEXT_TASK_QUEUE_ENABLED = True
+    config = dict(
+        title='test_next_task_precomputed_queue',
+        is_published=True,
+        maximum_annotations=1,
+        sampling=Project.SEQUENCE,
+        label_config="""
+            <View>
+              <Text name="text" value="$text"></Text>
+              <Choices name="text_class" choice="single" toName="text">
+                <Choice value="class_A"></Choice>
+                <Choice value="class_B"></Choice>
+              </Choices>
+            </View>""",
+    )
+    annotation_result = [
+        {'from_name': 'text_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['class_A']}}
+    ]
+    project = make_project(config, business_client.user)
+    ids = [make_task({'data': {'text': str(i)}}, project).id for i in range(3)]
+    ann1 = make_annotator({'email': 'ann1@testprecomputedqueue.com'}, project, True)
+
+    redis = FakeRedis()
+    with mock.patch('projects.functions.next_task_queue.redis_connected', return_value=True), mock.patch(
+        'projects.functions.next_task_queue.get_connection', return_value=redis
+    ):
+        # the first call fills the queue and returns the first task in sequence
+        r = ann1.get(f'/api/projects/{project.id}/next')
+        assert r.status_code == 200
+        assert json.loads(r.content)['id'] == ids[0]
+        assert [int(i) for i in redis.lrange(_get_queue_key(project.id), 0, -1)] == ids
+
+        # labeled task is removed from the queue
+        make_annotation({'result': annotation_result, 'completed_by': ann1.annotator}, ids[0])
+        assert [int(i) for i in redis.lrange(_get_queue_key(project.id), 0, -1)] == ids[1:]
+
+        r = ann1.get(f'/api/projects/{project.id}/next')
+        assert r.status_code == 200
+        assert json.loads(r.content)['id'] == ids[1]
+
+        # sampling change drops the queue
+        project.sampling = Project.UNIFORM
+        project.save()
+        assert not redis.exists(_get_queue_key(project.id))
+
+
+@pytest.mark.django_db
+@mock_feature_flag('fflag_feat_all_leap_1825_annotator_evaluation_short', True, 'projects.functions.next_task')
+def test_next_task_precomputed_queue_ground_truth_onboarding(business_client, settings):
+    from fakeredis import FakeRedis
+    from projects.functions.next_task_queue import _get_queue_key
+
+    settings.NEXT_TASK_QUEUE_ENABLED = True
+    config = dict(
+        title='test_next_task_precomputed_queue_ground_truth_onboarding',
+        is_published=True,
+        maximum_annotations=1,
+        sampling=Project.SEQUENCE,
+        show_ground_truth_first=True,
+        label_config="""
+            <View>
+              <Text name="text" value="$text"></Text>
+              <Choices name="text_class" choice="single" toName="text">
+                <Choice value="class_A"></Choice>
+                <Choice value="class_B"></Choice>
+              </Choices>
+            </View>""",
+    )
+    annotation_result = [
+        {'from_name': 'text_class', 'to_name': 'text', 'type': 'choices', 'value': {'choices': ['class_A']}}
+    ]
+    project = make_project(config, business_client.user)
+    ids = [make_task({'data': {'text': str(i)}}, project).id for i in range(3)]
+    # the last task is labeled ground truth, it's not an unlabeled queue candidate
+    make_annotation({'result': annotation_result, 'ground_truth': True}, ids[-1])
+    ann1 = make_annotator({'email': 'ann1@testprecomputedqueuegt.com'}, project, True)
+
+    redis = FakeRedis()
+    with mock.patch('projects.functions.next_task_queue.redis_connected', return_value=True), mock.patch(
+        'projects.functions.next_task_queue.get_connection', return_value=redis
+    ):
+        r = ann1.get(f'/api/projects/{project.id}/next')
+        assert r.status_code == 200
+        assert json.loads(r.content)['id'] == ids[-1]
+        assert not redis.exists(_get_queue_key(project.id))
+
+
+@pytest.mark.django_db
+def test_next_task_redis_locks(business_client, settings):
+    from fakeredis import FakeRedis
+    from tasks.models import TaskLock
+
+    settings.TASK_LOCK_BACKEND = 'redis'
+    config = dict(
+        title='test_next_task_redis_locks',
+        is_published=True,
+        maximum_annotations=1,
+        sampling=Project.SEQUENCE,
+        label_config="""
+            <View>
+              <Text name="text" value="$text"></Text>
+              <Choices name="text_class" choice="single" toName="text">
+                <Choice value="class_A"></Choice>
+                <Choice value="class_B"></Choice>
+              </Choices>
+            </View>""",
+    )
+    project = make_project(config, business_client.user)
+    ids = [make_task({'data': {'text': str(i)}}, project).id for i in range(2)]
+    ann1 = make_annotator({'email': 'ann1@testredislocks.com'}, project, True)
+    ann2 = make_annotator({'email': 'ann2@testredislocks.com'}, project, True)
+
+    redis = FakeRedis()
+    with mock.patch('tasks.locks.redis_connected', return_value=True), mock.patch(
+        'tasks.locks.get_connection', return_value=redis
+    ):
+        r = ann1.get(f'/api/projects/{project.id}/next')
+        assert r.status_code == 200
+        first = json.loads(r.content)
+        assert first['id'] == ids[0]
+        assert first['unique_lock_id']
+
+        # the task is locked by ann1 up to its overlap, so ann2 gets the next one
+        r = ann2.get(f'/api/projects/{project.id}/next')
+        assert r.status_code == 200
+        assert json.loads(r.content)['id'] == ids[1]
+
+        # ann1 gets back the task locked by them with the same lock
+        r = ann1.get(f'/api/projects/{project.id}/next')
+        assert r.status_code == 200
+        assert json.loads(r.content)['id'] == ids[0]
+        assert json.loads(r.content)['unique_lock_id'] == first['unique_lock_id']
+
+        task = Task.objects.get(id=ids[0])
+        assert task.num_locks == 1
+        assert task.num_locks_user(ann1.annotator) == 0
+        assert not TaskLock.objects.exists()
+
+        task.release_lock(ann1.annotator)
+        assert task.num_locks == 0
+        assert Task.get_locked_by(ann1.annotator, project=project) is None
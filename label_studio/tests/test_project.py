@@ -2,7 +2,8 @@ import json
 
 import pytest
 from django.db.models.query import QuerySet
-from tests.utils import make_project
+from projects.models import ProjectCounters
+from tests.utils import make_annotation, make_prediction, make_project, make_task
 from users.models import User
 
 
@@ -40,3 +41,39 @@ def test_project_all_members(business_client):
 
     assert isinstance(members, QuerySet)
     assert isinstance(members.first(), User)
+
+
+@pytest.mark.django_db
+def test_project_list_materialized_counters(business_client, settings):
+    settings.PROJECT_COUNTERS_MATERIALIZED = True
+    project = make_project({}, business_client.user, use_ml_backend=False)
+
+    def get_counts():
+        r = business_client.get('/api/projects/counts/')
+        assert r.status_code == 200
+        return next(item for item in r.json()['results'] if item['id'] == project.id)
+
+    # counters are created on the first read
+    assert get_counts()['task_number'] == 0
+    assert not ProjectCounters.objects.get(project=project).is_stale
+
+    task = make_task({'data': {'text': 'text A'}}, project)
+    make_task({'data': {'text': 'text B'}}, project)
+    make_annotation({'result': [], 'completed_by': business_client.user}, task.id)
+    make_prediction({'result': []}, task.id)
+    assert ProjectCounters.objects.get(project=project).is_stale
+
+    # without async workers stale counters are recalculated on read
+    counts = get_counts()
+    assert counts['task_number'] == 2
+    assert counts['total_annotations_number'] == 1
+    assert counts['total_predictions_number'] == 1
+    assert counts['num_tasks_with_annotations'] == 1
+
+    r = business_client.get('/api/projects/')
+    assert r.status_code == 200
+    item = next(item for item in r.json()['results'] if item['id'] == project.id)
+    assert item['task_number'] == 2
+
+    task.delete()
+    assert get_counts()['task_number'] == 1
@@ -1,7 +1,10 @@
 import json
+from unittest import mock
 
 import pytest
-from tasks.models import Task
+from fakeredis import FakeRedis
+from projects.models import ProjectSummary
+from tasks.models import Annotation, Task
 from tests.conftest import project_choices
 from tests.utils import make_project
 
@@ -146,3 +149,59 @@ def test_logged_out_user_cannot_reset_summary(business_client):
     assert r.status_code == 401
     assert 'detail' in (r_json := r.json())
     assert r_json['detail'] == 'Authentication credentials were not provided.'
+
+
+def test_summary_deltas_are_folded_on_read(business_client, settings, django_capture_on_commit_callbacks):
+    settings.PROJECT_SUMMARY_DELTAS = True
+    project = make_project(project_choices(), business_client.user, use_ml_backend=False)
+    result = [{'from_name': 'some', 'to_name': 'x', 'type': 'none', 'value': {'none': ['Opossum']}}]
+
+    redis = FakeRedis()
+    with mock.patch('projects.functions.summary_deltas.redis_connected', return_value=True), mock.patch(
+        'projects.functions.summary_deltas.get_connection', return_value=redis
+    ):
+        check_summary_deltas(business_client, project, result, django_capture_on_commit_callbacks)
+
+
+def check_summary_deltas(business_client, project, result, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        task = Task.objects.create(project=project, data={'image': 'kittens.jpg'})
+        annotation = Annotation.objects.create(project=project, task=task, result=result)
+        annotation.result = [{'from_name': 'some', 'to_name': 'x', 'type': 'none', 'value': {'none': ['Mouse']}}]
+        annotation.save()
+        Annotation.objects.create(project=project, task=task, result=result)
+
+    # hot writes don't touch counters in the summary row
+    s = ProjectSummary.objects.get(project=project)
+    assert s.created_labels == {}
+    assert s.all_data_columns == {}
+
+    r = business_client.get(f'/api/projects/{project.id}/summary/')
+    assert r.status_code == 200
+    assert r.json()['created_annotations'] == {'some|x|none': 2}
+    assert r.json()['created_labels'] == {'some': {'Mouse': 1, 'Opossum': 1}}
+    assert r.json()['all_data_columns'] == {'image': 1}
+    assert r.json()['common_data_columns'] == ['image']
+
+    s.refresh_from_db()
+    assert s.created_labels == {'some': {'Mouse': 1, 'Opossum': 1}}
+
+
+def test_summary_deltas_fold_into_locked_row(business_client, settings):
+    settings.PROJECT_SUMMARY_DELTAS = True
+    project = make_project(project_choices(), business_client.user, use_ml_backend=False)
+    # both instances are loaded before any fold, so their counters get stale
+    first = ProjectSummary.objects.get(project=project)
+    second = ProjectSummary.objects.get(project=project)
+
+    redis = FakeRedis()
+    with mock.patch('projects.functions.summary_deltas.redis_connected', return_value=True), mock.patch(
+        'projects.functions.summary_deltas.get_connection', return_value=redis
+    ):
+        redis.hincrby(f'project_summary_deltas:{project.id}', json.dumps(['columns', 'image']), 2)
+        first.fold_summary_deltas()
+        redis.hincrby(f'project_summary_deltas:{project.id}', json.dumps(['columns', 'text']), 1)
+        second.fold_summary_deltas()
+
+    assert second.all_data_columns == {'image': 2, 'text': 1}
+    assert ProjectSummary.objects.get(project=project).all_data_columns == {'image': 2, 'text': 1}
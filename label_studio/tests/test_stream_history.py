@@ -0,0 +1,37 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from projects.functions.stream_history import add_stream_history, get_label_stream_history
+from tests.conftest import project_choices
+from tests.utils import make_annotation, make_project, make_task
+
+pytestmark = pytest.mark.django_db
+
+
+def test_stream_history_writes_only_changes(business_client, settings):
+    settings.LABEL_STREAM_HISTORY_LIMIT = 2
+    user = business_client.user
+    project = make_project(project_choices(), user, use_ml_backend=False)
+    tasks = [make_task({'data': {'image': f'{i}.jpg'}}, project) for i in range(3)]
+
+    for task in tasks:
+        add_stream_history(task, user, project)
+
+    # the same task again is a single read
+    with CaptureQueriesContext(connection) as queries:
+        add_stream_history(tasks[-1], user, project)
+    assert len(queries) == 1
+
+    annotation = make_annotation({'result': []}, tasks[2].id)
+    history = user.histories.get(project=project)
+    history.data[-1]['annotationId'] = annotation.id
+    history.save()
+    assert get_label_stream_history(user, project) == [
+        {'taskId': tasks[1].id, 'annotationId': None},
+        {'taskId': tasks[2].id, 'annotationId': annotation.id},
+    ]
+
+    annotation.delete()
+    tasks[1].delete()
+    assert get_label_stream_history(user, project) == [{'taskId': tasks[2].id, 'annotationId': None}]
+    assert user.histories.get(project=project).data == [{'taskId': tasks[2].id, 'annotationId': None}]
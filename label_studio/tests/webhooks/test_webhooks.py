@@ -1,13 +1,25 @@
 import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
 from unittest import TestCase
 
 import pytest
 import requests
 import requests_mock
+import webhooks.utils
+from django.test import override_settings
 from django.urls import reverse
 from projects.models import Project
 from webhooks.models import Webhook, WebhookAction
-from webhooks.utils import emit_webhooks, emit_webhooks_for_instance, run_webhook
+from webhooks.utils import (
+    emit_webhooks,
+    emit_webhooks_for_instance,
+    get_webhook_session,
+    run_webhook,
+    run_webhook_sync,
+    send_webhooks,
+)
 
 
 @pytest.fixture
@@ -98,6 +110,108 @@ def test_exception_catch(organization_webhook):
     assert result is None
 
 
+@pytest.mark.django_db
+def test_emit_webhooks_concurrently(setup_project_dialog, organization_webhook, project_webhook):
+    with requests_mock.Mocker(real_http=True) as m:
+        m.register_uri('POST', organization_webhook.url)
+        m.register_uri('POST', project_webhook.url)
+        with override_settings(WEBHOOK_DELIVERY_WORKERS=2):
+            emit_webhooks(
+                organization_webhook.organization,
+                project_webhook.project,
+                WebhookAction.TASKS_CREATED,
+                {'data': 'test'},
+            )
+
+    urls = [organization_webhook.url, project_webhook.url]
+    history = [r for r in m.request_history if r.url in urls]
+    assert sorted(r.url for r in history) == sorted(urls)
+    assert all(r.json()['action'] == WebhookAction.TASKS_CREATED for r in history)
+
+
+@pytest.mark.django_db
+def test_run_webhook_retries_unavailable_receiver(organization_webhook):
+    requests_received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            requests_received.append(self.path)
+            # receiver is unavailable for the first request only
+            self.send_response(503 if len(requests_received) == 1 else 200)
+            self.send_header('Retry-After', '60')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        organization_webhook.url = f'http://127.0.0.1:{server.server_port}/webhook'
+        # synchronous delivery retries by default, Retry-After isn't waited for
+        with override_settings(WEBHOOK_TIMEOUT=5):
+            # the session is configured on first use
+            webhooks.utils._session = None
+            start = time.monotonic()
+            response = run_webhook_sync(organization_webhook, WebhookAction.PROJECT_CREATED)
+            assert time.monotonic() - start < 5
+            assert get_webhook_session() is get_webhook_session()
+    finally:
+        server.shutdown()
+        server.server_close()
+        webhooks.utils._session = None
+
+    assert response.status_code == 200
+    assert requests_received == ['/webhook', '/webhook']
+
+
+@pytest.mark.django_db
+def test_run_webhook_doesnt_retry_read_timeout(organization_webhook):
+    requests_received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers['Content-Length']))
+            requests_received.append(self.path)
+            # the receiver has got the payload, but answers too late
+            time.sleep(0.5)
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        organization_webhook.url = f'http://127.0.0.1:{server.server_port}/webhook'
+        with override_settings(WEBHOOK_MAX_RETRIES=2, WEBHOOK_RETRY_BACKOFF=0, WEBHOOK_TIMEOUT=0.1):
+            webhooks.utils._session = None
+            response = run_webhook_sync(organization_webhook, WebhookAction.PROJECT_CREATED)
+    finally:
+        server.shutdown()
+        server.server_close()
+        webhooks.utils._session = None
+
+    assert response is None
+    assert requests_received == ['/webhook']
+
+
+@pytest.mark.django_db
+def test_send_webhooks_logs_worker_exceptions(organization_webhook, project_webhook, caplog, mocker):
+    mocker.patch('webhooks.utils.run_webhook_sync', side_effect=ValueError('broken payload'))
+    with override_settings(WEBHOOK_DELIVERY_WORKERS=2, WEBHOOK_ASYNC_DELIVERY=False):
+        send_webhooks([organization_webhook, project_webhook], WebhookAction.TASKS_CREATED)
+
+    errors = [r for r in caplog.records if r.levelname == 'ERROR' and 'broken payload' in r.getMessage()]
+    assert len(errors) == 2
+
+
 # PROJECT CREATE/UPDATE/DELETE API
 @pytest.mark.django_db
 def test_webhooks_for_projects(configured_project, business_client, organization_webhook):
@@ -1,18 +1,30 @@
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
 
 import requests
 from core.feature_flags import flag_set
-from core.redis import start_job_async_or_sync
+from core.redis import redis_connected, start_job_async_or_sync
 from core.utils.common import load_func
 from django.conf import settings
 from django.db.models import Q
 from django.db.models.query import QuerySet
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .models import Webhook, WebhookAction
 
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
 
 def get_active_webhooks(organization, project, action):
     """Return all active webhooks for organization or project by action.
@@ -40,6 +52,45 @@ def get_active_webhooks(organization, project, action):
     ).distinct()
 
 
+def get_webhook_session():
+    """Get HTTP session shared by all webhook deliveries of the process
+
+    Connections are kept alive and reused between deliveries. Not more than WEBHOOK_MAX_CONNECTIONS_PER_HOST
+    requests go to the same host at once, others wait for a free connection.
+    Connection errors and 429/5xx responses are retried with exponential backoff. Read errors are never retried,
+    the receiver could have already processed the POST. Retry-After is ignored to keep the delivery time bounded.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            # pooled connections can't be shared with forked processes (uwsgi workers, rq jobs)
+            if _session is None or _session_pid != pid:
+                retry = Retry(
+                    total=settings.WEBHOOK_MAX_RETRIES,
+                    connect=settings.WEBHOOK_MAX_RETRIES,
+                    status=settings.WEBHOOK_MAX_RETRIES,
+                    read=0,
+                    other=0,
+                    backoff_factor=settings.WEBHOOK_RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=None,
+                    raise_on_status=False,
+                    respect_retry_after_header=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_maxsize=settings.WEBHOOK_MAX_CONNECTIONS_PER_HOST,
+                    pool_block=True,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
 def run_webhook_sync(webhook, action, payload=None):
     """Run one webhook for action.
 
@@ -50,17 +101,61 @@ def run_webhook_sync(webhook, action, payload=None):
     }
     if webhook.send_payload and payload:
         data.update(payload)
+
+    start = time.monotonic()
+    response = None
     try:
         logging.debug('Run webhook %s for action %s', webhook.id, action)
-        return requests.post(
+        response = get_webhook_session().post(
             webhook.url,
             headers=webhook.headers,
             json=data,
             timeout=settings.WEBHOOK_TIMEOUT,
         )
+        return response
     except requests.RequestException as exc:
         logging.error(exc, exc_info=True)
         return
+    finally:
+        latency = time.monotonic() - start
+        status_code = response.status_code if response is not None else None
+        # latency and status are passed as structured fields to be aggregated by log based metrics
+        logger.debug(
+            f'Webhook {webhook.id} for {action} delivered with status {status_code} in {latency:.3f} seconds',
+            extra={
+                'webhook_id': webhook.id,
+                'webhook_action': action,
+                'webhook_status_code': status_code,
+                'webhook_latency': latency,
+            },
+        )
+
+
+def send_webhooks(webhooks, action, payload=None):
+    """Deliver action to all webhooks
+
+    With WEBHOOK_ASYNC_DELIVERY every delivery is enqueued as a separate RQ job, so the queue works as an outbox
+    and the caller doesn't wait for receivers. Otherwise webhooks are sent concurrently and the caller
+    waits until all of them are delivered.
+    """
+    webhooks = list(webhooks)
+    if settings.WEBHOOK_ASYNC_DELIVERY and redis_connected():
+        for wh in webhooks:
+            start_job_async_or_sync(run_webhook_sync, wh, action, payload, queue_name='high')
+    elif len(webhooks) > 1 and settings.WEBHOOK_DELIVERY_WORKERS > 1:
+        workers = min(settings.WEBHOOK_DELIVERY_WORKERS, len(webhooks))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_webhook_sync, wh, action, payload): wh for wh in webhooks}
+            for future in as_completed(futures):
+                exc = future.exception()
+                if exc is not None:
+                    logger.error(
+                        f'Webhook {futures[future].id} for {action} failed: {exc}',
+                        exc_info=(type(exc), exc, exc.__traceback__),
+                    )
+    else:
+        for wh in webhooks:
+            run_webhook_sync(wh, action, payload)
 
 
 def emit_webhooks_sync(organization, project, action, payload):
@@ -70,8 +165,7 @@ def emit_webhooks_sync(organization, project, action, payload):
     webhooks = get_active_webhooks(organization, project, action)
     if project and payload and webhooks.filter(send_payload=True).exists():
         payload['project'] = load_func(settings.WEBHOOK_SERIALIZERS['project'])(instance=project).data
-    for wh in webhooks:
-        run_webhook_sync(wh, action, payload)
+    send_webhooks(webhooks, action, payload)
 
 
 def _process_webhook_batch(webhooks, project, action, batch, action_meta):
@@ -98,8 +192,7 @@ def _process_webhook_batch(webhooks, project, action, batch, action_meta):
                     instance=get_nested_field(batch, value['field']), many=value['many']
                 ).data
 
-    for wh in webhooks:
-        run_webhook_sync(wh, action, payload)
+    send_webhooks(webhooks, action, payload)
 
 
 def emit_webhooks_for_instance_sync(organization, project, action, instance=None):